@@ -17,6 +17,7 @@ db = client.Fireguard
 location_collection: Collection = db["locations"]
 user_collection: Collection = db["users"]
 fire_risk_collection: Collection = db["firerisks"]
+checkpoint_collection: Collection = db["checkpoints"]
 
 
 def serialize_objectid(obj):
@@ -71,3 +72,7 @@ def get_user_collection() -> Collection:
 
 def get_fire_risk_collection() -> Collection:
     return fire_risk_collection
+
+
+def get_checkpoint_collection() -> Collection:
+    return checkpoint_collection
@@ -1,14 +1,19 @@
 import datetime
+import importlib.util
 import logging
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
 from motor.motor_asyncio import AsyncIOMotorCollection
 
 from backend.models.models import Location
-from backend.mongo import get_fire_risk_collection, get_location_collection, serialize_document
+from backend.mongo import get_checkpoint_collection, get_fire_risk_collection, get_location_collection, serialize_document
 from backend.services.fire_risk_service import FireRiskService
 from dynamic_frcm.src.frcm.datamodel.model import Location as FrcmLocation
+from dynamic_frcm.src.frcm.datamodel.model import SimulationState
+from dynamic_frcm.src.frcm.fireriskmodel.quality import QualityError
 
 
 def convert_backend_location_to_frcm(backend_location: Location) -> FrcmLocation:
@@ -31,6 +36,27 @@ firerisk_router = APIRouter(prefix="/firerisks", tags=["Fire Risk"])
 
 logger = logging.getLogger(__name__)
 
+# encodings of a computed prediction, selected by the Accept header. Row-oriented JSON (one object per hour) is the
+# default, the others are columnar - start, step (seconds) and arrays of ttf and wind speed. The binary form is
+# described in dynamic_frcm/src/frcm/datamodel/series.py (FireRiskSeries.to_binary).
+JSON = "application/json"
+COLUMNAR_JSON = "application/vnd.frcm.columnar+json"
+MSGPACK = "application/msgpack"
+BINARY = "application/octet-stream"
+
+MEDIA_TYPES = {
+    JSON: JSON,
+    "*/*": JSON,
+    "application/*": JSON,
+    COLUMNAR_JSON: COLUMNAR_JSON,
+    MSGPACK: MSGPACK,
+    "application/x-msgpack": MSGPACK,
+    BINARY: BINARY,
+}
+
+# MessagePack is only offered if the optional msgpack package is installed
+MSGPACK_AVAILABLE = importlib.util.find_spec("msgpack") is not None
+
 
 async def find_fire_risk(location_name: str, time: datetime, fire_risk_collection: AsyncIOMotorCollection):
     doc = await fire_risk_collection.find_one({"locationName": location_name, "time": time})
@@ -46,44 +72,138 @@ async def get_location_by_name(
     return Location(**doc) if doc else None
 
 
-async def calculate_fire_risk_prediction(location: Location, start_time: Optional[str], end_time: Optional[str]):
+async def find_checkpoint(location_name: str, checkpoint_collection: AsyncIOMotorCollection) -> Optional[SimulationState]:
+    doc = await checkpoint_collection.find_one({"locationName": location_name})
+    if not doc:
+        return None
+    checkpoint = doc["checkpoint"]
+    # MongoDB returns naive datetimes in UTC
+    if checkpoint["timestamp"].tzinfo is None:
+        checkpoint["timestamp"] = checkpoint["timestamp"].replace(tzinfo=datetime.timezone.utc)
+    return SimulationState(**checkpoint)
+
+
+async def store_checkpoint(location_name: str, checkpoint: SimulationState, checkpoint_collection: AsyncIOMotorCollection):
+    await checkpoint_collection.update_one(
+        {"locationName": location_name},
+        {"$set": {"locationName": location_name, "checkpoint": checkpoint.model_dump()}},
+        upsert=True,
+    )
+
+
+def parse_period_time(time: Optional[str]) -> Optional[datetime.datetime]:
+    if not time:
+        return None
+    try:
+        parsed = datetime.datetime.fromisoformat(time)
+    except ValueError:
+        logger.error(f"Invalid time format: {time}")
+        raise HTTPException(status_code=400, detail="Invalid time format. Please use ISO format.")
+    # weather data timestamps are in UTC
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=datetime.timezone.utc)
+
+
+def select_encoding(accept: Optional[str]) -> str:
+    """
+    Selects the encoding of a prediction from the media ranges of an Accept header, in order of their quality
+    (q) value. Falls back to row-oriented JSON if no supported encoding is acceptable.
+    """
+    ranges = []
+    for media_range in (accept or "").split(","):
+        media_type, *params = [part.strip() for part in media_range.split(";")]
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if media_type and quality > 0:
+            ranges.append((quality, media_type.lower()))
+
+    # sorted is stable, ranges with the same quality keep the order of the header
+    for _, media_type in sorted(ranges, key=lambda r: -r[0]):
+        encoding = MEDIA_TYPES.get(media_type)
+        if encoding == MSGPACK and not MSGPACK_AVAILABLE:
+            continue
+        if encoding is not None:
+            return encoding
+    return JSON
+
+
+def encode_prediction(prediction, encoding: str):
+    if encoding == COLUMNAR_JSON:
+        return JSONResponse(prediction.to_columns(), media_type=COLUMNAR_JSON, headers={"Vary": "Accept"})
+    if encoding == MSGPACK:
+        return Response(prediction.to_msgpack(), media_type=MSGPACK, headers={"Vary": "Accept"})
+    if encoding == BINARY:
+        return Response(prediction.to_binary(), media_type=BINARY, headers={"Vary": "Accept"})
+    return prediction.to_prediction()
+
+
+async def calculate_fire_risk_prediction(
+    location: Location,
+    start_time: Optional[datetime.datetime],
+    end_time: Optional[datetime.datetime],
+    checkpoint_collection: AsyncIOMotorCollection,
+):
     """
     Calculates fire risk prediction for a given location based on current or historical weather data.
 
     Args:
         location (Location): The location for which fire risk is predicted.
-        start_time (Optional[str]): The start time for the prediction period. If not provided,
-                                    the current weather is used.
-        end_time (Optional[str]): The end time for the prediction period. If not provided,
-                                  the current weather is used.
+        start_time (Optional[datetime]): The start time for the prediction period. If not provided,
+                                         the current weather is used.
+        end_time (Optional[datetime]): The end time for the prediction period. If not provided,
+                                       the current weather is used.
+        checkpoint_collection (AsyncIOMotorCollection): The checkpoints of the model state per location.
 
     Returns:
-        WeatherData: The weather data and calculated fire risk for the location.
+        FireRiskSeries: The calculated fire risk for the location, in columnar form.
 
     Notes:
         - If both `start_time` and `end_time` are provided, the risk is calculated for the specified period.
         - If either `start_time` or `end_time` is missing, the current weather is used for prediction.
+        - The current prediction is resumed from the stored checkpoint of the location (if any). The new
+          checkpoint is only stored when it is later than the stored one.
+        - The computation runs in the thread pool, not on the event loop.
     """
 
     fire_risk_service = FireRiskService()
     backend_location = convert_backend_location_to_frcm(location)
 
     if start_time and end_time:
-        weather_data = fire_risk_service.compute_fire_risk_period(backend_location, start_time, end_time)
+        weather_data = await run_in_threadpool(fire_risk_service.compute_fire_risk_period, backend_location, start_time, end_time)
     else:
-        weather_data = fire_risk_service.compute_fire_risk_now(backend_location)
+        checkpoint = await find_checkpoint(location.locationName, checkpoint_collection)
+        weather_data, new_checkpoint = await run_in_threadpool(
+            fire_risk_service.compute_fire_risk_now_checkpointed, backend_location, checkpoint
+        )
+        if checkpoint is None or new_checkpoint.timestamp > checkpoint.timestamp:
+            await store_checkpoint(location.locationName, new_checkpoint, checkpoint_collection)
     return weather_data
 
 
 @firerisk_router.get("/")
 async def predict(
+    response: Response,
     location_name: str,
     time: Optional[str] = None,
     start_time: Optional[str] = None,
     end_time: Optional[str] = None,
     fire_risk_collection: AsyncIOMotorCollection = Depends(get_fire_risk_collection),
     location_collection: AsyncIOMotorCollection = Depends(get_location_collection),
+    checkpoint_collection: AsyncIOMotorCollection = Depends(get_checkpoint_collection),
+    accept: Optional[str] = Header(default=None),
 ):
+    """
+    Fire risk prediction for a location, now or for the period from start_time to end_time.
+
+    Computed predictions are encoded by the Accept header: application/json (default, one object per hour),
+    application/vnd.frcm.columnar+json, application/msgpack (if msgpack is installed) or application/octet-stream
+    (raw little-endian binary).
+    """
     try:
         time_now = datetime.datetime.fromisoformat(time) if time else datetime.datetime.now()
     except ValueError:
@@ -101,5 +221,42 @@ async def predict(
         logger.error(f"Location not found: {location_name}")
         raise HTTPException(status_code=404, detail="Location not found")
 
-    fire_risk = await calculate_fire_risk_prediction(location, start_time, end_time)
-    return fire_risk
+    try:
+        prediction = await calculate_fire_risk_prediction(
+            location, parse_period_time(start_time), parse_period_time(end_time), checkpoint_collection
+        )
+    except QualityError as error:
+        logger.error(f"Weather data for {location_name} failed the quality checks: {error.report}")
+        raise HTTPException(status_code=422, detail=error.report.model_dump(mode="json"))
+    response.headers["Vary"] = "Accept"
+    return encode_prediction(prediction, select_encoding(accept))
+
+
+@firerisk_router.get("/first-crossing")
+async def first_crossing(
+    location_name: str,
+    threshold: float,
+    horizon_hours: Optional[int] = None,
+    location_collection: AsyncIOMotorCollection = Depends(get_location_collection),
+):
+    """
+    Finds the first hour from now at which the time to flashover (ttf) drops below the threshold.
+
+    Only the timestamp and ttf of the crossing are returned (both null if ttf stays at or above the threshold
+    within the forecast, or within horizon_hours if given). The simulation stops at the first crossing.
+    """
+    if horizon_hours is not None and horizon_hours <= 0:
+        raise HTTPException(status_code=400, detail="horizon_hours must be positive.")
+
+    location = await get_location_by_name(location_name, location_collection)
+    if not location:
+        logger.error(f"Location not found: {location_name}")
+        raise HTTPException(status_code=404, detail="Location not found")
+
+    horizon = datetime.timedelta(hours=horizon_hours) if horizon_hours is not None else None
+
+    fire_risk_service = FireRiskService()
+    crossing = await run_in_threadpool(
+        fire_risk_service.compute_fire_risk_first_crossing, convert_backend_location_to_frcm(location), threshold, horizon
+    )
+    return {"timestamp": crossing.timestamp, "ttf": crossing.ttf}
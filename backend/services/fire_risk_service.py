@@ -1,21 +1,51 @@
 import datetime
 
-from dynamic_frcm.src.frcm.datamodel.model import FireRiskPrediction, Location
+from dynamic_frcm.src.frcm.datamodel.model import FireRiskCrossing, Location, SimulationState
+from dynamic_frcm.src.frcm.datamodel.series import FireRiskSeries
+from dynamic_frcm.src.frcm.fireriskmodel.cache import ComputeCache
+from dynamic_frcm.src.frcm.fireriskmodel.spinup import SpinupCache
 from dynamic_frcm.src.frcm.frcapi import METFireRiskAPI
 
+# shared by all requests, identical weather data (e.g., nearby locations or repeated requests within a forecast
+# cycle) is only computed once
+fire_risk_cache = ComputeCache()
+# spin-up windows selected per observation station and season, shared by all requests
+spinup_cache = SpinupCache()
+
 
 class FireRiskService:
     def __init__(self):
-        self.fire_risk_api = METFireRiskAPI()
+        self.fire_risk_api = METFireRiskAPI(spinup_cache=spinup_cache)
         self.default_obs_delta = datetime.timedelta(days=1)
+        # longer periods are computed as a chunked reanalysis instead of through the cache
+        self.max_cached_period = datetime.timedelta(days=31)
 
-    def compute_fire_risk_now(self, location_model: Location) -> FireRiskPrediction:
-        prediction = self.fire_risk_api.compute_now(location_model, obs_delta=self.default_obs_delta)
-        return prediction
+    # predictions are returned in columnar form, the router encodes them for the response
+    def compute_fire_risk_now_checkpointed(
+        self, location_model: Location, checkpoint: SimulationState | None = None
+    ) -> tuple[FireRiskSeries, SimulationState]:
+        # only observations since the checkpoint are needed, or the adaptive spin-up window without one
+        wd = self.fire_risk_api.get_weatherdata_now_checkpointed(location_model, checkpoint)
+        # checkpoints older than the longest spin-up window are spun up again instead of resumed
+        checkpoint = self.fire_risk_api.resumable_checkpoint(checkpoint, wd.created)
+        prediction, new_checkpoint = fire_risk_cache.compute_checkpointed_series(wd, checkpoint, checked=True)
+        return prediction, new_checkpoint
 
-    def compute_fire_risk_period(self, location_model: Location, start: datetime.datetime, end: datetime.datetime) -> FireRiskPrediction:
+    def compute_fire_risk_period(self, location_model: Location, start: datetime.datetime, end: datetime.datetime) -> FireRiskSeries:
         if end <= start:
             raise ValueError("End time must be after start time.")
 
-        prediction = self.fire_risk_api.frc.compute_period(location_model, start=start, end=end)
+        if end - start > self.max_cached_period:
+            return FireRiskSeries.from_prediction(self.fire_risk_api.compute_period(location_model, start=start, end=end))
+
+        wd = self.fire_risk_api.frc.get_wd_period(location_model, start=start, end=end)
+        prediction = fire_risk_cache.compute_series(wd, start_time=start, end_time=end, checked=True)
         return prediction
+
+    def compute_fire_risk_first_crossing(
+        self, location_model: Location, threshold: float, horizon: datetime.timedelta | None = None
+    ) -> FireRiskCrossing:
+        crossing = self.fire_risk_api.first_crossing(
+            location_model, threshold, obs_delta=self.default_obs_delta, fct_delta=horizon
+        )
+        return crossing
@@ -0,0 +1,226 @@
+import datetime
+import logging
+import os
+
+os.environ["TESTING"] = "True"
+
+from unittest.mock import patch
+
+import mongomock
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.main import app
+from backend.mongo import get_checkpoint_collection, get_fire_risk_collection, get_location_collection
+from dynamic_frcm.src.frcm.datamodel.model import FireRisk, FireRiskCrossing, FireRiskPrediction, QualityReport, SimulationState
+from dynamic_frcm.src.frcm.datamodel.model import Location as FrcmLocation
+from dynamic_frcm.src.frcm.datamodel.series import FireRiskSeries
+from dynamic_frcm.src.frcm.fireriskmodel.quality import QualityError
+
+logging.basicConfig(level=logging.DEBUG, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+
+# --- Async wrappers so mongomock works with `await` ---
+class FakeAsyncCursor:
+    def __init__(self, cursor):
+        self.cursor = cursor
+
+    async def to_list(self, length=None):
+        return list(self.cursor)
+
+    async def __aiter__(self):
+        for item in self.cursor:
+            yield item
+
+
+class FakeAsyncCollection:
+    def __init__(self, collection):
+        self.collection = collection
+
+    def find(self, *args, **kwargs):
+        return FakeAsyncCursor(self.collection.find(*args, **kwargs))
+
+    async def find_one(self, *args, **kwargs):
+        return self.collection.find_one(*args, **kwargs)
+
+    async def insert_one(self, *args, **kwargs):
+        return self.collection.insert_one(*args, **kwargs)
+
+    async def update_one(self, *args, **kwargs):
+        return self.collection.update_one(*args, **kwargs)
+
+
+# ------------------------------------------------------
+
+TIME = datetime.datetime(2025, 1, 20, 12, tzinfo=datetime.timezone.utc)
+
+
+def make_prediction(hours: int = 3) -> FireRiskPrediction:
+    firerisks = [
+        FireRisk(timestamp=TIME + datetime.timedelta(hours=h), ttf=6.0 - 0.1 * h, wind_speed=3.0) for h in range(hours)
+    ]
+    return FireRiskPrediction(location=FrcmLocation(latitude=60.383, longitude=5.3327), firerisks=firerisks)
+
+
+def make_series(hours: int = 3) -> FireRiskSeries:
+    return FireRiskSeries.from_prediction(make_prediction(hours))
+
+
+def make_checkpoint(hours: int = 0) -> SimulationState:
+    return SimulationState(
+        timestamp=TIME + datetime.timedelta(hours=hours), wall=[45.0] * 10, cw_in=0.007, rh_in=0.35, c_wall=0.0
+    )
+
+
+@pytest.fixture
+def mock_db():
+    mock_client = mongomock.MongoClient()
+    mock_db = mock_client.db
+    mock_db.location_collection.insert_one(
+        {"_id": mongomock.ObjectId(), "locationName": "Bergen", "latitude": 60.383, "longitude": 5.3327}
+    )
+    yield mock_db
+
+
+@pytest.fixture
+def mock_service():
+    with patch("backend.routers.firerisks.FireRiskService") as mock_service_class:
+        service = mock_service_class.return_value
+        service.compute_fire_risk_now_checkpointed.return_value = (make_series(), make_checkpoint(hours=2))
+        yield service
+
+
+@pytest.fixture
+def client(mock_db, mock_service):
+    app.dependency_overrides[get_location_collection] = lambda: FakeAsyncCollection(mock_db.location_collection)
+    app.dependency_overrides[get_fire_risk_collection] = lambda: FakeAsyncCollection(mock_db.fire_risk_collection)
+    app.dependency_overrides[get_checkpoint_collection] = lambda: FakeAsyncCollection(mock_db.checkpoint_collection)
+
+    yield TestClient(app)
+
+    app.dependency_overrides.clear()
+
+
+def test_predict_stores_checkpoint(client, mock_db, mock_service):
+    response = client.get("/firerisks/", params={"location_name": "Bergen"})
+
+    assert response.status_code == 200, response.text
+    assert len(response.json()["firerisks"]) == 3
+
+    # first computation for the location starts without a checkpoint
+    _, checkpoint = mock_service.compute_fire_risk_now_checkpointed.call_args.args
+    assert checkpoint is None
+
+    stored = mock_db.checkpoint_collection.find_one({"locationName": "Bergen"})
+    assert stored is not None
+    assert stored["checkpoint"]["wall"] == [45.0] * 10
+
+
+def test_predict_resumes_from_checkpoint(client, mock_db, mock_service):
+    mock_db.checkpoint_collection.insert_one({"locationName": "Bergen", "checkpoint": make_checkpoint().model_dump()})
+
+    response = client.get("/firerisks/", params={"location_name": "Bergen"})
+    assert response.status_code == 200, response.text
+
+    _, checkpoint = mock_service.compute_fire_risk_now_checkpointed.call_args.args
+    assert checkpoint.timestamp == TIME
+
+    # the stored checkpoint is replaced by the new one
+    assert mock_db.checkpoint_collection.count_documents({"locationName": "Bergen"}) == 1
+    stored = mock_db.checkpoint_collection.find_one({"locationName": "Bergen"})
+    assert stored["checkpoint"]["timestamp"].replace(tzinfo=datetime.timezone.utc) == TIME + datetime.timedelta(hours=2)
+
+
+def test_predict_keeps_checkpoint_without_new_observations(client, mock_db, mock_service):
+    mock_db.checkpoint_collection.insert_one({"locationName": "Bergen", "checkpoint": make_checkpoint(hours=2).model_dump()})
+
+    with patch("backend.routers.firerisks.store_checkpoint") as store:
+        response = client.get("/firerisks/", params={"location_name": "Bergen"})
+
+    assert response.status_code == 200, response.text
+    store.assert_not_called()
+
+
+def test_predict_period(client, mock_service):
+    mock_service.compute_fire_risk_period.return_value = make_series(hours=6)
+
+    response = client.get(
+        "/firerisks/", params={"location_name": "Bergen", "start_time": "2025-01-20T12:00", "end_time": "2025-01-20T17:00"}
+    )
+    assert response.status_code == 200, response.text
+    assert len(response.json()["firerisks"]) == 6
+
+    _, start, end = mock_service.compute_fire_risk_period.call_args.args
+    assert start == TIME
+    assert end == TIME + datetime.timedelta(hours=5)
+
+    response = client.get("/firerisks/", params={"location_name": "Bergen", "start_time": "yesterday", "end_time": "today"})
+    assert response.status_code == 400
+
+
+def test_predict_encodings(client, mock_service):
+    mock_service.compute_fire_risk_period.return_value = make_series(hours=48)
+    params = {"location_name": "Bergen", "start_time": "2025-01-20T12:00", "end_time": "2025-01-22T11:00"}
+
+    rows = client.get("/firerisks/", params=params)
+    assert rows.status_code == 200, rows.text
+    assert rows.headers["content-type"] == "application/json"
+    assert rows.json() == make_prediction(hours=48).model_dump(mode="json")
+
+    columnar = client.get("/firerisks/", params=params, headers={"Accept": "application/vnd.frcm.columnar+json"})
+    assert columnar.status_code == 200, columnar.text
+    assert columnar.headers["content-type"] == "application/vnd.frcm.columnar+json"
+    assert columnar.json()["step"] == 3600
+    assert FireRiskSeries.from_columns(columnar.json()) == make_series(hours=48)
+
+    # the highest quality supported encoding is selected
+    binary = client.get("/firerisks/", params=params, headers={"Accept": "text/csv, application/octet-stream;q=0.9, */*;q=0.1"})
+    assert binary.status_code == 200, binary.text
+    assert binary.headers["content-type"] == "application/octet-stream"
+    assert FireRiskSeries.from_binary(binary.content) == make_series(hours=48)
+
+    assert len(binary.content) * 3 < len(rows.content)
+    assert len(columnar.content) * 1.5 < len(rows.content)
+
+
+def test_predict_rejects_bad_weather_data(client, mock_db, mock_service):
+    report = QualityReport(points=10, is_sorted=True, duplicates=0, nan_fraction={"temperature": 0.5},
+                           out_of_range={"temperature": 0}, max_gap=3600.0, gaps=[], passed=False)
+    mock_service.compute_fire_risk_now_checkpointed.side_effect = QualityError(report)
+
+    response = client.get("/firerisks/", params={"location_name": "Bergen"})
+
+    assert response.status_code == 422
+    assert response.json()["detail"]["nan_fraction"] == {"temperature": 0.5}
+    assert mock_db.checkpoint_collection.count_documents({}) == 0
+
+
+def test_predict_msgpack(client, mock_service):
+    msgpack = pytest.importorskip("msgpack")
+    mock_service.compute_fire_risk_period.return_value = make_series(hours=6)
+
+    response = client.get(
+        "/firerisks/",
+        params={"location_name": "Bergen", "start_time": "2025-01-20T12:00", "end_time": "2025-01-20T17:00"},
+        headers={"Accept": "application/msgpack"},
+    )
+    assert response.status_code == 200, response.text
+    assert FireRiskSeries.from_columns(msgpack.unpackb(response.content)) == make_series(hours=6)
+
+
+def test_first_crossing(client, mock_service):
+    mock_service.compute_fire_risk_first_crossing.return_value = FireRiskCrossing(
+        location=FrcmLocation(latitude=60.383, longitude=5.3327), threshold=5.0, timestamp=TIME, ttf=4.9
+    )
+
+    response = client.get("/firerisks/first-crossing", params={"location_name": "Bergen", "threshold": 5.0, "horizon_hours": 48})
+    assert response.status_code == 200, response.text
+    assert response.json() == {"timestamp": "2025-01-20T12:00:00+00:00", "ttf": 4.9}
+
+    _, threshold, horizon = mock_service.compute_fire_risk_first_crossing.call_args.args
+    assert threshold == 5.0
+    assert horizon == datetime.timedelta(hours=48)
+
+    response = client.get("/firerisks/first-crossing", params={"location_name": "Bergen", "threshold": 5.0, "horizon_hours": 0})
+    assert response.status_code == 400
@@ -1,6 +1,9 @@
 import datetime
+import functools
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field, computed_field, model_validator
+
+from frcm.datamodel.series import WeatherSeries
 
 
 class Location(BaseModel):
@@ -23,11 +26,29 @@ class WeatherDataPoint(BaseModel):
         return format_str
 
 
+# Observations and forecasts hold their data as a WeatherSeries (columns), given either as series or - as in the
+# JSON representation - as a list of data points in data. The data points are created from the series on first access.
+def _series_from_data(values):
+    if isinstance(values, dict) and 'series' not in values:
+        values = dict(values)
+        values['series'] = WeatherSeries.from_points(values.pop('data', []))
+    return values
+
+
 class Observations(BaseModel):
 
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
     source: str
     location: Location
-    data: list[WeatherDataPoint]
+    series: WeatherSeries = Field(exclude=True, repr=False)
+
+    _from_data = model_validator(mode='before')(_series_from_data)
+
+    @computed_field
+    @functools.cached_property
+    def data(self) -> list[WeatherDataPoint]:
+        return self.series.to_points()
 
     def __str__(self):
         format_str = f'Observations [Source: {self.source} @ Location: {self.location}]\n'
@@ -40,8 +61,17 @@ class Observations(BaseModel):
 
 class Forecast(BaseModel):
 
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
     location: Location
-    data: list[WeatherDataPoint]
+    series: WeatherSeries = Field(exclude=True, repr=False)
+
+    _from_data = model_validator(mode='before')(_series_from_data)
+
+    @computed_field
+    @functools.cached_property
+    def data(self) -> list[WeatherDataPoint]:
+        return self.series.to_points()
 
     def __str__(self):
         format_str = f'Forecast @ Location: {self.location}\n'
@@ -90,3 +120,130 @@ class FireRiskPrediction(BaseModel):
         format_str += '\n'.join(data_str)
 
         return format_str
+
+
+class FireRiskCrossing(BaseModel):
+
+    # first hour at which ttf is below the threshold, timestamp and ttf are None if ttf stays at or above the
+    # threshold up to the horizon
+    location: Location
+    threshold: float
+    timestamp: datetime.datetime | None = None
+    ttf: float | None = None
+
+    def __str__(self):
+        format_str = f'FireRiskCrossing[{self.location} Threshold({self.threshold}) {self.timestamp} TTF({self.ttf})]'
+
+        return format_str
+
+
+class FireRiskWindow(BaseModel):
+
+    # aggregated ttf over the window from start (inclusive) to end (exclusive), by statistic (e.g., 'min', 'p10')
+    start: datetime.datetime
+    end: datetime.datetime
+    ttf: dict[str, float]
+
+    def __str__(self):
+        format_str = f'FireRiskWindow[{self.start} - {self.end} TTF({self.ttf})]'
+
+        return format_str
+
+
+class FireRiskAggregatePrediction(BaseModel):
+
+    location: Location
+    window: str
+    firerisks: list[FireRiskWindow]
+
+    def __str__(self):
+        format_str = f'FireRiskAggregatePrediction[{self.location} Window({self.window})]\n'
+
+        # Generate list of formatted data points
+        data_str = [str(data_point) for data_point in self.firerisks]
+
+        # Join the list of formatted data points
+        format_str += '\n'.join(data_str)
+
+        return format_str
+
+
+class FireRiskDistribution(BaseModel):
+
+    # quantiles of ttf over the scenarios of an ensemble, in the order of FireRiskEnsemblePrediction.quantiles
+    timestamp: datetime.datetime
+    ttf: list[float]
+    wind_speed: float
+
+    def __str__(self):
+        format_str = f'FireRiskDistribution[{self.timestamp} TTF({self.ttf}) WindSpeed({self.wind_speed})]'
+
+        return format_str
+
+
+class FireRiskEnsemblePrediction(BaseModel):
+
+    location: Location
+    scenarios: int
+    quantiles: list[float]
+    firerisks: list[FireRiskDistribution]
+
+    def __str__(self):
+        format_str = f'FireRiskEnsemblePrediction[{self.location} Scenarios({self.scenarios}) Quantiles({self.quantiles})]\n'
+
+        # Generate list of formatted data points
+        data_str = [str(data_point) for data_point in self.firerisks]
+
+        # Join the list of formatted data points
+        format_str += '\n'.join(data_str)
+
+        return format_str
+
+
+class DataGap(BaseModel):
+
+    # period without valid temperature and humidity, between two data points
+    start: datetime.datetime
+    end: datetime.datetime
+
+    def __str__(self):
+        format_str = f'DataGap[{self.start} - {self.end}]'
+
+        return format_str
+
+
+class QualityReport(BaseModel):
+
+    # quality of weather data (observations and forecast combined), see frcm.fireriskmodel.quality
+    points: int
+    is_sorted: bool
+    duplicates: int                     # data points with the same timestamp as an earlier one
+    nan_fraction: dict[str, float]      # by parameter
+    out_of_range: dict[str, int]        # by parameter
+    max_gap: float                      # seconds, largest gap between valid temperature and humidity
+    gaps: list[DataGap]                 # gaps longer than the maximum allowed gap
+    passed: bool
+
+    def __str__(self):
+        format_str = (f'QualityReport[Points({self.points}) Sorted({self.is_sorted}) Duplicates({self.duplicates}) '
+                      f'NaN({self.nan_fraction}) OutOfRange({self.out_of_range}) MaxGap({self.max_gap}) Passed({self.passed})]\n')
+
+        # Join the list of formatted gaps
+        format_str += '\n'.join(str(gap) for gap in self.gaps)
+
+        return format_str
+
+
+class SimulationState(BaseModel):
+
+    # checkpoint of the wall / indoor air model at a point in time from which computation can be resumed
+    timestamp: datetime.datetime
+    wall: list[float]
+    cw_in: float
+    rh_in: float
+    c_wall: float
+
+    def __str__(self):
+        format_str = f'SimulationState[{self.timestamp} RH_in({self.rh_in}) CW_in({self.cw_in})]'
+
+        return format_str
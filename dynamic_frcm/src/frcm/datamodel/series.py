@@ -0,0 +1,215 @@
+import datetime
+import struct
+
+import numpy as np
+
+""" Array-backed (columnar) time series of weather data and fire risk """
+
+# Timestamps are stored as datetime64[us] in UTC, and converted back to timezone aware (UTC) datetimes if the series
+# was created from aware datetimes, otherwise to naive datetimes. The series is used by the fire risk model directly,
+# WeatherDataPoint objects are only created at the API edges (see Observations.data and Forecast.data).
+#
+# FireRiskSeries is the columnar form of a FireRiskPrediction - a start time, a step and arrays of ttf and wind speed -
+# with compact encodings for the wire (columnar JSON, MessagePack and raw binary, see FireRiskSeries.to_binary).
+
+def _to_datetime64(timestamps) -> tuple[np.ndarray, bool]:
+    aware = len(timestamps) > 0 and timestamps[0].tzinfo is not None
+    if aware:
+        timestamps = [timestamp.astimezone(datetime.timezone.utc).replace(tzinfo=None) for timestamp in timestamps]
+    return np.array(timestamps, dtype='datetime64[us]'), aware
+
+
+class WeatherSeries:
+
+    __slots__ = ('timestamps', 'temperature', 'humidity', 'wind_speed', 'aware')
+
+    def __init__(self, timestamps, temperature, humidity, wind_speed, aware: bool = True):
+        self.timestamps = np.asarray(timestamps, dtype='datetime64[us]')
+        self.temperature = np.asarray(temperature, dtype=float)
+        self.humidity = np.asarray(humidity, dtype=float)
+        self.wind_speed = np.asarray(wind_speed, dtype=float)
+        self.aware = aware
+
+    @staticmethod
+    def empty():
+        return WeatherSeries(np.array([], dtype='datetime64[us]'), [], [], [])
+
+    @staticmethod
+    def from_columns(timestamps: list[datetime.datetime], temperature, humidity, wind_speed):
+        timestamps, aware = _to_datetime64(timestamps)
+        return WeatherSeries(timestamps, temperature, humidity, wind_speed, aware)
+
+    # from WeatherDataPoint objects (or dicts with the same fields)
+    @staticmethod
+    def from_points(points) -> 'WeatherSeries':
+        from .model import WeatherDataPoint
+
+        points = [point if isinstance(point, WeatherDataPoint) else WeatherDataPoint.model_validate(point) for point in points]
+        return WeatherSeries.from_columns([point.timestamp for point in points],
+                                          [point.temperature for point in points],
+                                          [point.humidity for point in points],
+                                          [point.wind_speed for point in points])
+
+    def to_points(self) -> list:
+        from .model import WeatherDataPoint
+
+        return [WeatherDataPoint.model_construct(timestamp=timestamp, temperature=temperature, humidity=humidity, wind_speed=wind_speed)
+                for timestamp, temperature, humidity, wind_speed in zip(self.datetimes(), self.temperature.tolist(),
+                                                                         self.humidity.tolist(), self.wind_speed.tolist())]
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, WeatherSeries):
+            return NotImplemented
+        return (self.aware == other.aware and np.array_equal(self.timestamps, other.timestamps)
+                and all(np.array_equal(getattr(self, name), getattr(other, name), equal_nan=True)
+                        for name in ('temperature', 'humidity', 'wind_speed')))
+
+    def __getitem__(self, index) -> 'WeatherSeries':
+        return WeatherSeries(self.timestamps[index], self.temperature[index], self.humidity[index], self.wind_speed[index], self.aware)
+
+    def __repr__(self) -> str:
+        return f'WeatherSeries({len(self)} points)'
+
+    def to_datetime(self, timestamp: np.datetime64) -> datetime.datetime:
+        value = timestamp.astype(datetime.datetime)
+        return value.replace(tzinfo=datetime.timezone.utc) if self.aware else value
+
+    def from_datetime(self, timestamp: datetime.datetime) -> np.datetime64:
+        if timestamp.tzinfo is not None:
+            timestamp = timestamp.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+        return np.datetime64(timestamp, 'us')
+
+    def datetimes(self) -> list[datetime.datetime]:
+        values = self.timestamps.astype(object).tolist()
+        return [value.replace(tzinfo=datetime.timezone.utc) for value in values] if self.aware else values
+
+    def first(self) -> datetime.datetime:
+        return self.to_datetime(self.timestamps.min())
+
+    def last(self) -> datetime.datetime:
+        return self.to_datetime(self.timestamps.max())
+
+    # seconds of each timestamp from start
+    def seconds(self, start: datetime.datetime) -> np.ndarray:
+        return (self.timestamps - self.from_datetime(start)) / np.timedelta64(1, 's')
+
+    # series sorted by time, of the points with unique timestamps - the first occurrence of a duplicated timestamp
+    # is kept, such that observations are preferred over forecasts in WeatherSeries.concat(observations, forecast)
+    def sorted_unique(self) -> 'WeatherSeries':
+        order = np.argsort(self.timestamps, kind='stable')
+        timestamps = self.timestamps[order]
+        keep = np.ones(len(timestamps), dtype=bool)
+        keep[1:] = timestamps[1:] != timestamps[:-1]
+        return self[order[keep]]
+
+    # points with timestamps from start to end (inclusive), both optional
+    def between(self, start: datetime.datetime = None, end: datetime.datetime = None) -> 'WeatherSeries':
+        keep = np.ones(len(self), dtype=bool)
+        if start is not None:
+            keep &= self.timestamps >= self.from_datetime(start)
+        if end is not None:
+            keep &= self.timestamps <= self.from_datetime(end)
+        return self[keep]
+
+    @staticmethod
+    def concat(*series: 'WeatherSeries') -> 'WeatherSeries':
+        series = [s for s in series if len(s) > 0] or [WeatherSeries.empty()]
+        return WeatherSeries(np.concatenate([s.timestamps for s in series]),
+                             np.concatenate([s.temperature for s in series]),
+                             np.concatenate([s.humidity for s in series]),
+                             np.concatenate([s.wind_speed for s in series]),
+                             series[0].aware)
+
+
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+# header of the binary encoding: magic, count, latitude, longitude, start (microseconds since the epoch, UTC) and
+# step (seconds), little-endian. The ttf and wind speed arrays (float64, little-endian) follow the header.
+BINARY_MAGIC = b'FRS1'
+BINARY_HEADER = struct.Struct('<4sIddqq')
+
+
+class FireRiskSeries:
+
+    __slots__ = ('location', 'start', 'step', 'ttf', 'wind_speed')
+
+    def __init__(self, location, start: datetime.datetime, step: datetime.timedelta, ttf, wind_speed):
+        self.location = location
+        self.start = start
+        self.step = step
+        self.ttf = np.asarray(ttf, dtype=float)
+        self.wind_speed = np.asarray(wind_speed, dtype=float)
+
+    # from fire risks at a constant step (hourly unless there is a single fire risk)
+    @staticmethod
+    def from_prediction(prediction) -> 'FireRiskSeries':
+        firerisks = prediction.firerisks
+        start = firerisks[0].timestamp if firerisks else EPOCH
+        step = firerisks[1].timestamp - firerisks[0].timestamp if len(firerisks) > 1 else datetime.timedelta(hours=1)
+        return FireRiskSeries(prediction.location, start, step,
+                              [fr.ttf for fr in firerisks], [fr.wind_speed for fr in firerisks])
+
+    def to_prediction(self):
+        from .model import FireRisk, FireRiskPrediction
+
+        # values are floats, no validation needed
+        firerisks = [FireRisk.model_construct(timestamp=timestamp, ttf=ttf, wind_speed=wind_speed)
+                     for timestamp, ttf, wind_speed in zip(self.timestamps(), self.ttf.tolist(), self.wind_speed.tolist())]
+        return FireRiskPrediction(location=self.location, firerisks=firerisks)
+
+    def __len__(self) -> int:
+        return len(self.ttf)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, FireRiskSeries):
+            return NotImplemented
+        return (self.location == other.location and self.start == other.start and self.step == other.step
+                and np.array_equal(self.ttf, other.ttf) and np.array_equal(self.wind_speed, other.wind_speed))
+
+    def __repr__(self) -> str:
+        return f'FireRiskSeries({self.location}, {self.start}, {self.step}, {len(self)} fire risks)'
+
+    def timestamps(self) -> list[datetime.datetime]:
+        return [self.start + i * self.step for i in range(len(self))]
+
+    # columnar JSON (and MessagePack) representation, step in seconds
+    def to_columns(self) -> dict:
+        return {'location': {'latitude': self.location.latitude, 'longitude': self.location.longitude},
+                'start': self.start.isoformat(),
+                'step': self.step.total_seconds(),
+                'ttf': self.ttf.tolist(),
+                'wind_speed': self.wind_speed.tolist()}
+
+    @staticmethod
+    def from_columns(columns: dict) -> 'FireRiskSeries':
+        from .model import Location
+
+        return FireRiskSeries(Location(**columns['location']), datetime.datetime.fromisoformat(columns['start']),
+                              datetime.timedelta(seconds=columns['step']), columns['ttf'], columns['wind_speed'])
+
+    # requires the optional msgpack package
+    def to_msgpack(self) -> bytes:
+        import msgpack
+
+        return msgpack.packb(self.to_columns())
+
+    def to_binary(self) -> bytes:
+        start = self.start if self.start.tzinfo is not None else self.start.replace(tzinfo=datetime.timezone.utc)
+        header = BINARY_HEADER.pack(BINARY_MAGIC, len(self), self.location.latitude, self.location.longitude,
+                                    (start - EPOCH) // datetime.timedelta(microseconds=1), round(self.step.total_seconds()))
+        return header + self.ttf.astype('<f8').tobytes() + self.wind_speed.astype('<f8').tobytes()
+
+    @staticmethod
+    def from_binary(data: bytes) -> 'FireRiskSeries':
+        from .model import Location
+
+        magic, count, latitude, longitude, start, step = BINARY_HEADER.unpack_from(data)
+        if magic != BINARY_MAGIC:
+            raise ValueError('Not a binary fire risk series')
+        arrays = np.frombuffer(data, dtype='<f8', count=2 * count, offset=BINARY_HEADER.size).astype(float)
+        return FireRiskSeries(Location(latitude=latitude, longitude=longitude),
+                              EPOCH + datetime.timedelta(microseconds=start), datetime.timedelta(seconds=step),
+                              arrays[:count], arrays[count:])
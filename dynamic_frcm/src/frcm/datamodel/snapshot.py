@@ -0,0 +1,250 @@
+import datetime
+import mmap
+import os
+import struct
+import threading
+from typing import Iterator, NamedTuple
+
+import numpy as np
+
+import frcm.datamodel.model as dm
+from frcm.datamodel.series import EPOCH, WeatherSeries
+
+""" Binary snapshot format of WeatherData, and archives of snapshots with an index """
+
+# A snapshot is a fixed header followed by the source of the observations (utf-8) and the columns of the observations
+# and the forecast as contiguous little-endian arrays - timestamps (int64, microseconds since the epoch in UTC),
+# temperature, humidity and wind speed (float64). All sections start at multiples of 8 bytes, such that the columns
+# are read (from bytes or an mmap) as arrays without copying or validation.
+#
+# header        magic, version, flags (which timestamps are timezone aware), created, observation and forecast
+#               locations, number of observations and forecasts, length of the source
+# source        utf-8, padded to 8 bytes
+# observations  timestamps, temperature, humidity, wind speed
+# forecast      timestamps, temperature, humidity, wind speed
+#
+# An archive is a file of snapshots appended one after another, and an index file (the archive path with '.idx') with
+# a header (magic and count) and one IndexEntry per snapshot. A snapshot is written after the end of the indexed
+# snapshots and synced before the index is replaced (written to a temporary file and renamed over the previous
+# index), so an interrupted append leaves the previous index and snapshots intact - bytes after the last indexed
+# snapshot are overwritten by the next append. Appends are serialized by a lock on the index, also between processes
+# where fcntl is available. Reading maps the archive file.
+
+MAGIC = b'FRWD'
+VERSION = 1
+HEADER = struct.Struct('<4sHHqddddIII4x')
+
+# flags of timezone aware timestamps
+CREATED_AWARE = 1
+OBSERVATIONS_AWARE = 2
+FORECAST_AWARE = 4
+
+ARCHIVE_MAGIC = b'FRWA'
+INDEX_HEADER = struct.Struct('<4s4xQ')
+INDEX_ENTRY = np.dtype([('offset', '<u8'), ('length', '<u8'), ('created', '<i8'),
+                        ('latitude', '<f8'), ('longitude', '<f8')])
+
+
+def _padded(length: int) -> int:
+    return (length + 7) // 8 * 8
+
+
+def _microseconds(timestamp: datetime.datetime) -> int:
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=datetime.timezone.utc)
+    return (timestamp - EPOCH) // datetime.timedelta(microseconds=1)
+
+
+def _datetime(microseconds: int, aware: bool) -> datetime.datetime:
+    timestamp = EPOCH + datetime.timedelta(microseconds=microseconds)
+    return timestamp if aware else timestamp.replace(tzinfo=None)
+
+
+def _columns(series: WeatherSeries) -> bytes:
+    return b''.join([series.timestamps.astype('<i8').tobytes()] +
+                    [getattr(series, name).astype('<f8').tobytes() for name in ('temperature', 'humidity', 'wind_speed')])
+
+
+def to_snapshot(wd: dm.WeatherData) -> bytes:
+
+    observations, forecast = wd.observations.series, wd.forecast.series
+    source = (wd.observations.source or '').encode()
+
+    flags = ((CREATED_AWARE if wd.created.tzinfo is not None else 0) |
+             (OBSERVATIONS_AWARE if observations.aware else 0) |
+             (FORECAST_AWARE if forecast.aware else 0))
+
+    header = HEADER.pack(MAGIC, VERSION, flags, _microseconds(wd.created),
+                         wd.observations.location.latitude, wd.observations.location.longitude,
+                         wd.forecast.location.latitude, wd.forecast.location.longitude,
+                         len(observations), len(forecast), len(source))
+
+    return header + source.ljust(_padded(len(source)), b'\0') + _columns(observations) + _columns(forecast)
+
+
+def _series(buffer, offset: int, count: int, aware: bool) -> tuple[WeatherSeries, int]:
+    timestamps = np.frombuffer(buffer, dtype='<i8', count=count, offset=offset).view('datetime64[us]')
+    values = [np.frombuffer(buffer, dtype='<f8', count=count, offset=offset + 8 * count * (i + 1)) for i in range(3)]
+    return WeatherSeries(timestamps, *values, aware=aware), offset + 32 * count
+
+
+# WeatherData from a snapshot at offset of buffer (bytes, memoryview or mmap). The columns of the observations and
+# forecast are views of the buffer, and the models are not validated again.
+def from_snapshot(buffer, offset: int = 0) -> dm.WeatherData:
+
+    magic, version, flags, created, obs_lat, obs_lon, fct_lat, fct_lon, n_obs, n_fct, source_length = HEADER.unpack_from(buffer, offset)
+    if magic != MAGIC:
+        raise ValueError('Not a weather data snapshot')
+    if version != VERSION:
+        raise ValueError(f'Unsupported weather data snapshot version {version}')
+
+    offset = offset + HEADER.size
+    source = bytes(buffer[offset:offset + source_length]).decode() or None
+    offset = offset + _padded(source_length)
+
+    observations, offset = _series(buffer, offset, n_obs, bool(flags & OBSERVATIONS_AWARE))
+    forecast, offset = _series(buffer, offset, n_fct, bool(flags & FORECAST_AWARE))
+
+    return dm.WeatherData.model_construct(
+        created=_datetime(created, bool(flags & CREATED_AWARE)),
+        observations=dm.Observations.model_construct(source=source, location=dm.Location.model_construct(latitude=obs_lat, longitude=obs_lon),
+                                                     series=observations),
+        forecast=dm.Forecast.model_construct(location=dm.Location.model_construct(latitude=fct_lat, longitude=fct_lon),
+                                             series=forecast))
+
+
+def write_snapshot(wd: dm.WeatherData, path: str):
+    with open(path, 'wb') as file:
+        file.write(to_snapshot(wd))
+
+
+# the snapshot is mapped, not read - the columns are loaded from disk when used
+def read_snapshot(path: str) -> dm.WeatherData:
+    with open(path, 'rb') as file:
+        return from_snapshot(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
+
+
+class IndexEntry(NamedTuple):
+    offset: int                     # of the snapshot in the archive
+    length: int
+    created: datetime.datetime
+    location: dm.Location           # of the forecast
+
+
+def _read_index(path: str) -> np.ndarray:
+    if not os.path.exists(path):
+        return np.zeros(0, dtype=INDEX_ENTRY)
+    with open(path, 'rb') as file:
+        magic, count = INDEX_HEADER.unpack(file.read(INDEX_HEADER.size))
+        if magic != ARCHIVE_MAGIC:
+            raise ValueError(f'Not a weather data archive index: {path}')
+        return np.frombuffer(file.read(count * INDEX_ENTRY.itemsize), dtype=INDEX_ENTRY).copy()
+
+
+def _write_index(path: str, index: np.ndarray):
+    temporary = f'{path}.{os.getpid()}.tmp'
+    with open(temporary, 'wb') as file:
+        file.write(INDEX_HEADER.pack(ARCHIVE_MAGIC, len(index)))
+        file.write(index.tobytes())
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary, path)
+
+
+class _FileLock:
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def __enter__(self):
+        self._file = open(self.path, 'a+b')
+        try:
+            import fcntl
+        except ImportError:
+            return self
+        fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        return self
+
+    # closing the file releases the lock
+    def __exit__(self, *exc):
+        self._file.close()
+
+
+class SnapshotArchive:
+
+    def __init__(self, path: str):
+        self.path = path
+        self.index_path = f'{path}.idx'
+        self._index = _read_index(self.index_path)
+        self._map = None
+        self._lock = threading.Lock()
+
+    # end of the last indexed snapshot, where the next snapshot is written
+    @property
+    def _end(self) -> int:
+        if len(self._index) == 0:
+            return 0
+        return int(self._index['offset'][-1] + self._index['length'][-1])
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def append(self, wd: dm.WeatherData):
+
+        snapshot = to_snapshot(wd)
+
+        with self._lock, _FileLock(f'{self.path}.lock'):
+            # other processes may have appended since the index was read
+            self._index = _read_index(self.index_path)
+            end = self._end
+
+            entry = np.array([(end, len(snapshot), _microseconds(wd.created),
+                               wd.forecast.location.latitude, wd.forecast.location.longitude)], dtype=INDEX_ENTRY)
+            with open(self.path, 'r+b' if os.path.exists(self.path) else 'wb') as file:
+                file.seek(end)
+                file.write(snapshot)
+                file.truncate()
+                file.flush()
+                os.fsync(file.fileno())
+
+            index = np.concatenate([self._index, entry])
+            _write_index(self.index_path, index)
+            self._index = index
+
+    def extend(self, wds):
+        for wd in wds:
+            self.append(wd)
+
+    def index(self) -> list[IndexEntry]:
+        return [IndexEntry(offset=int(entry['offset']), length=int(entry['length']),
+                           created=_datetime(int(entry['created']), True),
+                           location=dm.Location(latitude=float(entry['latitude']), longitude=float(entry['longitude'])))
+                for entry in self._index]
+
+    def _mapped(self):
+        with self._lock:
+            # mapped again after appends, the previous map is released with the last snapshot read from it
+            if self._map is None or len(self._map) < self._end:
+                with open(self.path, 'rb') as file:
+                    self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            return self._map
+
+    def __getitem__(self, i: int) -> dm.WeatherData:
+        return from_snapshot(self._mapped(), int(self._index[i]['offset']))
+
+    def __iter__(self) -> Iterator[dm.WeatherData]:
+        return self.between()
+
+    # snapshots created from start to end (inclusive), both optional
+    def between(self, start: datetime.datetime = None, end: datetime.datetime = None) -> Iterator[dm.WeatherData]:
+        created = self._index['created']
+        keep = np.ones(len(created), dtype=bool)
+        if start is not None:
+            keep &= created >= _microseconds(start)
+        if end is not None:
+            keep &= created <= _microseconds(end)
+        if not keep.any():
+            return
+        buffer = self._mapped()
+        for offset in self._index['offset'][keep].tolist():
+            yield from_snapshot(buffer, offset)
@@ -0,0 +1,68 @@
+import datetime
+
+import numpy as np
+
+import frcm.datamodel.model as dm
+
+""" Aggregation of hourly TTF values over time windows """
+
+# Windows are aligned to UTC midnight, e.g., '6h' windows start at 00, 06, 12 and 18 UTC. Windows at the start and
+# end of a computation may cover fewer hours than the window length. Supported statistics are 'min', 'max', 'mean'
+# and percentiles 'p<N>' for 0 <= N <= 100, e.g., 'p10'.
+
+WINDOWS = {'1h': 1, '3h': 3, '6h': 6, '12h': 12, 'day': 24}
+
+
+def window_hours(window: str) -> int:
+    if window not in WINDOWS:
+        raise ValueError(f"Unknown window '{window}', must be one of {list(WINDOWS)}")
+    return WINDOWS[window]
+
+
+def check_statistic(statistic: str):
+    if statistic in ('min', 'max', 'mean'):
+        return
+    if statistic.startswith('p') and statistic[1:].isdigit() and 0 <= int(statistic[1:]) <= 100:
+        return
+    raise ValueError(f"Unknown statistic '{statistic}', must be 'min', 'max', 'mean' or a percentile such as 'p10'")
+
+
+# aggregates ttf values at the given timestamps (start_time + time_sec seconds, increasing) into windows
+def aggregate(start_time: datetime.datetime, time_sec, ttf, window: str = 'day', statistics=('min',)) -> list[dm.FireRiskWindow]:
+
+    hours = window_hours(window)
+    for statistic in statistics:
+        check_statistic(statistic)
+
+    ttf = np.asarray(ttf, dtype=float)
+    if len(ttf) == 0:
+        return []
+
+    # index of the window of each value, counted from midnight of the first day
+    midnight = start_time.replace(hour=0, minute=0, second=0, microsecond=0)
+    offset = (start_time - midnight).total_seconds()
+    index = ((offset + np.asarray(time_sec, dtype=float)) // (hours * 3600)).astype(int)
+
+    # values of a window are contiguous, windows start where the index changes
+    bounds = np.flatnonzero(np.diff(index)) + 1
+    starts = np.concatenate([[0], bounds])
+
+    values = {}
+    for statistic in statistics:
+        if statistic == 'min':
+            values[statistic] = np.minimum.reduceat(ttf, starts)
+        elif statistic == 'max':
+            values[statistic] = np.maximum.reduceat(ttf, starts)
+        elif statistic == 'mean':
+            values[statistic] = np.add.reduceat(ttf, starts) / np.diff(np.concatenate([starts, [len(ttf)]]))
+        else:
+            values[statistic] = np.array([np.percentile(part, int(statistic[1:])) for part in np.split(ttf, bounds)])
+
+    windows = []
+    for j, k in enumerate(index[starts].tolist()):
+        window_start = midnight + datetime.timedelta(hours=hours * k)
+        windows.append(dm.FireRiskWindow(start=window_start,
+                                         end=window_start + datetime.timedelta(hours=hours),
+                                         ttf={statistic: float(values[statistic][j]) for statistic in statistics}))
+
+    return windows
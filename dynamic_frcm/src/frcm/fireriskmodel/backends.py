@@ -0,0 +1,221 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import frcm.fireriskmodel.parameters as mp
+import frcm.fireriskmodel.utils as func
+import frcm.fireriskmodel.kernels as kn
+
+""" Registry of implementations (backends) of the time-marching core of compute_fr """
+
+# A backend is a function march(cw_sat_in, beta, c_source, state=None, params=None) -> (surface, rh_in, state) with
+# the contract of kernels.march, for inputs of shape (timesteps,) or (locations, timesteps). Available backends:
+#
+# reference - the original pure-Python scalar loop, kept for equivalence checks (default parameter set only)
+# numpy     - kernels.march
+# numba     - JIT-compiled loop (frcm.fireriskmodel.jit), only registered if numba is installed
+# threads   - row blocks marched concurrently in a thread pool by numba (or numpy), see march_threads
+#
+# Backend 'auto' selects the fastest of the numpy and numba backends for the input size, based on a short
+# calibration benchmark that is run the first time an input size class is seen.
+#
+# Backends are re-entrant: they only read module state (parameters, the registry) and allocate their own arrays,
+# and may be called concurrently from several threads. The registry and calibration are guarded by a lock.
+
+_backends = {}
+_calibration = {}
+_calibration_lock = threading.Lock()
+
+CALIBRATION_STEPS = 240
+
+# backends which are not candidates of 'auto'
+MANUAL_BACKENDS = ('reference', 'threads')
+
+
+def register_backend(name: str, march):
+    with _calibration_lock:
+        _backends[name] = march
+        _calibration.clear()
+
+
+def available_backends() -> list[str]:
+    return list(_backends)
+
+
+def get_backend(name: str = 'auto', locations: int = 1, steps: int = 1):
+    if name == 'auto':
+        name = select_backend(locations, steps)
+
+    if name not in _backends:
+        raise ValueError(f"Unknown backend '{name}', must be 'auto' or one of {available_backends()}")
+
+    return _backends[name]
+
+
+def march(cw_sat_in, beta, c_source, state: kn.WallState = None, backend: str = 'auto', params=None):
+    locations = len(cw_sat_in) if np.ndim(cw_sat_in) == 2 else 1
+    return get_backend(backend, locations, np.shape(cw_sat_in)[-1])(cw_sat_in, beta, c_source, state, params)
+
+
+# input sizes are grouped into classes by the number of locations, the steps only scale the cost linearly
+def _size_class(locations: int) -> int:
+    size_class = 1
+    while size_class < locations and size_class < 4096:
+        size_class = size_class * 4
+    return size_class
+
+
+def select_backend(locations: int = 1, steps: int = 1) -> str:
+    size_class = _size_class(locations)
+
+    with _calibration_lock:
+        if size_class not in _calibration:
+            _calibration[size_class] = _calibrate(size_class)
+
+        return _calibration[size_class]
+
+
+# times each candidate backend on synthetic forcing and returns the name of the fastest
+def _calibrate(locations: int) -> str:
+    candidates = [name for name in _backends if name not in MANUAL_BACKENDS]
+    if len(candidates) == 1:
+        return candidates[0]
+
+    temp_c_out = 5 + 5 * np.sin(np.linspace(0, 2 * np.pi, CALIBRATION_STEPS))
+    temp_c_out = np.tile(temp_c_out, (locations, 1)) if locations > 1 else temp_c_out
+    cw_sat_in = np.full_like(temp_c_out, kn.calc_cwsat(kn.calc_pwsat(mp.T_c_in), mp.T_c_in))
+    beta = kn.calc_beta(kn.calc_ach(temp_c_out, mp.T_c_in))
+    c_source = beta * 0.005
+
+    timings = {}
+    for name in candidates:
+        # first call includes one-time costs such as JIT compilation
+        _backends[name](cw_sat_in, beta, c_source)
+        start = time.perf_counter()
+        _backends[name](cw_sat_in, beta, c_source)
+        timings[name] = time.perf_counter() - start
+
+    return min(timings, key=timings.get)
+
+
+# original scalar loop of compute_fr
+def march_reference(cw_sat_in, beta, c_source, state: kn.WallState = None, params=None):
+
+    if not is_default_parameters(params):
+        raise ValueError("The reference backend only supports the default parameter set")
+
+    if np.ndim(cw_sat_in) == 2:
+        rows = []
+        for n in range(len(cw_sat_in)):
+            row_state = None if state is None else kn.WallState(*(np.asarray(field)[n] for field in state))
+            rows.append(march_reference(cw_sat_in[n], beta[n], c_source[n], row_state))
+
+        end_state = kn.WallState(*(np.stack([row[2][f] for row in rows]) for f in range(len(kn.WallState._fields))))
+        return np.stack([row[0] for row in rows]), np.stack([row[1] for row in rows]), end_state
+
+    steps = len(cw_sat_in)
+
+    wall = np.zeros(shape=(steps, mp.sub_layers))
+    wall_vector = np.zeros(mp.sub_layers)
+    surface = np.zeros(steps)
+    rh_wall = np.zeros(steps)
+    rh_in = np.zeros(steps)
+    cw_in = np.zeros(steps)
+    delta_c = np.zeros(steps)
+    c_wall = np.zeros(steps)
+
+    # set initial conditions
+    if state is None:
+        state = kn.initial_state(cw_sat_in[0])
+    wall[0] = state.wall
+    surface[0] = func.calc_surf(wall[0][0], wall[0][1])
+    rh_wall[0] = func.calc_rhwall(surface[0])
+    rh_in[0] = state.rh_in
+    cw_in[0] = state.cw_in
+    c_wall[0] = state.c_wall
+
+    for i in range(steps - 1):
+        # compute fmc in layer 1
+        wall_vector[0] = func.calc_layer1(rh_in[i], rh_wall[i], wall[i][0], wall[i][1], cw_sat_in[i])
+        n = 0
+        for l in range(mp.sub_layers - 2):
+            # compute fmc in wall layers 2 to N-1
+            n = n + 1
+            wall_vector[n] = func.calc_middle_layers(wall[i][n], wall[i][n - 1], wall[i][n + 1])
+        # compute fmc in wall layer N (panel backside)
+        wall_vector[-1] = func.calc_outer_layer(wall[i][-1], wall[i][-2])
+        # update wall array
+        wall[i + 1][:] = wall_vector
+        # update surface vector
+        surface[i + 1] = func.calc_surf(wall[i + 1][0], wall[i + 1][1])
+        # update rh_wall
+        rh_wall[i + 1] = func.calc_rhwall(surface[i + 1])
+        # update water concentration difference between bulk air and boundary layer
+        delta_c[i + 1] = func.calc_deltac(rh_in[i], rh_wall[i], cw_sat_in[i])
+        # update indoor water concentration (air change and supply are combined in c_source)
+        cw_in[i + 1] = func.calc_cwin(c_source[i], c_wall[i], 0, cw_in[i], beta[i])
+        # update indoor relative humidity
+        rh_in[i + 1] = cw_in[i + 1] / cw_sat_in[i + 1]
+        # update c_wall
+        c_wall[i + 1] = func.calc_cwall(delta_c[i + 1])
+
+    end_state = kn.WallState(wall=wall[-1].copy(), rh_in=rh_in[-1], cw_in=cw_in[-1], c_wall=c_wall[-1])
+
+    return surface, rh_in, end_state
+
+
+# marches blocks of rows (locations) concurrently in threads, with the same contract as kernels.march. The loop of
+# the numba backend releases the GIL (nogil), such that blocks run in parallel on all cores on standard CPython.
+# Without numba the blocks are marched by numpy, which only releases the GIL within the array operations of each
+# timestep and scales on free-threaded builds. workers defaults to the number of CPUs, 1-d inputs are marched
+# directly.
+def march_threads(cw_sat_in, beta, c_source, state: kn.WallState = None, params=None, workers: int = None):
+
+    march_block = _backends['numba'] if 'numba' in _backends else _backends['numpy']
+
+    locations = len(cw_sat_in) if np.ndim(cw_sat_in) == 2 else 1
+    workers = min(workers or os.cpu_count() or 1, locations)
+    if workers == 1:
+        return march_block(cw_sat_in, beta, c_source, state, params)
+
+    bounds = np.linspace(0, locations, workers + 1).astype(int).tolist()
+
+    def block(start, end):
+        block_state = None if state is None else _state_rows(state, start, end)
+        block_params = params if params is None or isinstance(params, mp.ParameterSet) else params[start:end]
+        return march_block(cw_sat_in[start:end], beta[start:end], c_source[start:end], block_state, block_params)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        blocks = list(executor.map(block, bounds[:-1], bounds[1:]))
+
+    end_state = kn.WallState(*(np.concatenate([b[2][f] for b in blocks]) for f in range(len(kn.WallState._fields))))
+
+    return np.concatenate([b[0] for b in blocks]), np.concatenate([b[1] for b in blocks]), end_state
+
+
+# rows start to end of a state, a state of a single location (shared by all rows) is kept as it is
+def _state_rows(state: kn.WallState, start: int, end: int) -> kn.WallState:
+    if np.ndim(state.wall) == 1:
+        return state
+    return kn.WallState(*(np.asarray(field)[start:end] for field in state))
+
+
+# True for no parameters, the default parameter set, or a list of only default parameter sets
+def is_default_parameters(params) -> bool:
+    if params is None or isinstance(params, mp.ParameterSet):
+        return params is None or params == mp.DEFAULT_PARAMETERS
+    return all(p == mp.DEFAULT_PARAMETERS for p in params)
+
+
+register_backend('reference', march_reference)
+register_backend('numpy', kn.march)
+register_backend('threads', march_threads)
+
+try:
+    import frcm.fireriskmodel.jit as jit
+    register_backend('numba', jit.march_jit)
+except ImportError:
+    pass
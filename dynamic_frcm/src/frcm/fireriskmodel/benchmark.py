@@ -0,0 +1,84 @@
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import frcm.fireriskmodel.backends as bk
+import frcm.fireriskmodel.compute as compute
+
+""" Thread scaling benchmark of the fire risk computation """
+
+# Two modes are measured for an increasing number of threads:
+#
+# batch     - one batch of locations marched by the 'threads' backend with the given number of workers
+# requests  - independent single location computations (compute_fr), one per request, run concurrently in a thread
+#             pool as by the web service
+#
+# Speedup is relative to one thread. Run with: python -m frcm.fireriskmodel.benchmark [--locations N] [--hours H]
+
+
+def synthetic_weather(locations: int, hours: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    steps = hours * 5
+    phase = np.linspace(0, 2 * np.pi * hours / 24, steps)
+    temp = 4 + 5 * np.sin(phase) + rng.normal(0, 0.5, (locations, steps))
+    humidity = np.clip(75 - 15 * np.sin(phase) + rng.normal(0, 3, (locations, steps)), 5, 100)
+    return temp, humidity
+
+
+def _time(function, repeat: int) -> float:
+    function()
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+# best time in seconds of each mode per thread count, as rows (threads, mode, seconds, speedup)
+def thread_scaling(locations: int = 256, hours: int = 240, threads=None, repeat: int = 3) -> list[tuple[int, str, float, float]]:
+
+    threads = threads if threads else sorted({1, 2, 4, 8, os.cpu_count() or 1})
+    temp, humidity = synthetic_weather(locations, hours)
+    cw_sat_in, beta, c_source = compute.compute_forcing(temp, humidity)
+    backend = 'numba' if 'numba' in bk.available_backends() else 'numpy'
+
+    def batch(workers):
+        return lambda: bk.march_threads(cw_sat_in, beta, c_source, workers=workers)
+
+    def requests(workers):
+        def run():
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                list(executor.map(lambda n: compute.compute_fr(temp[n], humidity[n], backend=backend), range(locations)))
+        return run
+
+    rows = []
+    for mode, make in (('batch', batch), ('requests', requests)):
+        baseline = None
+        for n in threads:
+            seconds = _time(make(n), repeat)
+            baseline = seconds if baseline is None else baseline
+            rows.append((n, mode, seconds, baseline / seconds))
+
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Thread scaling of the fire risk computation')
+    parser.add_argument('--locations', type=int, default=256)
+    parser.add_argument('--hours', type=int, default=240)
+    parser.add_argument('--threads', type=int, nargs='*')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f'backends: {bk.available_backends()}, cpus: {os.cpu_count()}')
+    print(f'{"threads":>8} {"mode":>9} {"seconds":>10} {"speedup":>8}')
+    for n, mode, seconds, speedup in thread_scaling(args.locations, args.hours, args.threads, args.repeat):
+        print(f'{n:>8} {mode:>9} {seconds:>10.4f} {speedup:>8.2f}')
+
+
+if __name__ == '__main__':
+    main()
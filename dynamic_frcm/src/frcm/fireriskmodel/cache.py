@@ -0,0 +1,178 @@
+import datetime
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import NamedTuple
+
+import numpy as np
+
+import frcm.datamodel.model as dm
+from frcm.datamodel.series import FireRiskSeries
+import frcm.fireriskmodel.parameters as mp
+import frcm.fireriskmodel.compute as compute
+import frcm.fireriskmodel.preprocess as pp
+import frcm.fireriskmodel.quality as qc
+
+""" Content-addressed memoization of fire risk computations """
+
+# Results are keyed on a hash of the preprocessed (interpolated) weather data and everything else the result depends
+# on (parameter set, integrator, horizon, checkpoint), but not on the location. Locations sharing weather data, e.g.,
+# the same forecast grid cell and observation station, hence share cache entries. Entries only hold the hourly
+# result arrays, and the cache is bounded by the total size of these arrays with least recently used eviction.
+
+MAX_BYTES = 64 * 2 ** 20
+
+
+class CacheStats(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    size_bytes: int
+    max_bytes: int
+
+
+class CacheEntry(NamedTuple):
+    start_time: datetime.datetime
+    step: datetime.timedelta        # between the hourly fire risks
+    ttf: np.ndarray
+    wind_speed: np.ndarray
+    checkpoint: dm.SimulationState = None
+
+    @property
+    def nbytes(self) -> int:
+        size = self.ttf.nbytes + self.wind_speed.nbytes
+        if self.checkpoint is not None:
+            size = size + 8 * (len(self.checkpoint.wall) + 3)
+        return size
+
+    # the arrays are copied (series arrays may be views of the full simulation) and shared read-only by the
+    # series of all hits
+    @staticmethod
+    def from_series(series: FireRiskSeries, checkpoint: dm.SimulationState = None):
+        ttf, wind_speed = np.array(series.ttf), np.array(series.wind_speed)
+        ttf.setflags(write=False)
+        wind_speed.setflags(write=False)
+        return CacheEntry(start_time=series.start, step=series.step, ttf=ttf, wind_speed=wind_speed,
+                          checkpoint=checkpoint)
+
+    def series(self, location: dm.Location) -> FireRiskSeries:
+        return FireRiskSeries(location, self.start_time, self.step, self.ttf, self.wind_speed)
+
+    def prediction(self, location: dm.Location) -> dm.FireRiskPrediction:
+        return self.series(location).to_prediction()
+
+
+# stable hash of arrays (by dtype, shape and content) and further named values (by repr)
+def content_key(*arrays, **values) -> str:
+    digest = hashlib.blake2b(digest_size=20)
+    for array in arrays:
+        array = np.ascontiguousarray(array, dtype=float)
+        digest.update(repr(array.shape).encode())
+        digest.update(array.tobytes())
+    for name in sorted(values):
+        digest.update(f'{name}={values[name]!r};'.encode())
+    return digest.hexdigest()
+
+
+class ComputeCache:
+
+    def __init__(self, max_bytes: int = MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size_bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(hits=self._hits, misses=self._misses, evictions=self._evictions,
+                              entries=len(self._entries), size_bytes=self._size_bytes, max_bytes=self.max_bytes)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size_bytes = 0
+
+    def get(self, key: str) -> CacheEntry | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses = self._misses + 1
+                return None
+            self._hits = self._hits + 1
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: str, entry: CacheEntry):
+        with self._lock:
+            if entry.nbytes > self.max_bytes:
+                return
+            if key in self._entries:
+                self._size_bytes = self._size_bytes - self._entries.pop(key).nbytes
+            self._entries[key] = entry
+            self._size_bytes = self._size_bytes + entry.nbytes
+            while self._size_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size_bytes = self._size_bytes - evicted.nbytes
+                self._evictions = self._evictions + 1
+
+    # memoized compute.compute
+    def compute(self, wd: dm.WeatherData, integrator: str = 'explicit', backend: str = 'auto',
+                start_time: datetime.datetime = None, end_time: datetime.datetime = None) -> dm.FireRiskPrediction:
+
+        return self.compute_series(wd, integrator, backend, start_time, end_time).to_prediction()
+
+    # memoized compute.compute_series. With checked, weather data which fails the quality checks raises a
+    # QualityError (see frcm.fireriskmodel.quality) before it is looked up or simulated.
+    def compute_series(self, wd: dm.WeatherData, integrator: str = 'explicit', backend: str = 'auto',
+                       start_time: datetime.datetime = None, end_time: datetime.datetime = None,
+                       checked: bool = False) -> FireRiskSeries:
+
+        # preprocessed once, for the quality checks, the key and (on a miss) the computation
+        interpolator = pp.Interpolator(wd, end_time=compute.horizon(wd, end_time))
+        if checked:
+            qc.require(interpolator.quality())
+        preprocessed = interpolator.preprocess()
+        grid_start, _, temp, humidity, wind, _ = preprocessed
+        key = content_key(temp, humidity, wind, grid_start=grid_start, start_time=start_time,
+                          integrator=integrator, params=mp.DEFAULT_PARAMETERS)
+
+        entry = self.get(key)
+        if entry is None:
+            series = compute.compute_series(wd, integrator, backend, start_time=start_time, end_time=end_time,
+                                            preprocessed=preprocessed)
+            self.put(key, CacheEntry.from_series(series))
+            return series
+
+        return entry.series(wd.forecast.location)
+
+    # memoized compute.compute_checkpointed, the key includes the checkpoint
+    def compute_checkpointed(self, wd: dm.WeatherData, checkpoint: dm.SimulationState = None) -> tuple[dm.FireRiskPrediction, dm.SimulationState]:
+
+        series, new_checkpoint = self.compute_checkpointed_series(wd, checkpoint)
+
+        return series.to_prediction(), new_checkpoint
+
+    # memoized compute.compute_checkpointed_series, checked is as for compute_series
+    def compute_checkpointed_series(self, wd: dm.WeatherData, checkpoint: dm.SimulationState = None,
+                                    checked: bool = False) -> tuple[FireRiskSeries, dm.SimulationState]:
+
+        interpolator = pp.Interpolator(wd, checkpoint.timestamp if checkpoint is not None else None)
+        if checked:
+            qc.require(interpolator.quality())
+        preprocessed = interpolator.preprocess()
+        grid_start, _, temp, humidity, wind, _ = preprocessed
+        last_obs = wd.observations.series.last() if len(wd.observations.series) > 0 else None
+        key = content_key(temp, humidity, wind, grid_start=grid_start, last_obs=last_obs, params=mp.DEFAULT_PARAMETERS,
+                          checkpoint=checkpoint.model_dump_json() if checkpoint is not None else None)
+
+        entry = self.get(key)
+        if entry is None:
+            series, new_checkpoint = compute.compute_checkpointed_series(wd, checkpoint, preprocessed=preprocessed)
+            self.put(key, CacheEntry.from_series(series, new_checkpoint))
+            return series, new_checkpoint
+
+        return entry.series(wd.forecast.location), entry.checkpoint.model_copy()
@@ -1,42 +1,555 @@
 import numpy as np
 import datetime
+import itertools
+from typing import Iterable, Iterator
 
 import frcm.datamodel.model as dm
+from frcm.datamodel.series import FireRiskSeries, WeatherSeries
 import frcm.fireriskmodel.parameters as mp
 import frcm.fireriskmodel.utils as func
+import frcm.fireriskmodel.kernels as kn
+import frcm.fireriskmodel.implicit as im
+import frcm.fireriskmodel.backends as bk
 import frcm.fireriskmodel.preprocess as pp
+import frcm.fireriskmodel.aggregate as ag
+import frcm.fireriskmodel.tables as tb
+import frcm.fireriskmodel.quality as qc
 
 
-def compute(wd: dm.WeatherData) -> dm.FireRiskPrediction:
+INTEGRATORS = ('explicit', 'implicit')
+DTYPES = (np.float64, np.float32)
 
-    # Get interpolated values #TODO (NOTE) The max_time_delta represents the largest gap in missing data (seconds). It can be used to provide suited warning/error message.
-    start_time, time_interpolated_sec, temp_interpolated, humidity_interpolated, wind_interpolated, max_time_delta = pp.preprocess(wd)
+
+# integrator selects the time-stepping of the wall / indoor air model - 'explicit' (reference scheme with fixed
+# delta_t steps) or 'implicit' (adaptive steps, see frcm.fireriskmodel.implicit for the tolerance). The simulation
+# always starts at the first weather data, and stops at the horizon end_time if given. Fire risks before start_time
+# are left out of the prediction.
+def compute(wd: dm.WeatherData, integrator: str = 'explicit', backend: str = 'auto',
+            start_time: datetime.datetime = None, end_time: datetime.datetime = None) -> dm.FireRiskPrediction:
+
+    return compute_series(wd, integrator, backend, start_time, end_time).to_prediction()
+
+
+# as compute, with a quality report of the weather data (see frcm.fireriskmodel.quality). With reject, weather data
+# which fails the quality checks raises a QualityError before it is simulated. The report is made from the data as
+# sorted and de-duplicated by preprocessing.
+def compute_checked(wd: dm.WeatherData, integrator: str = 'explicit', backend: str = 'auto',
+                    start_time: datetime.datetime = None, end_time: datetime.datetime = None,
+                    reject: bool = True) -> tuple[dm.FireRiskPrediction, dm.QualityReport]:
+
+    interpolator = pp.Interpolator(wd, end_time=horizon(wd, end_time))
+
+    report = interpolator.quality()
+    if reject:
+        qc.require(report)
+
+    series = compute_series(wd, integrator, backend, start_time, end_time, preprocessed=interpolator.preprocess())
+
+    return series.to_prediction(), report
+
+
+# as compute, with the prediction in columnar form (hourly ttf and wind speed arrays). preprocessed is the result of
+# pp.preprocess(wd, end_time=horizon(wd, end_time)) if the caller has it already (e.g., ComputeCache, which keys on it).
+def compute_series(wd: dm.WeatherData, integrator: str = 'explicit', backend: str = 'auto',
+                   start_time: datetime.datetime = None, end_time: datetime.datetime = None,
+                   preprocessed: tuple = None) -> FireRiskSeries:
+
+    output_start_time = start_time
+
+    # Get interpolated values. The max_time_delta represents the largest gap in missing data (seconds), gaps are
+    # reported by compute_checked.
+    if preprocessed is None:
+        preprocessed = pp.preprocess(wd, end_time=horizon(wd, end_time))
+    start_time, time_interpolated_sec, temp_interpolated, humidity_interpolated, wind_interpolated, max_time_delta = preprocessed
     comp_loc = wd.forecast.location
 
     # Compute RH_in and TTF
-    rh_in, ttf = compute_fr(temp_interpolated, humidity_interpolated)
+    rh_in, ttf = compute_fr(temp_interpolated, humidity_interpolated, integrator=integrator, backend=backend)
 
     # Reduce data to once per hour, but the time is still given as seconds
     rf = int(
         3600 / mp.delta_t)  # Reduction factor, i.e., how many intervals per hour. Default delta_t = 720 s, hence rf = 5.
-    rh_in_hour = rh_in[::rf]  # Average is not computed, values are extracted per hour.
-    ttf_in_hour = ttf[::rf]
-    time_in_hour = time_interpolated_sec[::rf] # Time is still in seconds but given for every hour.
+    ttf_in_hour = ttf[::rf]  # Average is not computed, values are extracted per hour.
     wind_speed_in_hour = wind_interpolated[::rf]
 
-    # Create response according to datamodel
-    firerisks = []
-    for i in range(len(rh_in_hour)):
-        timestamps = start_time + datetime.timedelta(seconds=time_in_hour[i])
-        firerisk_i = dm.FireRisk(timestamp=timestamps, ttf=ttf_in_hour[i], wind_speed=wind_speed_in_hour[i])
-        firerisks.append(firerisk_i)
+    # Leave out hours before output_start_time
+    first = 0
+    if output_start_time is not None:
+        first = max(0, int(np.ceil((output_start_time - start_time).total_seconds() / 3600)))
+
+    return FireRiskSeries(comp_loc, start_time + datetime.timedelta(hours=first), datetime.timedelta(hours=1),
+                          ttf_in_hour[first:], wind_speed_in_hour[first:])
+
+
+# computes fire risk aggregated over time windows (see frcm.fireriskmodel.aggregate), e.g., the daily minimum TTF
+# with window='day' and statistics=('min',). start_time and end_time are as for compute.
+def compute_aggregated(wd: dm.WeatherData, window: str = 'day', statistics=('min',),
+                       start_time: datetime.datetime = None, end_time: datetime.datetime = None,
+                       backend: str = 'auto') -> dm.FireRiskAggregatePrediction:
+
+    # validate before simulating
+    ag.window_hours(window)
+    for statistic in statistics:
+        ag.check_statistic(statistic)
+
+    output_start_time = start_time
+
+    start_time, time_interpolated_sec, temp_interpolated, humidity_interpolated, wind_interpolated, max_time_delta = pp.preprocess(wd, end_time=horizon(wd, end_time))
+
+    _, ttf = compute_fr(temp_interpolated, humidity_interpolated, backend=backend)
+
+    # Reduce data to once per hour, and leave out hours before output_start_time
+    rf = int(3600 / mp.delta_t)
+    time_in_hour = np.asarray(time_interpolated_sec[::rf], dtype=float)
+    ttf_in_hour = ttf[::rf]
+
+    if output_start_time is not None:
+        first = int(np.searchsorted(time_in_hour, (output_start_time - start_time).total_seconds()))
+        time_in_hour = time_in_hour[first:]
+        ttf_in_hour = ttf_in_hour[first:]
+
+    windows = ag.aggregate(start_time, time_in_hour, ttf_in_hour, window, statistics)
+
+    return dm.FireRiskAggregatePrediction(location=wd.forecast.location, window=window, firerisks=windows)
+
+
+# finds the first hour at or after start_time at which ttf drops below threshold. The simulation runs in blocks of
+# chunk_hours hours and stops at the block with the first crossing, or at the horizon end_time.
+def first_crossing(wd: dm.WeatherData, threshold: float, start_time: datetime.datetime = None,
+                   end_time: datetime.datetime = None, chunk_hours: int = 24, backend: str = 'auto') -> dm.FireRiskCrossing:
+
+    if chunk_hours < 1:
+        raise ValueError(f"chunk_hours must be at least 1, got {chunk_hours}")
+
+    output_start_time = start_time
+
+    start_time, time_interpolated_sec, temp_interpolated, humidity_interpolated, wind_interpolated, max_time_delta = pp.preprocess(wd, end_time=horizon(wd, end_time))
+    comp_loc = wd.forecast.location
+
+    # hours are every rf timesteps, the first hour searched is at timestep first
+    rf = int(3600 / mp.delta_t)
+    last = len(time_interpolated_sec) - 1
+    first = 0
+    if output_start_time is not None:
+        first = rf * max(0, int(np.ceil((output_start_time - start_time).total_seconds() / 3600)))
+
+    state = None
+    begin = 0
+
+    while True:
+        end = min(begin + chunk_hours * rf, last)
+
+        cw_sat_in, beta, c_source = compute_forcing(temp_interpolated[begin:end + 1], humidity_interpolated[begin:end + 1])
+        surface, _, state = bk.march(cw_sat_in, beta, c_source, state, backend)
+
+        # hours of the block not yet searched - the first timestep of a block is the last of the previous block
+        hours = np.arange(begin if begin == 0 else begin + rf, end + 1, rf)
+        hours = hours[hours >= first]
+        ttf = kn.calc_ttf(surface[hours - begin])
+
+        below = np.flatnonzero(ttf < threshold)
+        if below.size > 0:
+            i = hours[below[0]]
+            timestamp = start_time + datetime.timedelta(seconds=time_interpolated_sec[i])
+            return dm.FireRiskCrossing(location=comp_loc, threshold=threshold, timestamp=timestamp, ttf=float(ttf[below[0]]))
+
+        if end == last:
+            return dm.FireRiskCrossing(location=comp_loc, threshold=threshold)
+
+        begin = end
+
+
+# end of the simulation - end_time, limited to the weather data available. None if end_time is not given.
+def horizon(wd: dm.WeatherData, end_time: datetime.datetime = None):
+
+    if end_time is None:
+        return None
+
+    data_start, data_end = pp.time_span(wd)
+
+    if end_time < data_start:
+        raise ValueError(f"Horizon {end_time} is before the first weather data at {data_start}")
+
+    return min(end_time, data_end)
+
+
+# computes a fire risk prediction, and a checkpoint of the model state at the last observation. If a checkpoint
+# (from a previous computation) is given, the computation is resumed from its timestamp and state instead of
+# starting from the initial RH_in guess. The weather data must then cover the checkpoint timestamp.
+def compute_checkpointed(wd: dm.WeatherData, checkpoint: dm.SimulationState = None) -> tuple[dm.FireRiskPrediction, dm.SimulationState]:
+
+    series, new_checkpoint = compute_checkpointed_series(wd, checkpoint)
+
+    return series.to_prediction(), new_checkpoint
+
+
+# as compute_checkpointed, with the prediction in columnar form. preprocessed is the result of
+# pp.preprocess(wd, checkpoint.timestamp) (or pp.preprocess(wd) without a checkpoint) if the caller has it already.
+def compute_checkpointed_series(wd: dm.WeatherData, checkpoint: dm.SimulationState = None,
+                                preprocessed: tuple = None) -> tuple[FireRiskSeries, dm.SimulationState]:
+
+    if preprocessed is None:
+        preprocessed = pp.preprocess(wd, checkpoint.timestamp if checkpoint is not None else None)
+    start_time, time_interpolated_sec, temp_interpolated, humidity_interpolated, wind_interpolated, max_time_delta = preprocessed
+    comp_loc = wd.forecast.location
+
+    cw_sat_in, beta, c_source = compute_forcing(temp_interpolated, humidity_interpolated)
+
+    state = None
+    if checkpoint is not None:
+        state = kn.WallState(wall=np.array(checkpoint.wall), rh_in=checkpoint.rh_in, cw_in=checkpoint.cw_in, c_wall=checkpoint.c_wall)
+
+    # timestep of the last observation - the state there no longer depends on the (changing) forecast
+    last_obs = wd.observations.series.last() if len(wd.observations.series) > 0 else start_time
+    k = int(np.clip((last_obs - start_time).total_seconds() // mp.delta_t, 0, len(time_interpolated_sec) - 1))
+
+    # march up to and including the checkpoint step, then resume from there to the end
+    surface_obs, rh_in_obs, state = bk.march(cw_sat_in[:k + 1], beta[:k + 1], c_source[:k + 1], state)
+    new_checkpoint = dm.SimulationState(timestamp=start_time + datetime.timedelta(seconds=time_interpolated_sec[k]),
+                                        wall=state.wall.tolist(),
+                                        cw_in=state.cw_in,
+                                        rh_in=state.rh_in,
+                                        c_wall=state.c_wall)
+
+    surface_fct, _, _ = bk.march(cw_sat_in[k:], beta[k:], c_source[k:], state)
+    ttf = kn.calc_ttf(np.concatenate([surface_obs, surface_fct[1:]]))
+
+    # Reduce data to once per hour
+    rf = int(3600 / mp.delta_t)
+    series = FireRiskSeries(comp_loc, start_time, datetime.timedelta(hours=1), ttf[::rf], wind_interpolated[::rf])
+
+    return series, new_checkpoint
+
+
+# computes fire risk hour by hour, yielding each FireRisk as soon as its block of chunk_hours hours has been
+# simulated. Each block is interpolated from the weather data when it is simulated, and only the state of the wall /
+# indoor air model is kept between blocks, not the full interpolated or simulation arrays.
+def compute_stream(wd: dm.WeatherData, chunk_hours: int = 6, backend: str = 'auto') -> Iterator[dm.FireRisk]:
+
+    if chunk_hours < 1:
+        raise ValueError(f"chunk_hours must be at least 1, got {chunk_hours}")
+
+    interpolator = pp.Interpolator(wd)
+    start_time = interpolator.start_time
+
+    # hourly timesteps (every rf timesteps), grouped into blocks. The first block only contains the initial hour,
+    # later blocks are simulated from the last hour of the previous block (where the state was taken)
+    rf = int(3600 / mp.delta_t)
+    hours = (interpolator.steps - 1) // rf + 1
+
+    state = None
+    begin = 0
+
+    for first_hour in itertools.chain([0], range(1, hours, chunk_hours)) if hours > 0 else ():
+        last_hour = 0 if first_hour == 0 else min(first_hour + chunk_hours, hours) - 1
+        block = range(first_hour * rf, last_hour * rf + 1, rf)
+        end = block[-1]
+
+        temp, humidity, wind = interpolator.interpolate(begin, end)
+        cw_sat_in, beta, c_source = compute_forcing(temp, humidity)
+        surface, _, state = bk.march(cw_sat_in, beta, c_source, state, backend)
+        ttf = kn.calc_ttf(surface)
+
+        for i in block:
+            timestamp = start_time + datetime.timedelta(seconds=i * mp.delta_t)
+            yield dm.FireRisk(timestamp=timestamp, ttf=ttf[i - begin], wind_speed=wind[i - begin])
+
+        begin = end
+
+
+# computes fire risk hour by hour from weather data given in consecutive chunks (in time order, e.g., monthly
+# observations), yielding the fire risks of each chunk once it has been simulated. The state of the wall / indoor air
+# model and the data points needed to interpolate across the chunk boundary are carried from one chunk to the next,
+# such that the result is the same as computing all weather data at once. Chunks may overlap, data points at or
+# before the last data point of the previous chunk are left out. start_time and end_time are as for compute.
+def compute_chunked(wds: Iterable[dm.WeatherData], start_time: datetime.datetime = None,
+                    end_time: datetime.datetime = None, backend: str = 'auto') -> Iterator[dm.FireRisk]:
+
+    output_start_time = start_time
+    rf = int(3600 / mp.delta_t)
+
+    grid_start = None   # time of the first timestep
+    anchor = None       # time of the last simulated timestep, where the next chunk starts
+    state = None
+    carried = None      # data points from the last one at or before the anchor
 
-    FireRiskResponse = dm.FireRiskPrediction(location=comp_loc, firerisks=firerisks)
+    for wd in wds:
+        data = pp.combined_series(wd)
+        if carried is not None:
+            data = WeatherSeries.concat(carried, data[data.timestamps > carried.timestamps[-1]])
 
-    return FireRiskResponse
+        if len(data) == 0:
+            continue
 
+        chunk_end = data.last() if end_time is None else min(end_time, data.last())
+        if (chunk_end - (anchor or data.first())).total_seconds() < mp.delta_t:
+            # not enough data for a timestep yet
+            carried = data
+            continue
 
-def compute_fr(temp_c_out, rh_out):
+        chunk = dm.WeatherData(created=wd.created,
+                               observations=dm.Observations(source=wd.observations.source, location=wd.observations.location, series=data),
+                               forecast=dm.Forecast(location=wd.forecast.location, series=WeatherSeries.empty()))
+
+        start, time_interpolated_sec, temp_interpolated, humidity_interpolated, wind_interpolated, max_time_delta = pp.preprocess(chunk, anchor, chunk_end)
+
+        if grid_start is None:
+            grid_start = start
+        offset = round((start - grid_start).total_seconds()) // mp.delta_t
+
+        cw_sat_in, beta, c_source = compute_forcing(temp_interpolated, humidity_interpolated)
+        surface, _, state = bk.march(cw_sat_in, beta, c_source, state, backend)
+        ttf = kn.calc_ttf(surface).tolist()
+
+        # hourly timesteps of the chunk, the first timestep was yielded with the previous chunk
+        first = (-offset) % rf
+        if anchor is not None and first == 0:
+            first = rf
+
+        for i in range(first, len(time_interpolated_sec), rf):
+            timestamp = start + datetime.timedelta(seconds=time_interpolated_sec[i])
+            if output_start_time is None or timestamp >= output_start_time:
+                yield dm.FireRisk(timestamp=timestamp, ttf=ttf[i], wind_speed=wind_interpolated[i])
+
+        anchor = start + datetime.timedelta(seconds=time_interpolated_sec[-1])
+        if end_time is not None and anchor + datetime.timedelta(seconds=mp.delta_t) > end_time:
+            return
+
+        last_before = np.searchsorted(data.timestamps, data.from_datetime(anchor), side='right') - 1
+        carried = data[last_before:]
+
+
+# computes fire risk predictions for several locations in one pass. All weather data is interpolated onto the time
+# span shared by all inputs, and the wall / indoor air model is run over a (locations x timesteps) array.
+# dtype=np.float32 preprocesses and simulates in single precision, see compute_fr.
+def compute_many(wds: list[dm.WeatherData], backend: str = 'auto', tabulated: bool = False,
+                 dtype=np.float64) -> list[dm.FireRiskPrediction]:
+
+    if len(wds) == 0:
+        return []
+
+    # Shared time grid - from the latest start to the earliest end among the inputs
+    spans = [pp.time_span(wd) for wd in wds]
+    start_time = max(span[0] for span in spans)
+    end_time = min(span[1] for span in spans)
+
+    if end_time < start_time:
+        raise ValueError("Weather data for the locations do not have an overlapping time span.")
+
+    temp_interpolated = []
+    humidity_interpolated = []
+    wind_interpolated = []
+
+    for wd in wds:
+        _, time_interpolated_sec, temp, humidity, wind, _ = pp.preprocess(wd, start_time, end_time, dtype)
+        temp_interpolated.append(temp)
+        humidity_interpolated.append(humidity)
+        wind_interpolated.append(wind)
+
+    # Compute RH_in and TTF for all locations, rows are locations and columns are timesteps
+    rh_in, ttf = compute_fr(np.stack(temp_interpolated), np.stack(humidity_interpolated), backend=backend,
+                            tabulated=tabulated, dtype=dtype)
+
+    # Reduce data to once per hour
+    rf = int(3600 / mp.delta_t)
+    ttf_in_hour = ttf[:, ::rf]
+    wind_speed_in_hour = np.stack(wind_interpolated)[:, ::rf]
+    timestamps = [start_time + datetime.timedelta(seconds=sec) for sec in time_interpolated_sec[::rf]]
+
+    # Create response according to datamodel, timestamps are shared by all locations
+    predictions = []
+    for n, wd in enumerate(wds):
+        firerisks = [dm.FireRisk(timestamp=timestamp, ttf=ttf_i, wind_speed=wind_i)
+                     for timestamp, ttf_i, wind_i in zip(timestamps, ttf_in_hour[n].tolist(), wind_speed_in_hour[n].tolist())]
+        predictions.append(dm.FireRiskPrediction(location=wd.forecast.location, firerisks=firerisks))
+
+    return predictions
+
+
+# terms of the wall / indoor air model which only depend on the weather data - indoor saturation water
+# concentration, ventilation factor beta and the water sources to indoor air (air change + supply). params is a
+# parameter set, or a list of parameter sets which are evaluated as one row each. temp_c_in ('C) and supply_24h
+# (kg/24 hour) optionally give per timestep indoor temperature and supply, overriding the (constant) values of the
+# parameter sets, and must broadcast to the shape of the result. With tabulated=True the ventilation and air change
+# terms are interpolated from lookup tables (see frcm.fireriskmodel.tables for the error), except with indoor
+# temperature profiles. The results have the precision of temp_c_out (see kernels.float_dtype).
+def compute_forcing(temp_c_out, rh_out, params=None, temp_c_in=None, supply_24h=None, tabulated: bool = False):
+
+    # 1-d inputs for a single location, or 2-d inputs of shape (locations, timesteps)
+    dtype = kn.float_dtype(temp_c_out)
+    temp_c_out = np.asarray(temp_c_out, dtype=dtype)
+    rh_out = np.asarray(rh_out, dtype=dtype)
+
+    # parameter values are scalars for a single parameter set, and columns (one value per row) for a list
+    batch = not (params is None or isinstance(params, mp.ParameterSet))
+
+    def values(name):
+        value = kn.parameter_values(params, name)
+        return np.asarray(value, dtype=dtype)[:, None] if batch else value
+
+    if batch and temp_c_out.ndim == 1:
+        # the same weather for all parameter sets
+        temp_c_out = np.broadcast_to(temp_c_out, (len(params), len(temp_c_out)))
+        rh_out = np.broadcast_to(rh_out, temp_c_out.shape)
+
+    "Indoor temperature vector"
+    indoor_profile = temp_c_in is not None
+    temp_c_in = values('T_c_in') if temp_c_in is None else np.asarray(temp_c_in, dtype=dtype)
+
+    # indoor saturation water concentration, evaluated before broadcasting constant indoor temperatures
+    pw_sat_in = kn.calc_pwsat(temp_c_in)
+    cw_sat_in = np.array(np.broadcast_to(kn.calc_cwsat(pw_sat_in, temp_c_in), temp_c_out.shape), dtype=dtype)
+    temp_c_in = np.broadcast_to(temp_c_in, temp_c_out.shape)
+
+    if tabulated and not indoor_profile:
+        beta, c_ac = _tabulated_beta_cac(temp_c_out, rh_out, params)
+    else:
+        """ compute saturation vapor pressures and water concentrations, outdoor """
+        # w = water, sat = saturation
+        pw_sat_out = kn.calc_pwsat(temp_c_out)
+        cw_sat_out = kn.calc_cwsat(pw_sat_out, temp_c_out)
+        cw_out = kn.calc_cw(rh_out, cw_sat_out)
+
+        # ventilation variables
+        ach = kn.calc_ach(temp_c_out, temp_c_in, values('gamma'))
+        beta = kn.calc_beta(ach)
+
+        c_ac = kn.calc_cac(beta, cw_out, temp_c_out, temp_c_in)
+
+    # supplied water concentration per timestep, precomputed by the parameter sets unless given as a profile
+    if supply_24h is None:
+        c_supply = values('c_supply')
+    else:
+        supply = np.broadcast_to((np.asarray(supply_24h, dtype=dtype) / (24 * 3600)) * mp.delta_t, temp_c_out.shape)
+        c_supply = kn.calc_csupply(supply, values('Vol'))
+
+    return cw_sat_in, np.asarray(beta, dtype=dtype), np.asarray(c_ac + c_supply, dtype=dtype)
+
+
+# beta and c_ac from lookup tables, rows with a different indoor temperature or gamma use different tables
+def _tabulated_beta_cac(temp_c_out, rh_out, params=None):
+
+    if params is None or isinstance(params, mp.ParameterSet):
+        params = params if params is not None else mp.DEFAULT_PARAMETERS
+        return tb.calc_beta_cac(temp_c_out, rh_out, params.T_c_in, params.gamma)
+
+    rows = {}
+    for n, p in enumerate(params):
+        rows.setdefault((p.T_c_in, p.gamma), []).append(n)
+
+    beta = np.empty(temp_c_out.shape)
+    c_ac = np.empty(temp_c_out.shape)
+    for (temp_c_in, gamma), index in rows.items():
+        beta[index], c_ac[index] = tb.calc_beta_cac(temp_c_out[index], rh_out[index], temp_c_in, gamma)
+
+    return beta, c_ac
+
+
+# backend selects the implementation of the explicit time-marching, see frcm.fireriskmodel.backends. params,
+# temp_c_in and supply_24h describe the enclosure(s) and tabulated selects lookup table kernels, see compute_forcing.
+# dtype=np.float32 computes the forcing and marching in single precision, which halves the memory of large batches
+# (see frcm.fireriskmodel.precision for the deviation from double precision).
+def compute_fr(temp_c_out, rh_out, state: kn.WallState = None, integrator: str = 'explicit', backend: str = 'auto',
+               params=None, temp_c_in=None, supply_24h=None, tabulated: bool = False, dtype=np.float64):
+
+    if integrator not in INTEGRATORS:
+        raise ValueError(f"Unknown integrator '{integrator}', must be one of {INTEGRATORS}")
+
+    dtype = np.dtype(dtype).type
+    if dtype not in DTYPES:
+        raise ValueError(f"Unknown dtype '{dtype.__name__}', must be one of {[t.__name__ for t in DTYPES]}")
+
+    if integrator == 'implicit':
+        if not bk.is_default_parameters(params) or temp_c_in is not None or supply_24h is not None:
+            raise ValueError("The implicit integrator only supports the default parameter set")
+        if dtype != np.float64:
+            raise ValueError("The implicit integrator only supports double precision")
+        surface, rh_in = _march_implicit(temp_c_out, rh_out, state)
+        return rh_in, kn.calc_ttf(surface)
+
+    temp_c_out = np.asarray(temp_c_out, dtype=dtype)
+    rh_out = np.asarray(rh_out, dtype=dtype)
+    cw_sat_in, beta, c_source = compute_forcing(temp_c_out, rh_out, params, temp_c_in, supply_24h, tabulated)
+
+    # advance the wall and indoor air model through all timesteps
+    surface, rh_in, _ = bk.march(cw_sat_in, beta, c_source, state, backend, params)
+
+    # Compute ttf
+    ttf_exponent = kn.parameter_values(params, 'ttf_exponent')
+    ttf = kn.calc_ttf(surface, ttf_exponent if np.ndim(ttf_exponent) == 0 else ttf_exponent[:, None].astype(dtype))
+
+    return rh_in, ttf
+
+
+# computes fire risk predictions for several building archetypes (parameter sets) from the same weather data in one
+# pass. temp_c_in ('C) and supply_24h (kg/24 hour) optionally give diurnal profiles of indoor temperature and supply
+# as 24 hourly values (from 00 UTC), either one profile for all archetypes or one profile per archetype.
+def compute_archetypes(wd: dm.WeatherData, archetypes: list[mp.ParameterSet], temp_c_in=None, supply_24h=None,
+                       backend: str = 'auto') -> list[dm.FireRiskPrediction]:
+
+    if len(archetypes) == 0:
+        return []
+
+    start_time, time_interpolated_sec, temp_interpolated, humidity_interpolated, wind_interpolated, max_time_delta = pp.preprocess(wd)
+
+    # hour of day (UTC) of each timestep
+    midnight = start_time.replace(hour=0, minute=0, second=0, microsecond=0)
+    hour_of_day = ((start_time - midnight).total_seconds() + np.asarray(time_interpolated_sec)) / 3600 % 24
+
+    if temp_c_in is not None:
+        temp_c_in = _diurnal_profile(temp_c_in, hour_of_day)
+    if supply_24h is not None:
+        supply_24h = _diurnal_profile(supply_24h, hour_of_day)
+
+    _, ttf = compute_fr(temp_interpolated, humidity_interpolated, backend=backend,
+                        params=list(archetypes), temp_c_in=temp_c_in, supply_24h=supply_24h)
+
+    # Reduce data to once per hour
+    rf = int(3600 / mp.delta_t)
+    ttf_in_hour = ttf[:, ::rf]
+    wind_speed_in_hour = wind_interpolated[::rf].tolist()
+    timestamps = [start_time + datetime.timedelta(seconds=sec) for sec in time_interpolated_sec[::rf]]
+
+    predictions = []
+    for n in range(len(archetypes)):
+        firerisks = [dm.FireRisk(timestamp=timestamp, ttf=ttf_i, wind_speed=wind_i)
+                     for timestamp, ttf_i, wind_i in zip(timestamps, ttf_in_hour[n].tolist(), wind_speed_in_hour)]
+        predictions.append(dm.FireRiskPrediction(location=wd.forecast.location, firerisks=firerisks))
+
+    return predictions
+
+
+# values of diurnal profiles (24 hourly values, or rows of them) at the given hours of day, linearly interpolated
+def _diurnal_profile(profile, hour_of_day):
+    profile = np.asarray(profile, dtype=float)
+
+    if profile.shape[-1] != 24:
+        raise ValueError(f"Diurnal profiles must have 24 hourly values, got {profile.shape[-1]}")
+
+    hours = np.arange(25)
+    if profile.ndim == 1:
+        return np.interp(hour_of_day, hours, np.append(profile, profile[0]))
+
+    return np.stack([np.interp(hour_of_day, hours, np.append(row, row[0])) for row in profile])
+
+
+# implicit steps are adapted to the inputs of each location, hence locations are marched one at a time
+def _march_implicit(temp_c_out, rh_out, state: kn.WallState = None):
+
+    if np.ndim(temp_c_out) == 1:
+        surface, rh_in, _ = im.march_implicit(temp_c_out, rh_out, state)
+        return surface, rh_in
+
+    rows = []
+    for n in range(len(temp_c_out)):
+        row_state = None if state is None else kn.WallState(*(np.asarray(field)[n] for field in state))
+        rows.append(im.march_implicit(temp_c_out[n], rh_out[n], row_state)[:2])
+
+    return np.stack([row[0] for row in rows]), np.stack([row[1] for row in rows])
+
+
+# original scalar implementation of compute_fr, kept as reference for equivalence checks
+def compute_fr_reference(temp_c_out, rh_out):
 
     "Indoor temperature vector"
     temp_c_in = [mp.T_c_in] * len(temp_c_out)  # Potential future changes may involve dynamic in-home temperatures
@@ -57,67 +570,11 @@ def compute_fr(temp_c_out, rh_out):
     supply_pts = (mp.supply_24h / (24 * 3600)) * mp.delta_t
     supply = [supply_pts] * len(temp_c_out)
 
-    """ create wall array and vector """
-
-    # wall array - storing fmc values - rows represent a step in time, columns represent wooden panel layers.
-    wall = np.zeros(shape=(len(temp_c_out), mp.sub_layers))
-    # used to update the wall array
-    wall_vector = np.zeros(mp.sub_layers)
-
-    # initial fmc value in wooden panels
-    initial_fmc = func.calc_fmc(mp.RH_in) * mp.rho_wood
-
-    """ placeholders """
-    # shall contain wooden surface fmc values
-    surface = np.zeros(len(temp_c_out))
-    # shall contain wooden surface (boundary layer) rh values
-    rh_wall = np.zeros(len(temp_c_out))
-    # shall contain bulk air (in-home) rh values
-    rh_in = np.zeros(len(temp_c_out))
-    # shall contain bulk air (in-home) water concentrations
-    cw_in = np.zeros(len(temp_c_out))
-    # shall contain water concentration difference between rh_wall and rh_in
-    delta_c = np.zeros(len(temp_c_out))
-    # shall contain water concentration (contribution) per timestep from wooden surfaces
-    c_wall = np.zeros(len(temp_c_out))
-
-
-    # set initial conditions
-    wall[0] = [initial_fmc] * mp.sub_layers
-    surface[0] = func.calc_surf(wall[0][0], wall[0][1])
-    rh_wall[0] = func.calc_rhwall(surface[0])
-    rh_in[0] = mp.RH_in
-    cw_in[0] = mp.RH_in * cw_sat_in[0]
-    delta_c[0] = func.calc_deltac(rh_in[0], rh_wall[0], cw_sat_in[0])
-    c_wall[0] = func.calc_cwall(delta_c[0])
-
     c_ac = list(map(func.calc_cac, beta, cw_out, temp_c_out, temp_c_in))
     c_supply = (list(map(func.calc_csupply, supply)))
+    c_source = [cac + csupply for cac, csupply in zip(c_ac, c_supply)]
 
-    for i in range(len(temp_c_out) - 1):
-        # compute fmc in layer 1
-        wall_vector[0] = func.calc_layer1(rh_in[i], rh_wall[i], wall[i][0], wall[i][1], cw_sat_in[i])
-        n = 0
-        for l in range(mp.sub_layers-2):
-            # compute fmc in wall layers 2 to N-1
-            n = n + 1
-            wall_vector[n] = func.calc_middle_layers(wall[i][n], wall[i][n - 1], wall[i][n + 1])
-        # compute fmc in wall layer N (panel backside)
-        wall_vector[-1] = func.calc_outer_layer(wall[i][-1], wall[i][-2])
-        # update wall array
-        wall[i + 1][:] = wall_vector
-        # update surface vector
-        surface[i + 1] = func.calc_surf(wall[i + 1][0], wall[i + 1][1])
-        # update rh_wall
-        rh_wall[i + 1] = func.calc_rhwall(surface[i + 1])
-        # update water concentration difference between bulk air and boundary layer
-        delta_c[i + 1] = func.calc_deltac(rh_in[i], rh_wall[i], cw_sat_in[i])
-        # update indoor water concentration
-        cw_in[i + 1] = func.calc_cwin(c_ac[i], c_wall[i], c_supply[i], cw_in[i], beta[i])
-        # update indoor relative humidity
-        rh_in[i + 1] = cw_in[i + 1] / cw_sat_in[i + 1]
-        # update c_wall
-        c_wall[i + 1] = func.calc_cwall(delta_c[i + 1])
+    surface, rh_in, _ = bk.march_reference(cw_sat_in, beta, c_source)
 
     # Compute ttf
     factor = 100 / mp.rho_wood
@@ -125,5 +582,3 @@ def compute_fr(temp_c_out, rh_out):
     ttf = list(map(lambda y: 2 * np.exp(0.16*y),fmc))
 
     return rh_in, ttf
-
-
@@ -0,0 +1,80 @@
+import datetime
+from typing import NamedTuple
+
+import numpy as np
+
+import frcm.datamodel.model as dm
+import frcm.fireriskmodel.parameters as mp
+import frcm.fireriskmodel.compute as compute
+import frcm.fireriskmodel.preprocess as pp
+
+""" Probabilistic fire risk from weather scenarios and forecast ensemble members """
+
+# Every member (ensemble forecast) is combined with every perturbation, and all resulting scenarios are simulated
+# together as one (scenarios x timesteps) array by compute.compute_fr. The weather data is only preprocessed once per
+# member, perturbations are applied to the interpolated arrays.
+
+QUANTILES = (0.1, 0.5, 0.9)
+
+
+# change applied to the outdoor weather of a scenario - temperature offset ('C) and relative scaling of the rh,
+# e.g. Perturbation(temperature=2.0) or Perturbation(humidity=-0.1) for -10 % rh
+class Perturbation(NamedTuple):
+    temperature: float = 0.0
+    humidity: float = 0.0
+
+
+# computes per-hour quantiles of TTF over all combinations of ensemble members and perturbations of wd. Members are
+# alternative weather data for the same location (e.g., forecast ensemble members), and are interpolated onto the
+# time grid of wd. The unperturbed weather (Perturbation()) is always one of the perturbations, such that the
+# quantiles include the members as forecast - without members and perturbations the result only contains wd itself.
+# tabulated selects lookup table kernels for the forcing, see frcm.fireriskmodel.tables, and dtype the precision (see
+# compute.compute_fr).
+def compute_ensemble(wd: dm.WeatherData,
+                     perturbations: list[Perturbation] = None,
+                     members: list[dm.WeatherData] = None,
+                     quantiles=QUANTILES,
+                     backend: str = 'auto',
+                     tabulated: bool = False,
+                     dtype=np.float64) -> dm.FireRiskEnsemblePrediction:
+
+    perturbations = [Perturbation()] + [p for p in perturbations or [] if p != Perturbation()]
+    members = [wd] + list(members) if members else [wd]
+
+    start_time, end_time = pp.time_span(wd)
+
+    temp_members = []
+    humidity_members = []
+    wind_members = []
+
+    for member in members:
+        _, time_interpolated_sec, temp, humidity, wind, _ = pp.preprocess(member, start_time, end_time, dtype)
+        temp_members.append(temp)
+        humidity_members.append(humidity)
+        wind_members.append(wind)
+
+    temp_members = np.stack(temp_members)
+    humidity_members = np.stack(humidity_members)
+
+    # scenarios are ordered member-major, (members * perturbations) x timesteps
+    temp_offset = np.array([p.temperature for p in perturbations], dtype=dtype)
+    humidity_scale = 1 + np.array([p.humidity for p in perturbations], dtype=dtype)
+
+    temp_scenarios = (temp_members[:, None, :] + temp_offset[None, :, None]).reshape(-1, temp_members.shape[1])
+    humidity_scenarios = np.clip(humidity_members[:, None, :] * humidity_scale[None, :, None], 0, 100)
+    humidity_scenarios = humidity_scenarios.reshape(-1, humidity_members.shape[1])
+
+    _, ttf = compute.compute_fr(temp_scenarios, humidity_scenarios, backend=backend, tabulated=tabulated, dtype=dtype)
+
+    # Reduce data to once per hour
+    rf = int(3600 / mp.delta_t)
+    ttf_quantiles = np.quantile(ttf[:, ::rf], quantiles, axis=0).T
+    wind_speed_in_hour = np.mean(wind_members, axis=0)[::rf]
+
+    firerisks = [dm.FireRiskDistribution(timestamp=start_time + datetime.timedelta(seconds=sec), ttf=ttf_i, wind_speed=wind_i)
+                 for sec, ttf_i, wind_i in zip(time_interpolated_sec[::rf], ttf_quantiles.tolist(), wind_speed_in_hour.tolist())]
+
+    return dm.FireRiskEnsemblePrediction(location=wd.forecast.location,
+                                         scenarios=len(temp_scenarios),
+                                         quantiles=list(quantiles),
+                                         firerisks=firerisks)
@@ -0,0 +1,86 @@
+import numpy as np
+import numba
+
+import frcm.fireriskmodel.parameters as mp
+import frcm.fireriskmodel.kernels as kn
+
+""" JIT-compiled time-marching of the wall / indoor air model (requires the optional numba package) """
+
+
+@numba.njit(cache=True, nogil=True)
+def _march_kernel(cw_sat_in, decay, c_source, wall, rh_in_0, cw_in_0, c_wall_0, operator, k_flux, k_walls, rho_woods,
+                  surface, rh_in):
+    locations, steps = cw_sat_in.shape
+    layers = wall.shape[1]
+    wall_next = np.empty(layers)
+
+    for n in range(locations):
+        k_wall = k_walls[n]
+        rho_wood = rho_woods[n]
+        rhi = rh_in_0[n]
+        cw_in = cw_in_0[n]
+        c_wall = c_wall_0[n]
+        surf = 1.5 * wall[n, 0] - 0.5 * wall[n, 1]
+        x = surf / rho_wood
+        rh_wall = 0.0698 + x * (-1.258 + x * (125.35 + x * (-809.43 + x * 1583.8)))
+
+        surface[n, 0] = surf
+        rh_in[n, 0] = rhi
+
+        for i in range(steps - 1):
+            csat = cw_sat_in[n, i]
+            for k in range(layers):
+                value = 0.0
+                for m in range(max(k - 1, 0), min(k + 2, layers)):
+                    value += operator[k, m] * wall[n, m]
+                wall_next[k] = value
+            wall_next[0] += k_flux * (rhi - rh_wall) * csat
+            wall[n, :] = wall_next
+
+            cw_in = decay[n, i] * cw_in + c_source[n, i] + c_wall
+            c_wall = k_wall * (rh_wall - rhi) * csat
+            rhi = cw_in / cw_sat_in[n, i + 1]
+            surf = 1.5 * wall[n, 0] - 0.5 * wall[n, 1]
+            x = surf / rho_wood
+            rh_wall = 0.0698 + x * (-1.258 + x * (125.35 + x * (-809.43 + x * 1583.8)))
+
+            surface[n, i + 1] = surf
+            rh_in[n, i + 1] = rhi
+
+        rh_in_0[n] = rhi
+        cw_in_0[n] = cw_in
+        c_wall_0[n] = c_wall
+
+
+# same contract as kernels.march
+def march_jit(cw_sat_in, beta, c_source, state: kn.WallState = None, params=None):
+    single = np.ndim(cw_sat_in) == 1
+    dtype = kn.float_dtype(cw_sat_in)
+
+    cw_sat_in = np.atleast_2d(np.asarray(cw_sat_in, dtype=dtype))
+    decay = np.atleast_2d(1 - np.asarray(beta, dtype=dtype))
+    c_source = np.atleast_2d(np.asarray(c_source, dtype=dtype))
+    locations, steps = cw_sat_in.shape
+
+    if state is None:
+        state = kn.initial_state(cw_sat_in[:, 0], params=params)
+
+    # the kernel updates the state arrays in place
+    wall = np.array(np.broadcast_to(state.wall, (locations, mp.sub_layers)), dtype=dtype)
+    rh_in_0 = np.array(np.broadcast_to(state.rh_in, locations), dtype=dtype)
+    cw_in_0 = np.array(np.broadcast_to(state.cw_in, locations), dtype=dtype)
+    c_wall_0 = np.array(np.broadcast_to(state.c_wall, locations), dtype=dtype)
+
+    k_wall = np.array(np.broadcast_to(kn.parameter_values(params, 'k_wall'), locations), dtype=dtype)
+    rho_wood = np.array(np.broadcast_to(kn.parameter_values(params, 'rho_wood'), locations), dtype=dtype)
+
+    surface = np.empty((locations, steps), dtype=dtype)
+    rh_in = np.empty((locations, steps), dtype=dtype)
+
+    _march_kernel(cw_sat_in, decay, c_source, wall, rh_in_0, cw_in_0, c_wall_0, kn.wall_operator().astype(dtype),
+                  kn.flux_coefficient(), k_wall, rho_wood, surface, rh_in)
+
+    if single:
+        return surface[0], rh_in[0], kn.WallState(wall=wall[0], rh_in=rh_in_0[0], cw_in=cw_in_0[0], c_wall=c_wall_0[0])
+
+    return surface, rh_in, kn.WallState(wall=wall, rh_in=rh_in_0, cw_in=cw_in_0, c_wall=c_wall_0)
@@ -0,0 +1,241 @@
+from typing import NamedTuple
+
+import numpy as np
+
+import frcm.fireriskmodel.parameters as mp
+
+"""Array-level versions of the functions in frcm.fireriskmodel.utils"""
+""" All functions accept numpy arrays (or scalars) and evaluate element-wise """
+
+
+# saturation vapor pressure at temperature Temp_c (celsius)
+def calc_pwsat(temp_c):
+    return 610.78 * np.exp((17.2694 * temp_c) / (temp_c + 238.3))
+
+
+# saturation water concentration based on saturated vapor pressure (pwsat)
+def calc_cwsat(pwsat, temp_c):
+    return (pwsat * mp.mol_weight) / (mp.gas_constant * (temp_c + 273.15))
+
+
+# actual water concentration in air
+def calc_cw(rh, cwsat):
+    return rh / 100 * cwsat
+
+
+# fmc from indoor rh (equilibrium state) rh must be given as a fraction, e.g., 0.35
+def calc_fmc(rh):
+    return 0.0017 + rh * (0.2524 + rh * (-0.1986 + rh * (0.0279 + rh * 0.167)))
+
+
+# air change per hour (ach)
+def calc_ach(temp_c_out, temp_c_in, gamma=mp.gamma):
+    temp_k_out = temp_c_out + 273.15
+    temp_k_in = temp_c_in + 273.15
+    return gamma * np.sqrt(np.abs(1 / temp_k_out - 1 / temp_k_in) / temp_k_out)
+
+
+# beta ventilation factor
+def calc_beta(c_ach):
+    return 1 - np.exp((-c_ach * mp.delta_t) / 3600)
+
+
+# relative humidity at wooden panel surfaces from surface fmc
+def calc_rhwall(cfmc, rho_wood=mp.rho_wood):
+    x = cfmc / rho_wood
+    return 0.0698 + x * (-1.258 + x * (125.35 + x * (-809.43 + x * 1583.8)))
+
+
+def calc_csupply(sup, vol=mp.Vol):
+    return sup / vol
+
+
+def calc_cac(beta, cw_out, temp_c_out, temp_c_in):
+    return beta * cw_out * ((temp_c_out + 273.15) / (temp_c_in + 273.15))
+
+
+# time to flashover (minutes) from wooden surface fmc, ttf_exponent of the parameter set (see ParameterSet)
+def calc_ttf(surface, ttf_exponent=None):
+    if ttf_exponent is None:
+        ttf_exponent = mp.DEFAULT_PARAMETERS.ttf_exponent
+    return 2 * np.exp(ttf_exponent * surface)
+
+
+""" Wooden panel humidity transport as a linear stencil operator """
+
+
+# matrix advancing the fmc of all wall layers by one timestep (excluding the moisture flux into layer 1)
+# layer 1 exchanges with layer 2 only, layers 2 to N-1 use second order central difference and layer N
+# (panel backside) exchanges with layer N-1 only
+def wall_operator(sub_layers=mp.sub_layers):
+    fourier_1 = (mp.delta_t / mp.delta_x) * (mp.D_w_s / mp.delta_x)
+
+    operator = np.zeros((sub_layers, sub_layers))
+    idx = np.arange(1, sub_layers - 1)
+    operator[idx, idx] = 1 - 2 * mp.fourier
+    operator[idx, idx - 1] = mp.fourier
+    operator[idx, idx + 1] = mp.fourier
+    operator[0, 0] = 1 - fourier_1
+    operator[0, 1] = fourier_1
+    operator[-1, -1] = 1 - mp.fourier
+    operator[-1, -2] = mp.fourier
+
+    return operator
+
+
+# moisture flux from bulk air into layer 1 per unit (rh_in - rh_wall) * cw_sat_in
+def flux_coefficient():
+    return (mp.delta_t / mp.delta_x) * (mp.D_W_a / mp.boundary_layer)
+
+
+# contribution to indoor water concentration per unit (rh_wall - rh_in) * cw_sat_in
+def wall_coefficient():
+    return (mp.A_ex * mp.D_W_a * mp.delta_t / mp.boundary_layer) / mp.Vol
+
+
+# parameter values of a parameter set, or arrays with one value per location for a list of parameter sets
+def parameter_values(params, name):
+    if params is None:
+        params = mp.DEFAULT_PARAMETERS
+    if isinstance(params, mp.ParameterSet):
+        return getattr(params, name)
+    return np.array([getattr(p, name) for p in params], dtype=float)
+
+
+# state of the wall / indoor air model at a timestep - wall layer fmc, indoor rh and water concentration, and the
+# (lagging) water concentration contribution from the wooden surfaces. For several locations the wall has shape
+# (locations, sub_layers) and the remaining fields have shape (locations,)
+class WallState(NamedTuple):
+    wall: np.ndarray
+    rh_in: float
+    cw_in: float
+    c_wall: float
+
+
+# dtype of the simulation for an input array - float32 inputs are simulated in single precision (see
+# compute.compute_fr), anything else in double precision
+def float_dtype(array):
+    return np.float32 if np.asarray(array).dtype == np.float32 else np.float64
+
+
+# initial state from an (equilibrium) indoor rh guess, by default RH_in of the parameter set(s)
+def initial_state(cw_sat_in_0, rh_in=None, params=None):
+    cw_sat_in_0 = np.asarray(cw_sat_in_0, dtype=float)
+    rho_wood = parameter_values(params, 'rho_wood')
+    if rh_in is None:
+        rh_in = parameter_values(params, 'RH_in')
+    rh_in = np.array(np.broadcast_to(rh_in, np.shape(cw_sat_in_0)), dtype=float)
+    wall = np.repeat((calc_fmc(rh_in) * rho_wood)[..., None], mp.sub_layers, axis=-1)
+    surf = 1.5 * wall[..., 0] - 0.5 * wall[..., 1]
+    rh_wall = calc_rhwall(surf, rho_wood)
+    cw_in = rh_in * cw_sat_in_0
+    c_wall = parameter_values(params, 'k_wall') * (rh_wall - rh_in) * cw_sat_in_0
+    return WallState(wall=wall, rh_in=rh_in, cw_in=cw_in, c_wall=c_wall)
+
+
+# time-marching of the coupled wall / indoor air model. Inputs are per timestep vectors of the indoor saturation
+# water concentration, the ventilation factor beta and the water sources to indoor air (air change + supply).
+# Returns the wooden surface fmc and indoor rh for every timestep, and the state at the last timestep. Marching
+# continues from state if given, otherwise from the initial RH_in guess. Inputs of shape (locations, timesteps) are
+# marched together, one vectorized update per timestep for all locations. params is the parameter set of the
+# enclosure, or a list with one parameter set per location (default is mp.DEFAULT_PARAMETERS). Results have the
+# precision of cw_sat_in (see float_dtype).
+def march(cw_sat_in, beta, c_source, state: WallState = None, params=None):
+    if np.ndim(cw_sat_in) == 2:
+        return march_many(cw_sat_in, beta, c_source, state, params)
+
+    steps = len(cw_sat_in)
+    dtype = float_dtype(cw_sat_in)
+
+    operator = wall_operator()
+    k_flux = flux_coefficient()
+    k_wall = float(parameter_values(params, 'k_wall'))
+    rho_wood = float(parameter_values(params, 'rho_wood'))
+
+    # the recurrence is sequential, scalars are stepped as python floats
+    cw_sat_in = np.asarray(cw_sat_in, dtype=float).tolist()
+    decay = (1 - np.asarray(beta, dtype=float)).tolist()
+    c_source = np.asarray(c_source, dtype=float).tolist()
+
+    surface = np.empty(steps, dtype=dtype)
+    rh_in = np.empty(steps, dtype=dtype)
+
+    # initial conditions
+    if state is None:
+        state = initial_state(cw_sat_in[0], params=params)
+    wall = np.array(state.wall, dtype=float)
+    surf = 1.5 * float(wall[0]) - 0.5 * float(wall[1])
+    rh_wall = calc_rhwall(surf, rho_wood)
+    rhi = float(state.rh_in)
+    cw_in = float(state.cw_in)
+    c_wall = float(state.c_wall)
+
+    surface[0] = surf
+    rh_in[0] = rhi
+
+    for i in range(steps - 1):
+        csat = cw_sat_in[i]
+        # advance all wall layers, and add moisture exchange with bulk air to layer 1
+        wall = operator @ wall
+        wall[0] += k_flux * (rhi - rh_wall) * csat
+        # update indoor water concentration and rh (wall contribution lags one timestep)
+        cw_in = decay[i] * cw_in + c_source[i] + c_wall
+        c_wall = k_wall * (rh_wall - rhi) * csat
+        rhi = cw_in / cw_sat_in[i + 1]
+        # extrapolate fmc to the surface and update rh in the boundary layer
+        surf = 1.5 * float(wall[0]) - 0.5 * float(wall[1])
+        rh_wall = calc_rhwall(surf, rho_wood)
+
+        surface[i + 1] = surf
+        rh_in[i + 1] = rhi
+
+    return surface, rh_in, WallState(wall=wall, rh_in=rhi, cw_in=cw_in, c_wall=c_wall)
+
+
+# time-marching of several independent wall / indoor air models (one per row of the inputs)
+def march_many(cw_sat_in, beta, c_source, state: WallState = None, params=None):
+    locations, steps = np.shape(cw_sat_in)
+    dtype = float_dtype(cw_sat_in)
+
+    # wall @ operator_t advances all rows at once
+    operator_t = wall_operator().T.astype(dtype)
+    k_flux = flux_coefficient()
+    k_wall = np.asarray(parameter_values(params, 'k_wall'), dtype=dtype)
+    rho_wood = np.asarray(parameter_values(params, 'rho_wood'), dtype=dtype)
+
+    # timestep-major layout so that each step reads contiguous rows
+    cw_sat_in = np.ascontiguousarray(np.transpose(cw_sat_in), dtype=dtype)
+    decay = np.ascontiguousarray(np.transpose(1 - np.asarray(beta, dtype=dtype)))
+    c_source = np.ascontiguousarray(np.transpose(c_source), dtype=dtype)
+
+    surface = np.empty((steps, locations), dtype=dtype)
+    rh_in = np.empty((steps, locations), dtype=dtype)
+
+    # initial conditions
+    if state is None:
+        state = initial_state(cw_sat_in[0], params=params)
+    wall = np.array(np.broadcast_to(state.wall, (locations, mp.sub_layers)), dtype=dtype)
+    surf = 1.5 * wall[:, 0] - 0.5 * wall[:, 1]
+    rh_wall = calc_rhwall(surf, rho_wood)
+    rhi = np.array(np.broadcast_to(state.rh_in, locations), dtype=dtype)
+    cw_in = np.array(np.broadcast_to(state.cw_in, locations), dtype=dtype)
+    c_wall = np.array(np.broadcast_to(state.c_wall, locations), dtype=dtype)
+
+    surface[0] = surf
+    rh_in[0] = rhi
+
+    for i in range(steps - 1):
+        csat = cw_sat_in[i]
+        diff = rh_wall - rhi
+        wall = wall @ operator_t
+        wall[:, 0] -= k_flux * diff * csat
+        cw_in = decay[i] * cw_in + c_source[i] + c_wall
+        c_wall = k_wall * diff * csat
+        rhi = cw_in / cw_sat_in[i + 1]
+        surf = 1.5 * wall[:, 0] - 0.5 * wall[:, 1]
+        rh_wall = calc_rhwall(surf, rho_wood)
+
+        surface[i + 1] = surf
+        rh_in[i + 1] = rhi
+
+    return surface.T, rh_in.T, WallState(wall=wall, rh_in=rhi, cw_in=cw_in, c_wall=c_wall)
@@ -1,3 +1,5 @@
+from dataclasses import dataclass, field
+
 # General modelling parameters
 
 panel_thickness = 0.012                 # m - panel thickness
@@ -26,3 +28,33 @@ supply_24h = 1          # Kg/24 hour - supplied water vapor from cooking, respir
 rho_wood = 500          # kg/m^3 - density of wood (constant)
 gamma = 380             # Ventilation constant
 
+
+# Immutable set of the model specific parameters of an enclosure (building archetype), with the derived constants
+# used by the time-marching precomputed. Defaults are the generic enclosure above. Parameters sets with other values
+# are made with dataclasses.replace, e.g., replace(DEFAULT_PARAMETERS, Vol=200). The general modelling parameters
+# (sub layers, timestep and diffusion) are shared by all parameter sets.
+@dataclass(frozen=True)
+class ParameterSet:
+    T_c_in: float = T_c_in
+    RH_in: float = RH_in
+    A_ex: float = A_ex
+    Vol: float = Vol
+    supply_24h: float = supply_24h
+    rho_wood: float = rho_wood
+    gamma: float = gamma
+
+    # derived constants
+    k_wall: float = field(init=False)           # indoor water concentration per unit (rh_wall - rh_in) * cw_sat_in
+    c_supply: float = field(init=False)         # supplied water concentration per timestep
+    ttf_exponent: float = field(init=False)     # ttf = 2 * exp(ttf_exponent * surface fmc)
+
+    def __post_init__(self):
+        if self.Vol <= 0 or self.rho_wood <= 0 or self.A_ex < 0:
+            raise ValueError(f"Invalid parameter set, Vol and rho_wood must be positive and A_ex non-negative: Vol={self.Vol}, rho_wood={self.rho_wood}, A_ex={self.A_ex}")
+
+        object.__setattr__(self, 'k_wall', (self.A_ex * D_W_a * delta_t / boundary_layer) / self.Vol)
+        object.__setattr__(self, 'c_supply', (self.supply_24h / (24 * 3600)) * delta_t / self.Vol)
+        object.__setattr__(self, 'ttf_exponent', 0.16 * (100 / self.rho_wood))
+
+
+DEFAULT_PARAMETERS = ParameterSet()
@@ -0,0 +1,73 @@
+import argparse
+from typing import NamedTuple
+
+import numpy as np
+
+import frcm.datamodel.model as dm
+import frcm.fireriskmodel.compute as compute
+import frcm.fireriskmodel.preprocess as pp
+
+""" Comparison of single precision (float32) fire risk computations against double precision """
+
+# Run on weather data files (WeatherData as JSON, e.g. from WeatherData.to_json) with:
+# python -m frcm.fireriskmodel.precision wd1.json wd2.json ... [--backend numpy]
+
+
+class PrecisionReport(NamedTuple):
+    locations: int
+    hours: int
+    max_abs_error: float            # minutes - maximum ttf deviation from double precision
+    max_rel_error: float            # maximum relative ttf deviation from double precision
+    bytes_float64: int              # measured size of the (locations x timesteps) simulation arrays
+    bytes_float32: int
+
+
+# computes wds in double and single precision on their shared time grid (as compute.compute_many) and reports the
+# maximum hourly ttf deviation and the nbytes of the simulation inputs (temperature, humidity) and outputs (RH_in, ttf)
+def compare_precision(wds: list[dm.WeatherData], backend: str = 'auto') -> PrecisionReport:
+
+    spans = [pp.time_span(wd) for wd in wds]
+    start_time = max(span[0] for span in spans)
+    end_time = min(span[1] for span in spans)
+
+    rf = int(3600 / compute.mp.delta_t)
+    ttf, nbytes = {}, {}
+    for dtype in (np.float64, np.float32):
+        columns = [pp.preprocess(wd, start_time, end_time, dtype) for wd in wds]
+        temp = np.stack([column[2] for column in columns])
+        humidity = np.stack([column[3] for column in columns])
+        rh_in, ttf_all = compute.compute_fr(temp, humidity, backend=backend, dtype=dtype)
+
+        ttf[dtype] = ttf_all[:, ::rf].astype(np.float64)
+        nbytes[dtype] = temp.nbytes + humidity.nbytes + rh_in.nbytes + ttf_all.nbytes
+
+    error = np.abs(ttf[np.float32] - ttf[np.float64])
+
+    return PrecisionReport(locations=len(wds),
+                           hours=ttf[np.float64].shape[1],
+                           max_abs_error=float(error.max(initial=0.0)),
+                           max_rel_error=float((error / ttf[np.float64]).max(initial=0.0)),
+                           bytes_float64=nbytes[np.float64],
+                           bytes_float32=nbytes[np.float32])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Maximum TTF deviation of single precision from double precision')
+    parser.add_argument('files', nargs='+', help='weather data (WeatherData JSON) files')
+    parser.add_argument('--backend', default='auto')
+    args = parser.parse_args()
+
+    wds = []
+    for name in args.files:
+        with open(name) as file:
+            wds.append(dm.WeatherData.model_validate_json(file.read()))
+
+    report = compare_precision(wds, args.backend)
+
+    print(f'locations: {report.locations}, hours: {report.hours}')
+    print(f'max ttf deviation: {report.max_abs_error:.3g} min ({report.max_rel_error:.3g} relative)')
+    print(f'simulation arrays: {report.bytes_float64} bytes (float64), {report.bytes_float32} bytes (float32)')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,24 +1,10 @@
 from frcm.datamodel.model import *
+from frcm.datamodel.series import WeatherSeries
 from frcm.fireriskmodel.parameters import delta_t
+import frcm.fireriskmodel.quality as qc
 import numpy as np
 
 
-def combine_obs_fct(sorted_data_obs, sorted_data_fct, parameter):
-    obs = [getattr(obj, parameter) for obj in sorted_data_obs]
-    fct = [getattr(obj, parameter) for obj in sorted_data_fct]
-    combined = obs + fct
-    return combined
-
-
-def clean_nan(data_vector, time_vector):
-    # Treat Data
-    nan_indices = np.where(np.isnan(data_vector))
-    data_cleaned = np.delete(data_vector, nan_indices)
-    # Treat associated time_vector
-    time_cleaned = np.delete(time_vector, nan_indices)
-    return data_cleaned, time_cleaned
-
-
 def find_data_gap(*args): # np.array
     max_delta = []
     for arr in args:
@@ -27,40 +13,86 @@ def find_data_gap(*args): # np.array
     return np.max(max_delta)
 
 
-def preprocess(wd: WeatherData):
+# observations and forecast as one series, sorted by time. Where observations and forecast overlap (same timestamp),
+# the observation is used.
+def combined_series(wd: WeatherData) -> WeatherSeries:
+    return WeatherSeries.concat(wd.observations.series, wd.forecast.series).sorted_unique()
+
+
+# first and last timestamp of the combined observations and forecast
+def time_span(wd: WeatherData):
+    series = WeatherSeries.concat(wd.observations.series, wd.forecast.series)
+    return series.first(), series.last()
+
+
+# interpolation of the combined observations and forecast onto the timesteps (every delta_t seconds from start_time)
+# of the simulation. Any range of timesteps can be interpolated on its own, using only the data points around it, such
+# that long periods can be simulated block by block without holding the full interpolated vectors (see
+# compute.compute_stream). start_time and end_time are as for preprocess.
+class Interpolator:
+
+    def __init__(self, wd: WeatherData, start_time=None, end_time=None, dtype=np.float64):
+
+        combined = WeatherSeries.concat(wd.observations.series, wd.forecast.series)
+        self.series = combined.sorted_unique()
+        self.dtype = dtype
+
+        # size and order of the data as given, for the quality report
+        self.given_points = len(combined)
+        self.given_sorted = qc.is_sorted(combined)
+
+        # Get start of computation as datetime
+        self.start_time = self.series.first() if start_time is None else start_time
+        # Seconds of each timestamp relative to start
+        self.timestamp_vector_sec = np.round(self.series.seconds(self.start_time))
+        self.end_time_sec = int(self.timestamp_vector_sec[-1]) if end_time is None else round((end_time - self.start_time).total_seconds())
+
+        # number of timesteps
+        self.steps = self.end_time_sec // delta_t + 1
+
+        # np.nan values are left out of the interpolation of each parameter
+        self.points = {}
+        for name in ('temperature', 'humidity', 'wind_speed'):
+            values = getattr(self.series, name)
+            valid = ~np.isnan(values)
+            self.points[name] = (self.timestamp_vector_sec, values) if valid.all() else (self.timestamp_vector_sec[valid], values[valid])
+
+    # quality report of the weather data (see frcm.fireriskmodel.quality), from the series as sorted for interpolation
+    def quality(self, max_gap=qc.MAX_GAP, max_nan_fraction: float = qc.MAX_NAN_FRACTION) -> QualityReport:
+        return qc.check_sorted(self.series, self.given_points, self.given_sorted, max_gap, max_nan_fraction)
+
+    # largest gap (seconds) in the data, currently only considering temperature and humidity
+    def max_time_delta(self):
+        return find_data_gap(self.points['temperature'][0], self.points['humidity'][0])
+
+    # temperature, humidity and wind speed interpolated at timesteps first to last (inclusive)
+    def interpolate(self, first: int, last: int):
+
+        time_sec = np.arange(first, last + 1) * delta_t
 
-    # Should not be necessary, but data is initially sorted according to the timestamps
-    sorted_data_obs = sorted(wd.observations.data, key=lambda x: x.timestamp)
-    sorted_data_fct = sorted(wd.forecast.data, key=lambda x: x.timestamp)
+        def interpolate(name):
+            timestamps, values = self.points[name]
+            # the data points from the last one before the first timestep to the first one after the last timestep
+            i = max(int(np.searchsorted(timestamps, time_sec[0], side='right')) - 1, 0) if len(time_sec) > 0 else 0
+            j = int(np.searchsorted(timestamps, time_sec[-1], side='left')) + 1 if len(time_sec) > 0 else 0
+            return np.interp(time_sec, timestamps[i:j], values[i:j]).astype(self.dtype, copy=False)
 
-    # Combine data
-    timestamp_vector = combine_obs_fct(sorted_data_obs, sorted_data_fct, 'timestamp')
-    temp_vector = combine_obs_fct(sorted_data_obs, sorted_data_fct, 'temperature')
-    humidity_vector = combine_obs_fct(sorted_data_obs, sorted_data_fct, 'humidity')
-    wind_vector = combine_obs_fct(sorted_data_obs, sorted_data_fct, 'wind_speed')
+        return interpolate('temperature'), interpolate('humidity'), interpolate('wind_speed')
 
-    # Convert timestamp vector to a vector containing delta time of adjacent elements in seconds, starting at 0.
-    timestamp_vector_sec = [round((timestamp - timestamp_vector[0]).total_seconds()) for timestamp in timestamp_vector]
-    # Get start of computation as datetime
-    start_time = timestamp_vector[0]
+    # all timesteps, as returned by preprocess
+    def preprocess(self):
 
-    # Identify position of np.nan values and remove from "parameter"_vector and associated "parameter"_timevector
-    # Resulting vectors are used in the np interpolation function (np.interp)
-    temp_clean, time_temp_clean = clean_nan(data_vector=temp_vector, time_vector=timestamp_vector_sec)
-    humidity_clean, time_humidity_clean = clean_nan(data_vector=humidity_vector, time_vector=timestamp_vector_sec)
-    wind_clean, time_wind_clean = clean_nan(data_vector=wind_vector, time_vector=timestamp_vector_sec)
+        # Interpolation time vector in seconds. This vector contains all the datapoints for which the np.interp-
+        # function shall provide interpolated values.
+        interpolation_timevector_sec = list(range(0, self.end_time_sec + 1, delta_t))
 
-    # Create interpolation time vector in seconds. This vector contains all the datapoints for which the np.interp-
-    # function shall provide interpolated values.
-    interpolation_timevector_sec = [i for i in range(timestamp_vector_sec[0], timestamp_vector_sec[-1] + 1, delta_t)]
+        temp_interpolated, humidity_interpolated, wind_interpolated = self.interpolate(0, self.steps - 1)
 
-    # Find largest gap in data. Currently only considering temperature and humidity. Delta is given in seconds.
-    max_time_delta = find_data_gap(time_temp_clean, time_humidity_clean)
+        return self.start_time, interpolation_timevector_sec, temp_interpolated, humidity_interpolated, wind_interpolated, self.max_time_delta()
 
-    # Interpolate all data
-    temp_interpolated = np.interp(interpolation_timevector_sec, time_temp_clean, temp_clean)
-    humidity_interpolated = np.interp(interpolation_timevector_sec, time_humidity_clean, humidity_clean)
-    wind_interpolated = np.interp(interpolation_timevector_sec, time_wind_clean, wind_clean)
 
-    return start_time, interpolation_timevector_sec, temp_interpolated, humidity_interpolated, wind_interpolated, max_time_delta
+# start_time/end_time can be given to interpolate onto a grid shared with other weather data. By default the grid
+# spans the timestamps of wd. dtype is the precision of the interpolated vectors.
+def preprocess(wd: WeatherData, start_time=None, end_time=None, dtype=np.float64):
+    return Interpolator(wd, start_time, end_time, dtype).preprocess()
 
@@ -0,0 +1,81 @@
+import datetime
+
+import numpy as np
+
+import frcm.datamodel.model as dm
+from frcm.datamodel.series import WeatherSeries
+
+""" Quality checks of weather data before it is simulated """
+
+# The checks run on the columns of the combined observations and forecast: order and duplicated timestamps, the
+# fraction of missing (nan) values and values outside VALID_RANGES per parameter, and gaps between data points with
+# both temperature and humidity. Weather data passes if it has at least two such data points, no values out of
+# range, at most MAX_NAN_FRACTION missing temperature and humidity, and no gap longer than MAX_GAP.
+#
+# Order and duplicates are only reported - preprocessing sorts the data and prefers observations over forecasts at
+# the same timestamp.
+
+VALID_RANGES = {'temperature': (-60.0, 60.0),      # 'C
+                'humidity': (0.0, 100.0),          # %
+                'wind_speed': (0.0, 75.0)}         # m/s
+
+MAX_GAP = datetime.timedelta(hours=6)
+MAX_NAN_FRACTION = 0.2
+
+
+class QualityError(ValueError):
+
+    def __init__(self, report: dm.QualityReport):
+        super().__init__(f'Weather data failed the quality checks: {report}')
+        self.report = report
+
+
+def is_sorted(series: WeatherSeries) -> bool:
+    return bool(np.all(np.diff(series.timestamps) >= np.timedelta64(0)))
+
+
+def check(series: WeatherSeries, max_gap: datetime.timedelta = MAX_GAP,
+          max_nan_fraction: float = MAX_NAN_FRACTION) -> dm.QualityReport:
+    return check_sorted(series.sorted_unique(), len(series), is_sorted(series), max_gap, max_nan_fraction)
+
+
+# as check, for the series as simulated (sorted, without duplicated timestamps) of points data points as given - the
+# series is then not sorted again (see preprocess.Interpolator.quality)
+def check_sorted(series: WeatherSeries, points: int, is_sorted: bool, max_gap: datetime.timedelta = MAX_GAP,
+                 max_nan_fraction: float = MAX_NAN_FRACTION) -> dm.QualityReport:
+
+    duplicates = points - len(series)
+
+    nan_fraction = {}
+    out_of_range = {}
+    for name, (low, high) in VALID_RANGES.items():
+        values = getattr(series, name)
+        nan = np.isnan(values)
+        nan_fraction[name] = float(nan.mean()) if len(values) > 0 else 0.0
+        # nan compares false, only valid values out of range are counted
+        out_of_range[name] = int(np.count_nonzero((values < low) | (values > high)))
+
+    # gaps between data points with both temperature and humidity
+    timestamps = series.timestamps[~(np.isnan(series.temperature) | np.isnan(series.humidity))]
+    gap = np.diff(timestamps)
+    long = np.flatnonzero(gap > np.timedelta64(max_gap))
+    gaps = [dm.DataGap(start=series.to_datetime(timestamps[i]), end=series.to_datetime(timestamps[i + 1])) for i in long.tolist()]
+    max_gap_sec = float(gap.max() / np.timedelta64(1, 's')) if len(gap) > 0 else 0.0
+
+    passed = (len(timestamps) >= 2 and not any(out_of_range.values()) and len(gaps) == 0 and
+              nan_fraction['temperature'] <= max_nan_fraction and nan_fraction['humidity'] <= max_nan_fraction)
+
+    return dm.QualityReport(points=points, is_sorted=is_sorted, duplicates=duplicates, nan_fraction=nan_fraction,
+                            out_of_range=out_of_range, max_gap=max_gap_sec, gaps=gaps, passed=passed)
+
+
+# the observations and the forecast are checked as one series, in this order
+def check_weatherdata(wd: dm.WeatherData, max_gap: datetime.timedelta = MAX_GAP,
+                      max_nan_fraction: float = MAX_NAN_FRACTION) -> dm.QualityReport:
+    return check(WeatherSeries.concat(wd.observations.series, wd.forecast.series), max_gap, max_nan_fraction)
+
+
+def require(report: dm.QualityReport) -> dm.QualityReport:
+    if not report.passed:
+        raise QualityError(report)
+    return report
@@ -0,0 +1,105 @@
+import datetime
+import threading
+
+import numpy as np
+
+import frcm.datamodel.model as dm
+import frcm.fireriskmodel.parameters as mp
+import frcm.fireriskmodel.kernels as kn
+import frcm.fireriskmodel.backends as bk
+import frcm.fireriskmodel.compute as compute
+import frcm.fireriskmodel.preprocess as pp
+
+""" Selection of the spin-up window - how long observations are needed before the current time """
+
+# The model starts from a guess of the indoor rh (mp.RH_in) and needs observations some time into the past for the
+# wall to forget this guess. A spin-up window is long enough when the wall / indoor air model started at the
+# beginning of the window from two initial conditions bracketing the guess (RH_IN_LOW and RH_IN_HIGH) gives surface
+# fmc (as a fraction) within TOLERANCE from the end of the window (the last observation) to the end of the weather
+# data. As the model preserves the order of initial conditions, a start from the guess (or any other initial rh
+# in the bracket) is then also within TOLERANCE of both.
+#
+# The wall has a memory of several days, the shortest sufficient window depends on the weather and is selected from
+# WINDOWS. Selected windows are cached per observation station and season (see SpinupCache).
+
+RH_IN_LOW = mp.RH_in - 0.1
+RH_IN_HIGH = mp.RH_in + 0.1
+TOLERANCE = 0.01
+
+WINDOWS = tuple(datetime.timedelta(hours=hours) for hours in (12, 24, 48, 72, 96, 144, 192))
+
+SEASONS = {12: 'DJF', 1: 'DJF', 2: 'DJF', 3: 'MAM', 4: 'MAM', 5: 'MAM',
+           6: 'JJA', 7: 'JJA', 8: 'JJA', 9: 'SON', 10: 'SON', 11: 'SON'}
+
+
+# meteorological season of a timestamp
+def season(timestamp: datetime.datetime) -> str:
+    return SEASONS[timestamp.month]
+
+
+# largest difference in surface fmc between the two initial conditions, from the end of the window (the last
+# observation) to the end of the weather data, when the model is started at window_start (by default at the start
+# of the weather data)
+def spinup_difference(wd: dm.WeatherData, window_start: datetime.datetime = None,
+                      rh_in_low: float = RH_IN_LOW, rh_in_high: float = RH_IN_HIGH, backend: str = 'auto') -> float:
+
+    start_time, time_interpolated_sec, temp_interpolated, humidity_interpolated, wind_interpolated, max_time_delta = pp.preprocess(wd, window_start)
+
+    # the two initial conditions are marched together as two rows
+    temp = np.stack([temp_interpolated, temp_interpolated])
+    humidity = np.stack([humidity_interpolated, humidity_interpolated])
+    cw_sat_in, beta, c_source = compute.compute_forcing(temp, humidity)
+    state = kn.initial_state(cw_sat_in[:, 0], rh_in=np.array([rh_in_low, rh_in_high]))
+
+    surface, _, _ = bk.march(cw_sat_in, beta, c_source, state, backend)
+
+    last_obs = wd.observations.series.last() if len(wd.observations.series) > 0 else start_time
+    k = int(np.clip((last_obs - start_time).total_seconds() // mp.delta_t, 0, len(time_interpolated_sec) - 1))
+
+    return float(np.max(np.abs(surface[0, k:] - surface[1, k:]))) / mp.rho_wood
+
+
+def converged(wd: dm.WeatherData, window_start: datetime.datetime = None, tolerance: float = TOLERANCE) -> bool:
+    return spinup_difference(wd, window_start) <= tolerance
+
+
+# shortest of the windows (before the last observation) that converges for wd, which must contain observations
+# for the longest window. The longest window if none converges. The spin-up difference decreases with the length of
+# the window, so the windows are bisected - about log2(len(windows)) simulations instead of one per window.
+def select_window(wd: dm.WeatherData, windows=WINDOWS, tolerance: float = TOLERANCE) -> datetime.timedelta:
+
+    last_obs = wd.observations.series.last()
+
+    low, high = 0, len(windows) - 1
+    while low < high:
+        middle = (low + high) // 2
+        if converged(wd, last_obs - windows[middle], tolerance):
+            high = middle
+        else:
+            low = middle + 1
+
+    return windows[low]
+
+
+# selected spin-up windows per observation station and season, and the observation station of each location for
+# which a window was selected (such that the window is known before the observations are fetched)
+class SpinupCache:
+
+    def __init__(self):
+        self._windows = {}
+        self._stations = {}
+        self._lock = threading.Lock()
+
+    def get(self, station: str, timestamp: datetime.datetime) -> datetime.timedelta | None:
+        with self._lock:
+            return self._windows.get((station, season(timestamp)))
+
+    def put(self, station: str, timestamp: datetime.datetime, window: datetime.timedelta, location: dm.Location = None):
+        with self._lock:
+            self._windows[(station, season(timestamp))] = window
+            if location is not None:
+                self._stations[(location.latitude, location.longitude)] = station
+
+    def station(self, location: dm.Location) -> str | None:
+        with self._lock:
+            return self._stations.get((location.latitude, location.longitude))
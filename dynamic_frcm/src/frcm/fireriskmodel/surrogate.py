@@ -0,0 +1,248 @@
+import argparse
+import datetime
+import json
+from typing import NamedTuple
+
+import numpy as np
+
+import frcm.datamodel.model as dm
+import frcm.fireriskmodel.parameters as mp
+import frcm.fireriskmodel.kernels as kn
+import frcm.fireriskmodel.compute as compute
+import frcm.fireriskmodel.preprocess as pp
+
+""" Surrogate model of TTF for screening large grids, with exact fallback near a threshold """
+
+# The surrogate is a reduced-order version of the wall / indoor air model - hourly timesteps, LAYERS wall layers and
+# indoor air solved implicitly against the wall (the explicit coupling is unstable at hourly steps) - followed by a
+# linear correction of log(ttf) fitted on exact simulations (calibrate). It is about 4 times faster than the exact
+# model with the numpy backend (2 - 3 times with numba) and is only valid for the default parameter set.
+#
+# Error envelope: the relative ttf error of the surrogate against compute_fr on independent validation weather
+# (calibration_weather, mean temperatures -10 to 20 'C and mean rh 45 to 85 %) is at most SurrogateModel.max_error,
+# and SurrogateModel.p99_error for 99 % of the hours. The hybrid mode (compute_hybrid) re-runs the exact model for
+# all locations where the surrogate ttf comes within a relative margin (by default max_error) of the threshold or
+# crosses it, such that every location whose exact ttf crosses the threshold is computed exactly.
+#
+# Recalibrate with: python -m frcm.fireriskmodel.surrogate [--locations N] [--days D] [--output model.json]
+
+LAYERS = 5
+STEP = 3600                 # seconds - surrogate timestep
+
+
+class SurrogateModel(NamedTuple):
+    coefficients: tuple     # log(ttf / 2) per feature, see _features
+    max_error: float        # maximum relative ttf error on validation weather
+    p99_error: float        # 99th percentile of the relative ttf error
+
+    def to_json(self) -> str:
+        return json.dumps(self._asdict())
+
+    @staticmethod
+    def from_json(text: str):
+        values = json.loads(text)
+        return SurrogateModel(coefficients=tuple(values['coefficients']), max_error=values['max_error'], p99_error=values['p99_error'])
+
+
+# calibrate(locations=400, days=40, seed=0)
+DEFAULT_SURROGATE = SurrogateModel(coefficients=(7.35280145374037, 11.987683413728945, -0.08233652741440976,
+                                                 -2.722495838361389, -0.015186342520965113),
+                                   max_error=0.1077,
+                                   p99_error=0.0165)
+
+
+# reduced-order march on hourly outdoor temperature and rh of shape (locations, hours), returns the features of
+# each hour - surface fmc, surface fmc of the next hour, indoor rh, fmc of wall layer 2 and a constant
+def _features(temp_c_out, rh_out):
+
+    temp_c_out = np.atleast_2d(np.asarray(temp_c_out, dtype=float))
+    rh_out = np.atleast_2d(np.asarray(rh_out, dtype=float))
+    locations, hours = temp_c_out.shape
+
+    delta_x = mp.panel_thickness / LAYERS
+    fourier = STEP * mp.D_w_s / delta_x ** 2
+    operator = np.zeros((LAYERS, LAYERS))
+    idx = np.arange(1, LAYERS - 1)
+    operator[idx, idx] = 1 - 2 * fourier
+    operator[idx, idx - 1] = fourier
+    operator[idx, idx + 1] = fourier
+    operator[0, 0] = operator[-1, -1] = 1 - fourier
+    operator[0, 1] = operator[-1, -2] = fourier
+    operator_t = operator.T
+
+    k_flux = (STEP / delta_x) * (mp.D_W_a / mp.boundary_layer)
+    k_wall = (mp.A_ex * mp.D_W_a * STEP / mp.boundary_layer) / mp.Vol
+
+    # ventilation decay and water sources per surrogate timestep, exact for forcing constant over the timestep. Without
+    # ventilation (outdoor temperature at the indoor set point, beta = 0) the sources accumulate over the timestep.
+    cw_sat_in, beta, c_source = compute.compute_forcing(temp_c_out, rh_out)
+    decay = (1 - beta) ** (STEP / mp.delta_t)
+    source = np.divide(c_source * (1 - decay), beta, out=c_source * (STEP / mp.delta_t), where=beta != 0)
+
+    state = kn.initial_state(cw_sat_in[:, 0])
+    wall = np.repeat(state.wall[:, :1], LAYERS, axis=1)
+    cw_in = state.cw_in
+
+    surface = np.empty((locations, hours + 1))
+    rh_in = np.empty((locations, hours))
+    layer_2 = np.empty((locations, hours))
+
+    for i in range(hours):
+        surface[:, i] = 1.5 * wall[:, 0] - 0.5 * wall[:, 1]
+        layer_2[:, i] = wall[:, 1]
+        rh_wall = kn.calc_rhwall(surface[:, i])
+
+        # indoor air is implicit in the water exchange with the wall
+        cw_in = (decay[:, i] * cw_in + source[:, i] + k_wall * rh_wall * cw_sat_in[:, i]) / (1 + k_wall)
+        rh_in[:, i] = cw_in / cw_sat_in[:, i]
+
+        wall = wall @ operator_t
+        wall[:, 0] += k_flux * (rh_in[:, i] - rh_wall) * cw_sat_in[:, i]
+
+    surface[:, hours] = 1.5 * wall[:, 0] - 0.5 * wall[:, 1]
+
+    return np.stack([surface[:, :-1] / mp.rho_wood, surface[:, 1:] / mp.rho_wood, rh_in, layer_2 / mp.rho_wood,
+                     np.ones_like(rh_in)], axis=-1)
+
+
+# approximate ttf (minutes) per hour from hourly outdoor temperature ('C) and rh (%) of shape (locations, hours) or
+# (hours,)
+def predict_ttf(temp_c_out, rh_out, model: SurrogateModel = DEFAULT_SURROGATE):
+
+    ttf = 2 * np.exp(_features(temp_c_out, rh_out) @ np.asarray(model.coefficients))
+
+    return ttf if np.ndim(temp_c_out) == 2 else ttf[0]
+
+
+# exact ttf per hour, marched on the modelling timestep from hourly weather
+def _exact_ttf(temp_c_out, rh_out):
+    rf = int(STEP / mp.delta_t)
+    hours = np.arange(temp_c_out.shape[1])
+    grid = np.arange((len(hours) - 1) * rf + 1) / rf
+    temp = np.stack([np.interp(grid, hours, row) for row in temp_c_out])
+    humidity = np.stack([np.interp(grid, hours, row) for row in rh_out])
+    _, ttf = compute.compute_fr(temp, humidity)
+    return ttf[:, ::rf]
+
+
+# synthetic hourly weather for calibration - random climates (mean and diurnal amplitude of temperature and rh)
+# with synoptic variability and noise, of shape (locations, hours)
+def calibration_weather(locations: int, hours: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    diurnal = np.sin(2 * np.pi * np.arange(hours) / 24)
+
+    temp_mean = rng.uniform(-10, 20, (locations, 1))
+    rh_mean = rng.uniform(45, 85, (locations, 1))
+
+    synoptic_temp = np.cumsum(rng.normal(0, 0.6, (locations, hours)), axis=1)
+    synoptic_rh = np.cumsum(rng.normal(0, 2.0, (locations, hours)), axis=1)
+    synoptic_temp = np.clip(synoptic_temp - synoptic_temp.mean(axis=1, keepdims=True), -10, 10)
+    synoptic_rh = np.clip(synoptic_rh - synoptic_rh.mean(axis=1, keepdims=True), -30, 30)
+
+    temp = temp_mean + rng.uniform(0, 10, (locations, 1)) * diurnal + synoptic_temp + rng.normal(0, 0.5, (locations, hours))
+    humidity = rh_mean - rng.uniform(0, 25, (locations, 1)) * diurnal + synoptic_rh + rng.normal(0, 3, (locations, hours))
+
+    return temp, np.clip(humidity, 5, 100)
+
+
+# fits the correction on exact simulations of calibration weather and evaluates the error envelope on independent
+# weather. The first spinup hours of each run are not fitted (both models start from the same initial guess), but
+# are included in the envelope.
+def calibrate(locations: int = 400, days: int = 40, seed: int = 0, spinup: int = 48) -> SurrogateModel:
+
+    def simulate(seed):
+        temp, humidity = calibration_weather(locations, days * 24, seed)
+        with np.errstate(all='ignore'):
+            ttf = _exact_ttf(temp, humidity)
+        # the explicit model diverges for a few extreme synthetic climates
+        valid = np.isfinite(ttf).all(axis=1)
+        return _features(temp[valid], humidity[valid]), ttf[valid]
+
+    features, ttf = simulate(seed)
+    features, ttf = features[:, spinup:], ttf[:, spinup:]
+    coefficients, *_ = np.linalg.lstsq(features.reshape(-1, features.shape[-1]), np.log(ttf / 2).reshape(-1), rcond=None)
+
+    features, ttf = simulate(seed + 1)
+    error = np.abs(2 * np.exp(features @ coefficients) / ttf - 1)
+
+    return SurrogateModel(coefficients=tuple(coefficients.tolist()), max_error=float(error.max()),
+                          p99_error=float(np.quantile(error, 0.99)))
+
+
+# hourly ttf for all locations, exact for the locations where the surrogate ttf comes within margin (relative, by
+# default the maximum error of the model) of the threshold at any hour, or crosses it. Returns the ttf of shape (locations, hours)
+# and a mask of the locations computed exactly. Inputs are on the modelling timestep as for compute_fr.
+def hybrid_ttf(temp_c_out, rh_out, threshold: float, margin: float = None, model: SurrogateModel = DEFAULT_SURROGATE,
+               backend: str = 'auto'):
+
+    margin = model.max_error if margin is None else margin
+    rf = int(STEP / mp.delta_t)
+
+    temp_c_out = np.atleast_2d(np.asarray(temp_c_out, dtype=float))
+    rh_out = np.atleast_2d(np.asarray(rh_out, dtype=float))
+
+    ttf = predict_ttf(temp_c_out[:, ::rf], rh_out[:, ::rf], model)
+
+    # locations which are not clearly above (or clearly below) the threshold at all hours
+    exact = ~(np.all(ttf > threshold * (1 + margin), axis=1) | np.all(ttf < threshold * (1 - margin), axis=1))
+
+    if exact.any():
+        _, ttf_exact = compute.compute_fr(temp_c_out[exact], rh_out[exact], backend=backend)
+        ttf[exact] = ttf_exact[:, ::rf]
+
+    return ttf, exact
+
+
+# as compute.compute_many, with hybrid_ttf
+def compute_hybrid(wds: list[dm.WeatherData], threshold: float, margin: float = None,
+                   model: SurrogateModel = DEFAULT_SURROGATE, backend: str = 'auto') -> list[dm.FireRiskPrediction]:
+
+    if len(wds) == 0:
+        return []
+
+    spans = [pp.time_span(wd) for wd in wds]
+    start_time = max(span[0] for span in spans)
+    end_time = min(span[1] for span in spans)
+
+    if end_time < start_time:
+        raise ValueError("Weather data for the locations do not have an overlapping time span.")
+
+    rows = [pp.preprocess(wd, start_time, end_time) for wd in wds]
+    time_interpolated_sec = rows[0][1]
+
+    ttf, _ = hybrid_ttf(np.stack([row[2] for row in rows]), np.stack([row[3] for row in rows]), threshold, margin,
+                        model, backend)
+
+    rf = int(STEP / mp.delta_t)
+    wind_speed_in_hour = np.stack([row[4] for row in rows])[:, ::rf]
+    timestamps = [start_time + datetime.timedelta(seconds=sec) for sec in time_interpolated_sec[::rf]]
+
+    predictions = []
+    for n, wd in enumerate(wds):
+        firerisks = [dm.FireRisk(timestamp=timestamp, ttf=ttf_i, wind_speed=wind_i)
+                     for timestamp, ttf_i, wind_i in zip(timestamps, ttf[n].tolist(), wind_speed_in_hour[n].tolist())]
+        predictions.append(dm.FireRiskPrediction(location=wd.forecast.location, firerisks=firerisks))
+
+    return predictions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Calibrate the surrogate TTF model against the exact model')
+    parser.add_argument('--locations', type=int, default=400)
+    parser.add_argument('--days', type=int, default=40)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='file to write the calibrated model to (JSON)')
+    args = parser.parse_args()
+
+    model = calibrate(args.locations, args.days, args.seed)
+
+    print(f'coefficients: {model.coefficients}')
+    print(f'relative ttf error: max {model.max_error:.4f}, p99 {model.p99_error:.4f}')
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(model.to_json())
+
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,16 @@
 import datetime
+from typing import Iterable, Iterator
 
-from frcm.datamodel.model import FireRiskPrediction, Location, WeatherData, Observations, Forecast
+from frcm.datamodel.model import FireRisk, FireRiskPrediction, FireRiskAggregatePrediction, FireRiskCrossing, FireRiskEnsemblePrediction, Location, WeatherData, Observations, Forecast, QualityReport, SimulationState
 from frcm.weatherdata.client import WeatherDataClient
 import frcm.fireriskmodel.compute
+import frcm.fireriskmodel.ensemble
+import frcm.fireriskmodel.spinup
+import frcm.fireriskmodel.surrogate
+from frcm.fireriskmodel.ensemble import Perturbation
+from frcm.fireriskmodel.parameters import ParameterSet
+from frcm.fireriskmodel.spinup import SpinupCache
+from frcm.pipeline import Pipeline, Stage, QUEUE_SIZE
 
 from frcm.weatherdata.client_met import METClient
 from frcm.weatherdata.extractor_met import METExtractor
@@ -10,8 +18,9 @@ from frcm.weatherdata.extractor_met import METExtractor
 
 class FireRiskAPI:
 
-    def __init__(self, client: WeatherDataClient):
+    def __init__(self, client: WeatherDataClient, spinup_cache: SpinupCache = None):
         self.client = client
+        self.spinup_cache = spinup_cache if spinup_cache is not None else SpinupCache()
         self.timedelta_ok = datetime.timedelta(days=1) # TODO: when during a day is observations updated? (12:00 and 06:00)
         # TODO (NOTE): Short term forecast updates every 3rd hour with long term forecast every 12th hour at 12:00 and 06:00
         self.interpolate_distance = 720
@@ -20,6 +29,34 @@ class FireRiskAPI:
 
         return frcm.fireriskmodel.compute.compute(wd)
 
+    # prediction and quality report of the weather data, raises QualityError (a ValueError) for weather data failing
+    # the quality checks if reject
+    def compute_checked(self, wd: WeatherData, reject: bool = True) -> tuple[FireRiskPrediction, QualityReport]:
+
+        return frcm.fireriskmodel.compute.compute_checked(wd, reject=reject)
+
+    def compute_many(self, wds: list[WeatherData]) -> list[FireRiskPrediction]:
+
+        return frcm.fireriskmodel.compute.compute_many(wds)
+
+    def compute_stream(self, wd: WeatherData) -> Iterator[FireRisk]:
+
+        return frcm.fireriskmodel.compute.compute_stream(wd)
+
+    # approximate fire risk for many locations, exact where ttf comes near threshold (see frcm.fireriskmodel.surrogate)
+    def compute_hybrid(self, wds: list[WeatherData], threshold: float) -> list[FireRiskPrediction]:
+
+        return frcm.fireriskmodel.surrogate.compute_hybrid(wds, threshold)
+
+    def compute_ensemble(self, wd: WeatherData, perturbations: list[Perturbation] = None,
+                         members: list[WeatherData] = None) -> FireRiskEnsemblePrediction:
+
+        return frcm.fireriskmodel.ensemble.compute_ensemble(wd, perturbations, members)
+
+    def compute_archetypes(self, wd: WeatherData, archetypes: list[ParameterSet]) -> list[FireRiskPrediction]:
+
+        return frcm.fireriskmodel.compute.compute_archetypes(wd, archetypes)
+
     def get_wd_observations_to_now(self, location: Location, time_now, obs_delta: datetime.timedelta) -> Observations:
 
         start_time = time_now - obs_delta
@@ -50,6 +87,38 @@ class FireRiskAPI:
 
         return wd
 
+    # weather data with observations from a spin-up window selected for the location, instead of a fixed obs_delta
+    # (see frcm.fireriskmodel.spinup). The observations of the longest window are fetched once, and the shortest
+    # window for which the fire risk no longer depends on the initial state is selected from them. The selected window
+    # is cached per station and season, later calls for the location fetch only that window.
+    def get_wd_now_adaptive(self, location: Location) -> WeatherData:
+
+        time_now = datetime.datetime.now(datetime.timezone.utc)
+        windows = frcm.fireriskmodel.spinup.WINDOWS
+
+        station = self.spinup_cache.station(location)
+        cached = self.spinup_cache.get(station, time_now) if station is not None else None
+
+        observations = self.client.fetch_observations(location=location, start=time_now - (cached or windows[-1]), end=time_now)
+        forecast = self.get_wd_forecast_from_now(location)
+        wd = WeatherData(created=time_now, observations=observations, forecast=forecast)
+
+        if cached is not None or len(observations.series) == 0:
+            return wd
+
+        window = frcm.fireriskmodel.spinup.select_window(wd, windows)
+        self.spinup_cache.put(observations.source, time_now, window, location)
+
+        observations = Observations.model_construct(source=observations.source, location=observations.location,
+                                                    series=observations.series.between(time_now - window))
+        return WeatherData(created=time_now, observations=observations, forecast=forecast)
+
+    def compute_now_adaptive(self, location: Location) -> FireRiskPrediction:
+
+        wd = self.get_wd_now_adaptive(location)
+
+        return self.compute(wd)
+
     def compute_now(self, location: Location, obs_delta: datetime.timedelta) -> FireRiskPrediction:
 
         wd = self.get_wd_now(location, obs_delta)
@@ -60,24 +129,179 @@ class FireRiskAPI:
 
         return prediction
 
-    def compute_now_period(self, location: Location, obs_delta: datetime.timedelta, fct_delta: datetime.timedelta):
-        pass
+    # fire risk now for many locations, with fetching (network), parsing and computation as pipelined stages with
+    # the given number of workers each (see frcm.pipeline). Fetching for the next locations overlaps with the
+    # computation for the previous. Yields (location, prediction) in order of completion.
+    def compute_now_pipeline(self, locations: Iterable[Location], obs_delta: datetime.timedelta,
+                             fetch_workers: int = 4, parse_workers: int = 1, compute_workers: int = 1,
+                             queue_size: int = QUEUE_SIZE) -> Iterator[tuple[Location, FireRiskPrediction]]:
+
+        def fetch(location):
+            time_now = datetime.datetime.now()
+            return location, time_now, self.client.fetch_raw(location, time_now - obs_delta, time_now)
+
+        def parse(fetched):
+            location, time_now, raw = fetched
+            observations, forecast = self.client.extract_raw(location, raw)
+            return WeatherData(created=time_now, observations=observations, forecast=forecast)
+
+        pipeline = Pipeline([Stage('fetch', fetch, fetch_workers),
+                             Stage('parse', parse, parse_workers),
+                             Stage('compute', self.compute, compute_workers)], queue_size)
+
+        return pipeline.run(locations)
+
+    def compute_now_stream(self, location: Location, obs_delta: datetime.timedelta) -> Iterator[FireRisk]:
+
+        wd = self.get_wd_now(location, obs_delta)
+
+        return self.compute_stream(wd)
+
+    def compute_checkpointed(self, wd: WeatherData, checkpoint: SimulationState = None) -> tuple[FireRiskPrediction, SimulationState]:
+
+        return frcm.fireriskmodel.compute.compute_checkpointed(wd, checkpoint)
+
+    # the checkpoint if it can be resumed from at time_now (by default the current time), None if it is older than
+    # the longest spin-up window - the state is then spun up again from the observations
+    def resumable_checkpoint(self, checkpoint: SimulationState = None,
+                             time_now: datetime.datetime = None) -> SimulationState | None:
+
+        time_now = time_now or datetime.datetime.now(datetime.timezone.utc)
+
+        if checkpoint is None or time_now - checkpoint.timestamp > frcm.fireriskmodel.spinup.WINDOWS[-1]:
+            return None
+        return checkpoint
+
+    # weather data for resuming from a checkpoint - observations from the checkpoint to now, and the forecast.
+    # Without a checkpoint observations are fetched obs_delta into the past, or from the adaptive spin-up window if
+    # obs_delta is None (see get_wd_now_adaptive). A checkpoint which is not resumable (see resumable_checkpoint) is
+    # replaced by the adaptive spin-up window.
+    def get_wd_now_checkpointed(self, location: Location, checkpoint: SimulationState = None,
+                                obs_delta: datetime.timedelta = None) -> WeatherData:
+
+        time_now = datetime.datetime.now(datetime.timezone.utc)
+
+        if self.resumable_checkpoint(checkpoint, time_now) is not None:
+            observations = self.client.fetch_observations(location=location, start=checkpoint.timestamp, end=time_now)
+            forecast = self.get_wd_forecast_from_now(location)
+            return WeatherData(created=time_now, observations=observations, forecast=forecast)
+
+        if checkpoint is not None or obs_delta is None:
+            return self.get_wd_now_adaptive(location)
+
+        return self.get_wd_now(location, obs_delta)
+
+    # computes fire risk from a checkpoint of a previous computation, such that only observations since the
+    # checkpoint have to be fetched. Without a checkpoint observations are fetched obs_delta into the past.
+    # Returns the prediction and a new checkpoint at the last observation.
+    def compute_now_checkpointed(self, location: Location, obs_delta: datetime.timedelta,
+                                 checkpoint: SimulationState = None) -> tuple[FireRiskPrediction, SimulationState]:
+
+        wd = self.get_wd_now_checkpointed(location, checkpoint, obs_delta)
+        checkpoint = self.resumable_checkpoint(checkpoint, wd.created)
+
+        prediction, new_checkpoint = self.compute_checkpointed(wd, checkpoint)
+
+        return prediction, new_checkpoint
+
+    # weather data for the period from start to end - observations up to now, and the forecast if end is in the future
+    def get_wd_period(self, location: Location, start: datetime.datetime, end: datetime.datetime) -> WeatherData:
+
+        time_now = datetime.datetime.now(end.tzinfo)
+
+        observations = self.client.fetch_observations(location=location, start=min(start, time_now), end=min(end, time_now))
 
-    def compute_period(self, location: Location, start: datetime, end: datetime) -> FireRiskPrediction:
-        pass
+        if end > time_now:
+            forecast = self.get_wd_forecast_from_now(location)
+        else:
+            forecast = Forecast(location=location, data=[])
 
-    def compute_period_delta(self, location: Location, start: datetime, delta: datetime.timedelta) -> FireRiskPrediction:
-        pass
+        wd = WeatherData(created=time_now, observations=observations, forecast=forecast)
+
+        return wd
+
+    # first hour from now at which ttf drops below threshold, using observations obs_delta into the past. The search
+    # ends with the forecast, or fct_delta into the future if given. The simulation stops at the first crossing.
+    def first_crossing(self, location: Location, threshold: float,
+                       obs_delta: datetime.timedelta = datetime.timedelta(days=1),
+                       fct_delta: datetime.timedelta = None) -> FireRiskCrossing:
+
+        time_now = datetime.datetime.now(datetime.timezone.utc)
+
+        wd = self.get_wd_now(location, obs_delta)
+
+        start_time = time_now.replace(minute=0, second=0, microsecond=0)
+        end_time = time_now + fct_delta if fct_delta is not None else None
+
+        return frcm.fireriskmodel.compute.first_crossing(wd, threshold, start_time=start_time, end_time=end_time)
+
+    def compute_now_period(self, location: Location, obs_delta: datetime.timedelta, fct_delta: datetime.timedelta) -> FireRiskPrediction:
+
+        time_now = datetime.datetime.now(datetime.timezone.utc)
+
+        return self.compute_period(location, time_now - obs_delta, time_now + fct_delta)
+
+    # weather data for the period from start to end in chunks - observations up to now per calendar month, and the
+    # forecast as a last chunk if end is in the future. Each chunk is fetched when the previous one has been used.
+    def get_wd_period_chunks(self, location: Location, start: datetime.datetime, end: datetime.datetime) -> Iterator[WeatherData]:
+
+        time_now = datetime.datetime.now(end.tzinfo)
+
+        chunk_start = min(start, time_now)
+        obs_end = min(end, time_now)
+
+        while chunk_start < obs_end:
+            next_month = (chunk_start.replace(day=1, hour=0, minute=0, second=0, microsecond=0) + datetime.timedelta(days=32)).replace(day=1)
+            chunk_end = min(next_month, obs_end)
+
+            observations = self.client.fetch_observations(location=location, start=chunk_start, end=chunk_end)
+            yield WeatherData(created=time_now, observations=observations, forecast=Forecast(location=location, data=[]))
+
+            chunk_start = chunk_end
+
+        if end > time_now:
+            forecast = self.get_wd_forecast_from_now(location)
+            observations = Observations(source='', location=location, data=[])
+            yield WeatherData(created=time_now, observations=observations, forecast=forecast)
+
+    # historical reanalysis from start to end, fire risks are yielded hour by hour while the weather data is fetched
+    # and simulated one month at a time (see get_wd_period_chunks). The simulation stops at end.
+    def compute_period_stream(self, location: Location, start: datetime.datetime, end: datetime.datetime) -> Iterator[FireRisk]:
+
+        chunks = self.get_wd_period_chunks(location, start, end)
+
+        return frcm.fireriskmodel.compute.compute_chunked(chunks, start_time=start, end_time=end)
+
+    # the simulation stops at end, fire risks are given from start to end
+    def compute_period(self, location: Location, start: datetime.datetime, end: datetime.datetime) -> FireRiskPrediction:
+
+        firerisks = list(self.compute_period_stream(location, start, end))
+
+        return FireRiskPrediction(location=location, firerisks=firerisks)
+
+    def compute_period_delta(self, location: Location, start: datetime.datetime, delta: datetime.timedelta) -> FireRiskPrediction:
+
+        return self.compute_period(location, start, start + delta)
+
+    # fire risk from start to end aggregated over windows, e.g., the daily minimum TTF with window='day' and
+    # statistics=('min',). See frcm.fireriskmodel.aggregate for the windows and statistics.
+    def compute_period_aggregated(self, location: Location, start: datetime.datetime, end: datetime.datetime,
+                                  window: str = 'day', statistics=('min',)) -> FireRiskAggregatePrediction:
+
+        wd = self.get_wd_period(location, start, end)
+
+        return frcm.fireriskmodel.compute.compute_aggregated(wd, window, statistics, start_time=start, end_time=end)
 
 
 class METFireRiskAPI:
 
-    def __init__(self):
+    # stream_observations parses Frost responses as they are received, see METClient
+    def __init__(self, spinup_cache: SpinupCache = None, stream_observations: bool = False):
         self.met_extractor = METExtractor()
 
-        self.met_client = METClient(extractor=self.met_extractor)
+        self.met_client = METClient(extractor=self.met_extractor, stream=stream_observations)
 
-        self.frc = FireRiskAPI(client=self.met_client)
+        self.frc = FireRiskAPI(client=self.met_client, spinup_cache=spinup_cache)
 
     def get_weatherdata_now(self, location: Location, obs_delta: datetime.timedelta) -> WeatherData:
 
@@ -85,9 +309,75 @@ class METFireRiskAPI:
 
         return wd
 
+    def get_weatherdata_now_adaptive(self, location: Location) -> WeatherData:
+        return self.frc.get_wd_now_adaptive(location)
+
+    def resumable_checkpoint(self, checkpoint: SimulationState = None,
+                             time_now: datetime.datetime = None) -> SimulationState | None:
+        return self.frc.resumable_checkpoint(checkpoint, time_now)
+
+    def get_weatherdata_now_checkpointed(self, location: Location, checkpoint: SimulationState = None,
+                                         obs_delta: datetime.timedelta = None) -> WeatherData:
+        return self.frc.get_wd_now_checkpointed(location, checkpoint, obs_delta)
+
     def compute(self, wd: WeatherData) -> FireRiskPrediction:
         return self.frc.compute(wd)
 
+    def compute_checked(self, wd: WeatherData, reject: bool = True) -> tuple[FireRiskPrediction, QualityReport]:
+        return self.frc.compute_checked(wd, reject)
+
+    def compute_many(self, wds: list[WeatherData]) -> list[FireRiskPrediction]:
+        return self.frc.compute_many(wds)
+
+    def compute_stream(self, wd: WeatherData) -> Iterator[FireRisk]:
+        return self.frc.compute_stream(wd)
+
+    def compute_hybrid(self, wds: list[WeatherData], threshold: float) -> list[FireRiskPrediction]:
+        return self.frc.compute_hybrid(wds, threshold)
+
+    def compute_ensemble(self, wd: WeatherData, perturbations: list[Perturbation] = None,
+                         members: list[WeatherData] = None) -> FireRiskEnsemblePrediction:
+        return self.frc.compute_ensemble(wd, perturbations, members)
+
+    def compute_archetypes(self, wd: WeatherData, archetypes: list[ParameterSet]) -> list[FireRiskPrediction]:
+        return self.frc.compute_archetypes(wd, archetypes)
+
     def compute_now(self, location: Location, obs_delta: datetime.timedelta) -> FireRiskPrediction:
         return self.frc.compute_now(location, obs_delta)
 
+    def compute_now_adaptive(self, location: Location) -> FireRiskPrediction:
+        return self.frc.compute_now_adaptive(location)
+
+    def compute_now_pipeline(self, locations: Iterable[Location], obs_delta: datetime.timedelta,
+                             fetch_workers: int = 4, parse_workers: int = 1, compute_workers: int = 1,
+                             queue_size: int = QUEUE_SIZE) -> Iterator[tuple[Location, FireRiskPrediction]]:
+        return self.frc.compute_now_pipeline(locations, obs_delta, fetch_workers, parse_workers, compute_workers, queue_size)
+
+    def compute_now_stream(self, location: Location, obs_delta: datetime.timedelta) -> Iterator[FireRisk]:
+        return self.frc.compute_now_stream(location, obs_delta)
+
+    def compute_now_checkpointed(self, location: Location, obs_delta: datetime.timedelta,
+                                 checkpoint: SimulationState = None) -> tuple[FireRiskPrediction, SimulationState]:
+        return self.frc.compute_now_checkpointed(location, obs_delta, checkpoint)
+
+    def compute_period(self, location: Location, start: datetime.datetime, end: datetime.datetime) -> FireRiskPrediction:
+        return self.frc.compute_period(location, start, end)
+
+    def compute_period_stream(self, location: Location, start: datetime.datetime, end: datetime.datetime) -> Iterator[FireRisk]:
+        return self.frc.compute_period_stream(location, start, end)
+
+    def first_crossing(self, location: Location, threshold: float,
+                       obs_delta: datetime.timedelta = datetime.timedelta(days=1),
+                       fct_delta: datetime.timedelta = None) -> FireRiskCrossing:
+        return self.frc.first_crossing(location, threshold, obs_delta, fct_delta)
+
+    def compute_period_delta(self, location: Location, start: datetime.datetime, delta: datetime.timedelta) -> FireRiskPrediction:
+        return self.frc.compute_period_delta(location, start, delta)
+
+    def compute_now_period(self, location: Location, obs_delta: datetime.timedelta, fct_delta: datetime.timedelta) -> FireRiskPrediction:
+        return self.frc.compute_now_period(location, obs_delta, fct_delta)
+
+    def compute_period_aggregated(self, location: Location, start: datetime.datetime, end: datetime.datetime,
+                                  window: str = 'day', statistics=('min',)) -> FireRiskAggregatePrediction:
+        return self.frc.compute_period_aggregated(location, start, end, window, statistics)
+
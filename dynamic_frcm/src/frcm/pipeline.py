@@ -0,0 +1,120 @@
+import queue
+import threading
+from typing import Callable, Iterable, Iterator, NamedTuple
+
+""" Pipelined processing of many items through stages connected by bounded queues """
+
+# Each stage runs in its own pool of worker threads, and passes its results to the next stage through a bounded
+# queue. When a later stage falls behind, the queues fill up and the earlier stages block (backpressure), so at most
+# about queue_size items are in flight between two stages. Items leave the pipeline in order of completion, and the
+# total time is set by the slowest stage rather than by the sum of the stages.
+#
+# The first exception raised by a stage stops the pipeline and is raised to the consumer. Closing the result
+# iterator early also stops the pipeline.
+
+QUEUE_SIZE = 8
+
+# end of input marker, one per worker of a stage
+_DONE = object()
+
+
+class Stage(NamedTuple):
+    name: str
+    function: Callable
+    workers: int = 1
+
+
+class Pipeline:
+
+    def __init__(self, stages: list[Stage], queue_size: int = QUEUE_SIZE):
+        if len(stages) == 0:
+            raise ValueError("Pipeline must have at least one stage")
+        for stage in stages:
+            if stage.workers < 1:
+                raise ValueError(f"Stage '{stage.name}' must have at least one worker")
+        self.stages = stages
+        self.queue_size = queue_size
+
+    # yields (item, result) for every item in order of completion
+    def run(self, items: Iterable) -> Iterator[tuple]:
+
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in range(len(self.stages) + 1)]
+        stop = threading.Event()
+        errors = []
+
+        # put which gives up when the pipeline is stopped
+        def put(q: queue.Queue, value) -> bool:
+            while not stop.is_set():
+                try:
+                    q.put(value, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def feed():
+            try:
+                for item in items:
+                    if not put(queues[0], (item, item)):
+                        return
+            except Exception as error:
+                errors.append(error)
+                stop.set()
+            for _ in range(self.stages[0].workers):
+                put(queues[0], _DONE)
+
+        def work(index: int, remaining: list, lock: threading.Lock):
+            stage, source, target = self.stages[index], queues[index], queues[index + 1]
+            while not stop.is_set():
+                try:
+                    entry = source.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if entry is _DONE:
+                    break
+                item, value = entry
+                try:
+                    result = stage.function(value)
+                except Exception as error:
+                    errors.append(error)
+                    stop.set()
+                    return
+                if not put(target, (item, result)):
+                    return
+
+            # the last worker of a stage passes on the end of input
+            with lock:
+                remaining[0] = remaining[0] - 1
+                last = remaining[0] == 0
+            if last:
+                # one marker per worker of the next stage, or for the consumer
+                for _ in range(self.stages[index + 1].workers if index + 1 < len(self.stages) else 1):
+                    put(target, _DONE)
+
+        threads = [threading.Thread(target=feed, daemon=True)]
+        for index, stage in enumerate(self.stages):
+            remaining = [stage.workers]
+            lock = threading.Lock()
+            for _ in range(stage.workers):
+                threads.append(threading.Thread(target=work, daemon=True, name=f'pipeline-{stage.name}',
+                                                args=(index, remaining, lock)))
+
+        for thread in threads:
+            thread.start()
+
+        try:
+            while not stop.is_set():
+                try:
+                    entry = queues[-1].get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if entry is _DONE:
+                    break
+                yield entry
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+        if errors:
+            raise errors[0]
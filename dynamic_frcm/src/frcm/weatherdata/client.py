@@ -1,4 +1,5 @@
 import abc
+import datetime
 
 from frcm.datamodel.model import *
 
@@ -14,3 +15,12 @@ class WeatherDataClient:
     @abc.abstractmethod
     def fetch_forecast(self, location: Location) -> Forecast:
         pass
+
+    # unparsed observations and forecast for location, for pipelines which fetch (I/O) and parse (CPU) in separate
+    # stages. Clients which cannot separate the two return the parsed observations and forecast.
+    def fetch_raw(self, location: Location, start: datetime.datetime, end: datetime.datetime):
+        return self.fetch_observations(location=location, start=start, end=end), self.fetch_forecast(location)
+
+    # observations and forecast from the result of fetch_raw
+    def extract_raw(self, location: Location, raw) -> tuple[Observations, Forecast]:
+        return raw
@@ -0,0 +1,163 @@
+import datetime
+import os
+from typing import Iterable
+
+import numpy as np
+
+from frcm.weatherdata.client import WeatherDataClient
+from frcm.datamodel.model import Location, Observations, Forecast
+from frcm.datamodel.series import WeatherSeries
+
+""" Weather data client serving observations and forecasts from local columnar archives """
+
+# An archive is a directory with a group of observations (one series per station) and a group of forecasts (one series
+# per forecast run, i.e., per location and issue time). Each group is a set of .npy files which are memory-mapped when
+# the archive is opened:
+#
+# index.npy         one entry per station or forecast run - id, latitude, longitude, issue time (forecasts only) and
+#                   the offset and count of its rows
+# timestamps.npy    datetime64[us] in UTC, sorted within each station or forecast run
+# temperature.npy   float64, and likewise humidity.npy and wind_speed.npy
+#
+# The rows of a station are contiguous, so a time range is found by a binary search in the timestamps of the station,
+# and the series returned by the client are views of the mapped files - nothing is read or copied until the columns
+# are used. Archives are written by write_archive.
+
+COLUMNS = ('timestamps', 'temperature', 'humidity', 'wind_speed')
+INDEX_ENTRY = np.dtype([('station', '<U64'), ('latitude', '<f8'), ('longitude', '<f8'), ('issued', '<M8[us]'),
+                        ('offset', '<u8'), ('count', '<u8')])
+
+# issue time of the entries of observations
+NOT_ISSUED = np.datetime64('NaT', 'us')
+
+
+def _utc(timestamp: datetime.datetime) -> np.datetime64:
+    # naive timestamps are local time, as given by FireRiskAPI.get_wd_now
+    return np.datetime64(timestamp.astimezone(datetime.timezone.utc).replace(tzinfo=None), 'us')
+
+
+# entries by key, each with the station, location and issue time of the entry and the series to merge into it
+def _write_group(path: str, entries: dict[tuple, tuple[str, Location, np.datetime64, list[WeatherSeries]]]):
+
+    os.makedirs(path, exist_ok=True)
+
+    index = np.zeros(len(entries), dtype=INDEX_ENTRY)
+    columns = []
+    offset = 0
+    for i, (station, location, issued, series) in enumerate(entries.values()):
+        merged = WeatherSeries.concat(*series).sorted_unique()
+        index[i] = (station, location.latitude, location.longitude, issued, offset, len(merged))
+        columns.append(merged)
+        offset = offset + len(merged)
+
+    merged = WeatherSeries.concat(*columns)
+    np.save(os.path.join(path, 'index.npy'), index)
+    for name in COLUMNS:
+        np.save(os.path.join(path, f'{name}.npy'), getattr(merged, name))
+
+
+# writes observations (grouped by source station) and forecasts (pairs of issue time and forecast, e.g., the created
+# time and forecast of archived WeatherData) to an archive at path, replacing the groups of an existing archive.
+# Overlapping observations of a station are merged, the first occurrence is kept. Forecast runs are kept separately.
+def write_archive(path: str, observations: Iterable[Observations],
+                  forecasts: Iterable[tuple[datetime.datetime, Forecast]] = ()):
+
+    stations = {}
+    for obs in observations:
+        source = obs.source or ''
+        stations.setdefault(source, (source, obs.location, NOT_ISSUED, []))[3].append(obs.series)
+
+    runs = {}
+    for issued, fct in forecasts:
+        key = (fct.location.latitude, fct.location.longitude, _utc(issued))
+        runs.setdefault(key, ('', fct.location, key[2], []))[3].append(fct.series)
+
+    _write_group(os.path.join(path, 'observations'), stations)
+    _write_group(os.path.join(path, 'forecast'), runs)
+
+
+class _Group:
+
+    def __init__(self, path: str):
+        self.index = np.load(os.path.join(path, 'index.npy'))
+        self.columns = {name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r') for name in COLUMNS}
+
+        self._latitude = np.radians(self.index['latitude'])
+        self._longitude = np.radians(self.index['longitude'])
+
+    # entry of the station closest to location (haversine distance)
+    def nearest(self, location: Location) -> int:
+        if len(self.index) == 0:
+            raise ValueError('No stations in the weather data archive')
+        latitude, longitude = np.radians(location.latitude), np.radians(location.longitude)
+        a = (np.sin((self._latitude - latitude) / 2) ** 2 +
+             np.cos(latitude) * np.cos(self._latitude) * np.sin((self._longitude - longitude) / 2) ** 2)
+        return int(np.argmin(a))
+
+    # rows of the station from start to end (inclusive), both optional, as views of the mapped columns
+    def series(self, entry: int, start: np.datetime64 = None, end: np.datetime64 = None) -> WeatherSeries:
+        offset, count = int(self.index['offset'][entry]), int(self.index['count'][entry])
+        timestamps = self.columns['timestamps'][offset:offset + count]
+
+        first = np.searchsorted(timestamps, start, side='left') if start is not None else 0
+        last = np.searchsorted(timestamps, end, side='right') if end is not None else count
+
+        rows = slice(offset + first, offset + max(first, last))
+        return WeatherSeries(*(self.columns[name][rows] for name in COLUMNS), aware=True)
+
+
+class LocalClient(WeatherDataClient):
+
+    # serves the archive at path (see write_archive) without network access. The forecast is the latest forecast run
+    # issued at or before now (the current time unless given), from now to the end of that run - for backfills, the
+    # forecast as it was available at a past point in time.
+    def __init__(self, path: str, now: datetime.datetime = None):
+
+        self.path = path
+        self.now = now
+
+        self.observations = _Group(os.path.join(path, 'observations'))
+        self.forecast = _Group(os.path.join(path, 'forecast'))
+
+    def stations(self) -> list[tuple[str, Location]]:
+        return [(str(entry['station']), Location(latitude=float(entry['latitude']), longitude=float(entry['longitude'])))
+                for entry in self.observations.index]
+
+    def get_nearest_station_id(self, location: Location) -> str:
+        return str(self.observations.index['station'][self.observations.nearest(location)])
+
+    def fetch_observations(self, location: Location, start: datetime.datetime, end: datetime.datetime) -> Observations:
+
+        entry = self.observations.nearest(location)
+        series = self.observations.series(entry, _utc(start), _utc(end))
+
+        # the columns come from the archive, no validation needed
+        return Observations.model_construct(source=str(self.observations.index['station'][entry]),
+                                            location=location, series=series)
+
+    def fetch_forecast(self, location: Location) -> Forecast:
+
+        # archives of observations only
+        if len(self.forecast.index) == 0:
+            return Forecast.model_construct(location=location, series=WeatherSeries.empty())
+
+        now = _utc(self.now if self.now is not None else datetime.datetime.now(datetime.timezone.utc))
+
+        # runs at the forecast location closest to location, issued at or before now
+        index = self.forecast.index
+        nearest = self.forecast.nearest(location)
+        runs = np.flatnonzero((index['latitude'] == index['latitude'][nearest]) &
+                              (index['longitude'] == index['longitude'][nearest]) &
+                              (index['issued'] <= now))
+
+        if runs.size == 0:
+            series = WeatherSeries.empty()
+            entry = nearest
+        else:
+            entry = int(runs[np.argmax(index['issued'][runs])])
+            series = self.forecast.series(entry, start=now + np.timedelta64(1, 'us'))
+
+        forecast_location = Location.model_construct(latitude=float(self.forecast.index['latitude'][entry]),
+                                                     longitude=float(self.forecast.index['longitude'][entry]))
+
+        return Forecast.model_construct(location=forecast_location, series=series)
@@ -10,9 +10,15 @@ from frcm.weatherdata.extractor import Extractor
 from frcm.datamodel.model import Location, Observations, Forecast
 
 
+# size of the chunks in which observation responses are read when streaming
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
 class METClient(WeatherDataClient):
 
-    def __init__(self, extractor: Extractor):
+    # with stream, observation responses are parsed as they are received (see METExtractor.extract_observations_stream)
+    # instead of reading the full response first
+    def __init__(self, extractor: Extractor, stream: bool = False):
 
         self.forecast_endpoint = 'https://api.met.no/weatherapi/locationforecast/2.0/compact.json'
 
@@ -23,6 +29,7 @@ class METClient(WeatherDataClient):
         self.MET_CLIENT_SECRET = config('MET_CLIENT_SECRET')
 
         self.extractor = extractor
+        self.stream = stream
 
     def send_met_request(self, parameters):
 
@@ -53,11 +60,12 @@ class METClient(WeatherDataClient):
 
         return forecast
 
-    def send_frost_request(self, endpoint, parameters):
+    def send_frost_request(self, endpoint, parameters, stream: bool = False):
 
         response = requests.get(endpoint,
                                 params=parameters,
-                                auth=(self.MET_CLIENT_ID, self.MET_CLIENT_SECRET))
+                                auth=(self.MET_CLIENT_ID, self.MET_CLIENT_SECRET),
+                                stream=stream)
 
         return response
 
@@ -101,7 +109,7 @@ class METClient(WeatherDataClient):
 
         return timeperiod
 
-    def fetch_observations_raw(self, source: str, start: datetime.datetime, end: datetime.datetime):
+    def fetch_observations_raw(self, source: str, start: datetime.datetime, end: datetime.datetime, stream: bool = False):
 
         time_period = METClient.format_period(start, end)
 
@@ -112,7 +120,7 @@ class METClient(WeatherDataClient):
                       'elements': 'air_temperature,relative_humidity,wind_speed'
                       }
 
-        response = self.send_frost_request(self.observations_endpoint, parameters)
+        response = self.send_frost_request(self.observations_endpoint, parameters, stream)
 
         return response
 
@@ -124,6 +132,12 @@ class METClient(WeatherDataClient):
 
 #        print(station_id)
 
+        if self.stream:
+            with self.fetch_observations_raw(station_id, start, end, stream=True) as response:
+                # error bodies have no data to stream, they would be parsed as no observations
+                response.raise_for_status()
+                return self.extractor.extract_observations_stream(response.iter_content(chunk_size=STREAM_CHUNK_SIZE), location)
+
         response = self.fetch_observations_raw(station_id, start, end)
 
 #        print(response.text)
@@ -131,3 +145,20 @@ class METClient(WeatherDataClient):
         observations = self.extractor.extract_observations(response.text, location)
 
         return observations
+
+    # response texts of the observations and forecast, parsed by extract_raw
+    def fetch_raw(self, location: Location, start: datetime.datetime, end: datetime.datetime):
+
+        station_id = self.get_nearest_station_id(location)
+
+        observations_response = self.fetch_observations_raw(station_id, start, end)
+
+        forecast_response = self.fetch_forecast_raw(location)
+
+        return observations_response.text, forecast_response.text
+
+    def extract_raw(self, location: Location, raw) -> tuple[Observations, Forecast]:
+
+        observations_text, forecast_text = raw
+
+        return self.extractor.extract_observations(observations_text, location), self.extractor.extract_forecast(forecast_text)
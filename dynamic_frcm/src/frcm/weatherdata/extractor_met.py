@@ -1,19 +1,42 @@
+import array
 import json
+from typing import Iterable
+
 import dateutil.parser
 import numpy as np
 
 from frcm.weatherdata.extractor import Extractor
+from frcm.weatherdata.stream import iter_array_items
+from frcm.weatherdata.utils import parse_utc_timestamps
 from frcm.datamodel.model import *
+from frcm.datamodel.series import WeatherSeries
+
+# column of each Frost element id in the observations (temperature, humidity, wind speed)
+FROST_ELEMENTS = {'air_temperature': 0, 'relative_humidity': 1, 'wind_speed': 2}
+
+# observations whose timestamps are parsed together when streaming
+STREAM_BATCH = 1024
 
 
+# With fast (the default), responses are extracted by the fast path - timestamps are parsed by a fixed-format ISO-8601
+# parser (falling back to dateutil for other formats), element ids are looked up in FROST_ELEMENTS and the columns
+# are built directly, without validating each row of the (trusted) MET and Frost responses. The result is the same
+# as for the reference path (fast=False).
 class METExtractor(Extractor):
 
+    def __init__(self, fast: bool = True):
+        self.fast = fast
+
     def extract_observations(self, frost_response_str: str, location: Location) -> Observations:
 
+        if self.fast:
+            return self.extract_observations_fast(frost_response_str, location)
+
         frost_response = json.loads(frost_response_str)
         data_list = frost_response['data']
 
-        weatherdatapoints = list()
+        # columns of the observations
+        timestamps, temperatures, humidities, wind_speeds = [], [], [], []
 
         source_id = None
 
@@ -43,21 +66,98 @@ class METExtractor(Extractor):
                     elif station_observation['elementId'] == 'wind_speed':
                         wind_speed = station_observation['value']
 
-                wd_point = WeatherDataPoint(temperature=temperature,
-                                            humidity=relative_humidity,
-                                            wind_speed=wind_speed,
-                                            timestamp=timestamp
-                                            )
-
-                weatherdatapoints.append(wd_point)
+                timestamps.append(timestamp)
+                temperatures.append(temperature)
+                humidities.append(relative_humidity)
+                wind_speeds.append(wind_speed)
 
         # TODO: maybe also source as part of the parameters - or extract weather data function instead
-        observations = Observations(source=source_id, location=location,data=weatherdatapoints)
+        observations = Observations(source=source_id, location=location,
+                                    series=WeatherSeries.from_columns(timestamps, temperatures, humidities, wind_speeds))
 
         return observations
 
+    def extract_observations_fast(self, frost_response_str: str, location: Location) -> Observations:
+
+        data_list = json.loads(frost_response_str)['data']
+
+        source_id = None
+        series = self._series([], [], [], [])
+
+        if len(data_list) > 1:
+
+            source_id = data_list[0]['sourceId']
+
+            # one column per element, missing elements are nan
+            columns = [[np.nan] * len(data_list) for _ in FROST_ELEMENTS]
+            for i, data in enumerate(data_list):
+                for station_observation in data['observations']:
+                    column = FROST_ELEMENTS.get(station_observation['elementId'])
+                    if column is not None:
+                        columns[column][i] = station_observation['value']
+
+            series = self._series([data['referenceTime'] for data in data_list], *columns)
+
+        return Observations.model_construct(source=source_id, location=location, series=series)
+
+    # as extract_observations, from the response body in chunks (str or utf-8 bytes, e.g., response.iter_content()).
+    # Observations are added to the columns as they are parsed, neither the body nor its decoded tree is held in
+    # memory.
+    def extract_observations_stream(self, chunks: Iterable, location: Location) -> Observations:
+
+        source_id = None
+        aware = True
+        timestamps = array.array('q')       # microseconds since the epoch, UTC
+        columns = [array.array('d') for _ in FROST_ELEMENTS]
+        pending = []
+
+        def parse_pending():
+            nonlocal aware
+            try:
+                timestamps.extend(parse_utc_timestamps(pending).astype(np.int64).tolist())
+            except ValueError:
+                parsed = [dateutil.parser.parse(timestamp) for timestamp in pending]
+                aware = aware and parsed[0].tzinfo is not None
+                parsed = [timestamp.astimezone(datetime.timezone.utc).replace(tzinfo=None) if timestamp.tzinfo else timestamp
+                          for timestamp in parsed]
+                timestamps.extend(np.array(parsed, dtype='datetime64[us]').astype(np.int64).tolist())
+            pending.clear()
+
+        for data in iter_array_items(chunks, 'data'):
+
+            if source_id is None:
+                source_id = data['sourceId']
+
+            values = [np.nan] * len(FROST_ELEMENTS)
+            for station_observation in data['observations']:
+                column = FROST_ELEMENTS.get(station_observation['elementId'])
+                if column is not None:
+                    values[column] = station_observation['value']
+
+            for column, value in zip(columns, values):
+                column.append(value)
+            pending.append(data['referenceTime'])
+
+            if len(pending) >= STREAM_BATCH:
+                parse_pending()
+
+        if pending:
+            parse_pending()
+
+        # as extract_observations, a single observation is left out
+        if len(timestamps) <= 1:
+            return Observations.model_construct(source=None, location=location, series=self._series([], [], [], []))
+
+        series = WeatherSeries(np.frombuffer(timestamps, dtype=np.int64).view('datetime64[us]'),
+                               *[np.frombuffer(column, dtype=float) for column in columns], aware=aware)
+
+        return Observations.model_construct(source=source_id, location=location, series=series)
+
     def extract_forecast(self, met_response_str: str) -> Forecast:
 
+        if self.fast:
+            return self.extract_forecast_fast(met_response_str)
+
         met_response = json.loads(met_response_str)
 
         coordinates = met_response['geometry']['coordinates']
@@ -69,7 +169,8 @@ class METExtractor(Extractor):
 
         timeseries = met_response['properties']['timeseries']
 
-        weatherdatapoints = list()
+        # columns of the forecast
+        timestamps, temperatures, humidities, wind_speeds = [], [], [], []
 
         for forecast in timeseries:
 
@@ -81,17 +182,41 @@ class METExtractor(Extractor):
             humidity = details['relative_humidity']
             wind_speed = details['wind_speed']
 
-            wd_point = WeatherDataPoint(temperature=temperature,
-                                        humidity=humidity,
-                                        wind_speed=wind_speed,
-                                        timestamp=timestamp)
+            timestamps.append(timestamp)
+            temperatures.append(temperature)
+            humidities.append(humidity)
+            wind_speeds.append(wind_speed)
 
-            weatherdatapoints.append(wd_point)
-
-        forecast = Forecast(location=location,data=weatherdatapoints)
+        forecast = Forecast(location=location,
+                            series=WeatherSeries.from_columns(timestamps, temperatures, humidities, wind_speeds))
 
         return forecast
 
+    def extract_forecast_fast(self, met_response_str: str) -> Forecast:
+
+        met_response = json.loads(met_response_str)
+
+        longitude, latitude = met_response['geometry']['coordinates'][:2]
+        timeseries = met_response['properties']['timeseries']
+
+        details = [forecast['data']['instant']['details'] for forecast in timeseries]
+
+        series = self._series([forecast['time'] for forecast in timeseries],
+                              [detail['air_temperature'] for detail in details],
+                              [detail['relative_humidity'] for detail in details],
+                              [detail['wind_speed'] for detail in details])
+
+        return Forecast.model_construct(location=Location(latitude=latitude, longitude=longitude), series=series)
+
+    @staticmethod
+    def _series(timestamps: list[str], temperatures, humidities, wind_speeds) -> WeatherSeries:
+        try:
+            # as WeatherSeries.from_columns, an empty series is not timezone aware
+            return WeatherSeries(parse_utc_timestamps(timestamps), temperatures, humidities, wind_speeds, aware=len(timestamps) > 0)
+        except ValueError:
+            return WeatherSeries.from_columns([dateutil.parser.parse(timestamp) for timestamp in timestamps],
+                                              temperatures, humidities, wind_speeds)
+
     def extract_weatherdata(self, frost_response: str, met_response: str, location: Location):
 
         observations = self.extract_observations(frost_response, location)
@@ -0,0 +1,92 @@
+import codecs
+import json
+from typing import Any, Iterable, Iterator
+
+""" Incremental parsing of the items of a JSON array in a response body given in chunks """
+
+# Large responses (e.g., Frost observations over weeks or several stations) are a JSON object with one large array
+# (e.g., 'data'). iter_array_items scans the object as the chunks of the body arrive and decodes one array item at a
+# time with json.JSONDecoder.raw_decode, such that only the current chunk and item are held in memory instead of the
+# full body and its decoded tree. Other members of the object are decoded and discarded.
+
+WHITESPACE = ' \t\n\r'
+
+
+class _Reader:
+
+    def __init__(self, chunks: Iterable):
+        self._chunks = iter(chunks)
+        self._utf8 = codecs.getincrementaldecoder('utf-8')()
+        self._decoder = json.JSONDecoder()
+        self.text = ''
+        self.pos = 0
+        self.exhausted = False
+
+    # appends the next chunk to the unread text, False at the end of the body
+    def _fill(self) -> bool:
+        if self.exhausted:
+            return False
+        try:
+            chunk = next(self._chunks)
+        except StopIteration:
+            self.exhausted = True
+            chunk = self._utf8.decode(b'', final=True)
+        else:
+            chunk = self._utf8.decode(chunk) if isinstance(chunk, (bytes, bytearray)) else chunk
+        self.text = self.text[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    # next character which is not whitespace (not consumed), '' at the end of the body
+    def peek(self) -> str:
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, char: str):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected '{char}' in JSON, found '{found}'")
+        self.pos += 1
+
+    def decode(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self.text, self.pos)
+                # numbers and literals at the end of the text may continue in the next chunk
+                if end < len(self.text) or self.exhausted:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.exhausted:
+                    raise
+            self._fill()
+
+
+# items of the array at member key of the JSON object in chunks (str or utf-8 bytes), in order
+def iter_array_items(chunks: Iterable, key: str) -> Iterator[Any]:
+
+    reader = _Reader(chunks)
+    reader.expect('{')
+
+    while reader.peek() != '}':
+        if reader.peek() == ',':
+            reader.expect(',')
+        name = reader.decode()
+        reader.expect(':')
+
+        if name != key:
+            reader.decode()
+            continue
+
+        reader.expect('[')
+        while reader.peek() != ']':
+            if reader.peek() == ',':
+                reader.expect(',')
+            yield reader.decode()
+        reader.expect(']')
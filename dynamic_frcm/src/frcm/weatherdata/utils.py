@@ -1,7 +1,11 @@
 import dateutil.parser
+import numpy as np
 
 from frcm.datamodel.model import WeatherDataPoint
 
+# UTC suffixes of ISO-8601 timestamps accepted by parse_utc_timestamps
+UTC_SUFFIXES = ('Z', '+00:00')
+
 
 def weatherdata_parse(datadict) -> list[WeatherDataPoint]:
 
@@ -23,3 +27,19 @@ def weatherdata_parse(datadict) -> list[WeatherDataPoint]:
 
     return data
 
+
+
+# fixed-format parsing of ISO-8601 UTC timestamps (YYYY-MM-DDTHH:MM:SS[.ffffff] followed by Z or +00:00, as in
+# the MET and Frost APIs) into datetime64[us]. Raises ValueError for other formats.
+def parse_utc_timestamps(timestamps: list[str]) -> np.ndarray:
+
+    stripped = []
+    for timestamp in timestamps:
+        for suffix in UTC_SUFFIXES:
+            if timestamp.endswith(suffix):
+                stripped.append(timestamp[:-len(suffix)])
+                break
+        else:
+            raise ValueError(f"Not an ISO-8601 UTC timestamp: '{timestamp}'")
+
+    return np.array(stripped, dtype='datetime64[us]')
@@ -0,0 +1,33 @@
+import datetime
+
+import numpy as np
+import pytest
+
+from frcm.datamodel.model import Forecast, Location, Observations, WeatherData, WeatherDataPoint
+
+
+def make_weatherdata(location=Location(latitude=60.383, longitude=5.3327),
+                     start=datetime.datetime(2025, 1, 20, tzinfo=datetime.timezone.utc),
+                     obs_hours=48, fct_hours=216, seed=0, temp_offset=0.0) -> WeatherData:
+
+    # synthetic hourly weather with a diurnal cycle and some noise
+    rng = np.random.default_rng(seed)
+    hours = np.arange(obs_hours + fct_hours)
+    temperature = 4 + temp_offset + 5 * np.sin(2 * np.pi * hours / 24) + rng.normal(0, 0.5, hours.size)
+    humidity = np.clip(75 - 15 * np.sin(2 * np.pi * hours / 24) + rng.normal(0, 3, hours.size), 5, 100)
+    wind_speed = np.abs(3 + rng.normal(0, 1, hours.size))
+
+    points = [WeatherDataPoint(temperature=temperature[h],
+                               humidity=humidity[h],
+                               wind_speed=wind_speed[h],
+                               timestamp=start + datetime.timedelta(hours=int(h))) for h in hours]
+
+    observations = Observations(source='SN50540', location=location, data=points[:obs_hours])
+    forecast = Forecast(location=location, data=points[obs_hours:])
+
+    return WeatherData(created=start + datetime.timedelta(hours=obs_hours), observations=observations, forecast=forecast)
+
+
+@pytest.fixture
+def weatherdata() -> WeatherData:
+    return make_weatherdata()
@@ -0,0 +1,53 @@
+import datetime
+
+import numpy as np
+import pytest
+
+import frcm.fireriskmodel.aggregate as ag
+import frcm.fireriskmodel.compute as compute
+
+
+def test_horizon_is_prefix_of_full_computation(weatherdata):
+    full = compute.compute(weatherdata)
+    end_time = full.firerisks[0].timestamp + datetime.timedelta(hours=30)
+
+    prediction = compute.compute(weatherdata, end_time=end_time)
+
+    assert len(prediction.firerisks) == 31
+    assert prediction.firerisks[-1].timestamp == end_time
+    assert [fr.ttf for fr in prediction.firerisks] == pytest.approx([fr.ttf for fr in full.firerisks[:31]])
+
+    start_time = end_time - datetime.timedelta(hours=6)
+    period = compute.compute(weatherdata, start_time=start_time, end_time=end_time)
+    assert [fr.timestamp for fr in period.firerisks] == [fr.timestamp for fr in full.firerisks[24:31]]
+
+    with pytest.raises(ValueError):
+        compute.compute(weatherdata, end_time=full.firerisks[0].timestamp - datetime.timedelta(hours=1))
+
+
+def test_aggregates_match_hourly_values(weatherdata):
+    full = compute.compute(weatherdata)
+    ttf = np.array([fr.ttf for fr in full.firerisks])
+
+    daily = compute.compute_aggregated(weatherdata, 'day', ('min', 'mean', 'p10'))
+
+    # synthetic weather starts at midnight
+    assert len(daily.firerisks) == 11
+    for k, window in enumerate(daily.firerisks):
+        day = ttf[24 * k:24 * (k + 1)]
+        assert window.start == full.firerisks[24 * k].timestamp
+        assert window.ttf['min'] == pytest.approx(day.min())
+        assert window.ttf['mean'] == pytest.approx(day.mean())
+        assert window.ttf['p10'] == pytest.approx(np.percentile(day, 10))
+
+    six_hourly = compute.compute_aggregated(weatherdata, '6h', ('max',), start_time=full.firerisks[3].timestamp,
+                                            end_time=full.firerisks[14].timestamp)
+    assert [window.ttf['max'] for window in six_hourly.firerisks] == pytest.approx([ttf[3:6].max(), ttf[6:12].max(), ttf[12:15].max()])
+
+
+def test_unknown_window_and_statistic(weatherdata):
+    with pytest.raises(ValueError):
+        compute.compute_aggregated(weatherdata, window='week')
+    with pytest.raises(ValueError):
+        compute.compute_aggregated(weatherdata, statistics=('median',))
+    assert ag.aggregate(datetime.datetime(2025, 1, 20), [], []) == []
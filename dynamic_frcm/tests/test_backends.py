@@ -0,0 +1,71 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+import frcm.fireriskmodel.backends as bk
+import frcm.fireriskmodel.compute as compute
+import frcm.fireriskmodel.parameters as mp
+import frcm.fireriskmodel.preprocess as pp
+from conftest import make_weatherdata
+
+
+@pytest.mark.parametrize('backend', bk.available_backends())
+def test_backend_matches_reference(backend, weatherdata):
+    _, _, temp, humidity, _, _ = pp.preprocess(weatherdata)
+
+    rh_in, ttf = compute.compute_fr(temp, humidity, backend=backend)
+    rh_in_ref, ttf_ref = compute.compute_fr_reference(temp, humidity)
+
+    np.testing.assert_allclose(ttf, ttf_ref, rtol=1e-10)
+    np.testing.assert_allclose(rh_in, rh_in_ref, rtol=1e-10)
+
+
+@pytest.mark.parametrize('backend', bk.available_backends())
+def test_backend_many_locations_and_state(backend):
+    rows = [pp.preprocess(make_weatherdata(seed=seed)) for seed in range(3)]
+    temp = np.stack([row[2] for row in rows])
+    humidity = np.stack([row[3] for row in rows])
+    cw_sat_in, beta, c_source = compute.compute_forcing(temp, humidity)
+
+    surface, rh_in, state = bk.march(cw_sat_in, beta, c_source, backend='numpy')
+
+    # march in two parts, resuming from the state where the first part ended
+    first, _, mid_state = bk.march(cw_sat_in[:, :100], beta[:, :100], c_source[:, :100], backend=backend)
+    second, _, end_state = bk.march(cw_sat_in[:, 99:], beta[:, 99:], c_source[:, 99:], mid_state, backend=backend)
+
+    np.testing.assert_allclose(np.concatenate([first, second[:, 1:]], axis=1), surface, rtol=1e-10)
+    np.testing.assert_allclose(end_state.wall, state.wall, rtol=1e-10)
+    np.testing.assert_allclose(end_state.cw_in, state.cw_in, rtol=1e-10)
+
+
+def test_threads_matches_numpy_and_is_reentrant():
+    rows = [pp.preprocess(make_weatherdata(seed=seed)) for seed in range(5)]
+    temp = np.stack([row[2] for row in rows])
+    humidity = np.stack([row[3] for row in rows])
+    params = [mp.ParameterSet(rho_wood=400 + 50 * n) for n in range(5)]
+    cw_sat_in, beta, c_source = compute.compute_forcing(temp, humidity, params)
+
+    surface, rh_in, state = bk.march(cw_sat_in, beta, c_source, backend='numpy', params=params)
+
+    # blocks of rows in threads, resumed from a per-location state
+    first, _, mid_state = bk.march_threads(cw_sat_in[:, :100], beta[:, :100], c_source[:, :100], params=params, workers=3)
+    second, _, end_state = bk.march_threads(cw_sat_in[:, 99:], beta[:, 99:], c_source[:, 99:], mid_state, params, workers=2)
+
+    np.testing.assert_allclose(np.concatenate([first, second[:, 1:]], axis=1), surface, rtol=1e-10)
+    np.testing.assert_allclose(end_state.wall, state.wall, rtol=1e-10)
+    np.testing.assert_allclose(end_state.rh_in, state.rh_in, rtol=1e-10)
+
+    # concurrent computations do not interfere
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(lambda n: compute.compute_fr(temp[n], humidity[n])[1], range(5)))
+    for n, ttf in enumerate(results):
+        np.testing.assert_array_equal(ttf, compute.compute_fr(temp[n], humidity[n])[1])
+
+
+def test_auto_selects_registered_backend():
+    assert bk.select_backend(locations=1) in bk.available_backends()
+    assert bk.select_backend(locations=1) not in bk.MANUAL_BACKENDS
+
+    with pytest.raises(ValueError):
+        bk.get_backend('unknown')
@@ -0,0 +1,98 @@
+import datetime
+
+import pytest
+
+import frcm.fireriskmodel.compute as compute
+import frcm.fireriskmodel.preprocess as pp
+from frcm.datamodel.model import Location
+from frcm.fireriskmodel.cache import ComputeCache, content_key
+from conftest import make_weatherdata
+
+
+def test_cached_prediction_equals_compute(weatherdata):
+    cache = ComputeCache()
+
+    first = cache.compute(weatherdata)
+    second = cache.compute(weatherdata)
+
+    assert first == compute.compute(weatherdata)
+    assert second == first
+    assert cache.stats().hits == 1
+    assert cache.stats().misses == 1
+    assert cache.stats().size_bytes > 0
+
+
+def test_locations_with_same_weather_share_entries():
+    cache = ComputeCache()
+    haugesund = Location(latitude=59.4225, longitude=5.2480)
+
+    cache.compute(make_weatherdata())
+    prediction = cache.compute(make_weatherdata(location=haugesund))
+
+    assert prediction.location == haugesund
+    assert cache.stats().hits == 1
+
+    # different weather, horizon or output start are different entries
+    cache.compute(make_weatherdata(seed=1))
+    end_time = prediction.firerisks[48].timestamp
+    horizon = cache.compute(make_weatherdata(), end_time=end_time)
+    assert horizon == compute.compute(make_weatherdata(), end_time=end_time)
+    assert cache.stats().misses == 3
+
+
+def test_checkpointed_entries(weatherdata):
+    cache = ComputeCache()
+
+    prediction, checkpoint = cache.compute_checkpointed(weatherdata)
+    resumed = cache.compute_checkpointed(weatherdata, checkpoint)
+    assert resumed == compute.compute_checkpointed(weatherdata, checkpoint)
+
+    assert cache.compute_checkpointed(weatherdata) == (prediction, checkpoint)
+    assert cache.stats().hits == 1
+
+
+def test_miss_preprocesses_once(weatherdata, monkeypatch):
+    calls = []
+
+    class Counted(pp.Interpolator):
+        def preprocess(self):
+            calls.append(self)
+            return super().preprocess()
+
+    monkeypatch.setattr(pp, 'Interpolator', Counted)
+    cache = ComputeCache()
+
+    cache.compute_series(weatherdata, checked=True)
+    assert len(calls) == 1
+
+    cache.compute_checkpointed_series(weatherdata)
+    assert len(calls) == 2
+
+
+def test_lru_eviction_by_size(weatherdata):
+    probe = ComputeCache()
+    probe.compute(weatherdata)
+    entry_bytes = probe.stats().size_bytes
+
+    cache = ComputeCache(max_bytes=2 * entry_bytes)
+    wds = [make_weatherdata(seed=seed) for seed in range(3)]
+    for wd in wds:
+        cache.compute(wd)
+
+    stats = cache.stats()
+    assert stats.entries == 2
+    assert stats.evictions == 1
+    assert stats.size_bytes <= stats.max_bytes
+
+    # the least recently used (first) entry was evicted
+    cache.compute(wds[2])
+    cache.compute(wds[0])
+    assert cache.stats().hits == 1
+
+
+def test_content_key_is_stable():
+    start = datetime.datetime(2025, 1, 20, tzinfo=datetime.timezone.utc)
+
+    assert content_key([1.0, 2.0], start=start) == content_key([1.0, 2.0], start=start)
+    assert content_key([1.0, 2.0], start=start) != content_key([1.0, 2.0000001], start=start)
+    assert content_key([1.0, 2.0]) != content_key([[1.0, 2.0]])
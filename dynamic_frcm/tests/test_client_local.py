@@ -0,0 +1,94 @@
+import datetime
+
+import numpy as np
+import pytest
+
+import frcm.fireriskmodel.compute as compute
+from frcm.datamodel.model import Location, Observations
+from frcm.frcapi import FireRiskAPI
+from frcm.weatherdata.client_local import LocalClient, write_archive
+from conftest import make_weatherdata
+
+BERGEN = Location(latitude=60.383, longitude=5.3327)
+HAUGESUND = Location(latitude=59.4225, longitude=5.2480)
+START = datetime.datetime(2025, 1, 20, tzinfo=datetime.timezone.utc)
+
+
+@pytest.fixture
+def archive(tmp_path):
+    bergen = make_weatherdata(location=BERGEN, start=START, obs_hours=240, fct_hours=48, seed=1)
+    haugesund = make_weatherdata(location=HAUGESUND, start=START, obs_hours=240, fct_hours=48, seed=2)
+
+    # the observations of Bergen are written in two overlapping parts
+    first = Observations(source='SN50540', location=BERGEN, data=bergen.observations.data[:150])
+    second = Observations(source='SN50540', location=BERGEN, data=bergen.observations.data[100:])
+    other = Observations(source='SN47300', location=HAUGESUND, data=haugesund.observations.data)
+
+    # a second forecast run for Bergen, issued 12 hours after the first
+    later = make_weatherdata(location=BERGEN, start=START, obs_hours=252, fct_hours=48, seed=3)
+
+    forecasts = [(bergen.created, bergen.forecast), (haugesund.created, haugesund.forecast), (later.created, later.forecast)]
+    write_archive(tmp_path, [first, other, second], forecasts)
+    return tmp_path, bergen, haugesund, later
+
+
+def test_fetch_observations(archive):
+    path, bergen, haugesund, _ = archive
+    client = LocalClient(path)
+
+    assert [station for station, _ in client.stations()] == ['SN50540', 'SN47300']
+    assert client.get_nearest_station_id(Location(latitude=59.5, longitude=5.3)) == 'SN47300'
+
+    start, end = START + datetime.timedelta(hours=30), START + datetime.timedelta(hours=130)
+    observations = client.fetch_observations(BERGEN, start, end)
+
+    assert observations.source == 'SN50540'
+    assert observations.series == bergen.observations.series.between(start, end)
+    assert observations.data[0].timestamp == start and observations.data[-1].timestamp == end
+
+    # the series is a view of the mapped archive
+    assert not observations.series.temperature.flags.owndata
+    assert not observations.series.temperature.flags.writeable
+
+    # naive times are local time
+    naive = client.fetch_observations(HAUGESUND, start.astimezone().replace(tzinfo=None), end.astimezone().replace(tzinfo=None))
+    assert naive.series == haugesund.observations.series.between(start, end)
+
+    assert len(client.fetch_observations(BERGEN, START - datetime.timedelta(days=2), START - datetime.timedelta(days=1)).series) == 0
+
+
+def test_fetch_forecast(archive):
+    path, bergen, _, later = archive
+
+    # the latest run issued at or before now, up to the end of that run
+    now = START + datetime.timedelta(hours=250)
+    forecast = LocalClient(path, now=now).fetch_forecast(Location(latitude=60.4, longitude=5.3))
+
+    assert forecast.location == BERGEN
+    assert forecast.series == bergen.forecast.series.between(now + datetime.timedelta(hours=1))
+    assert forecast.series.last() == bergen.forecast.series.last()
+
+    now = START + datetime.timedelta(hours=260)
+    forecast = LocalClient(path, now=now).fetch_forecast(BERGEN)
+    assert forecast.series == later.forecast.series.between(now + datetime.timedelta(hours=1))
+
+    # no forecast issued yet
+    assert len(LocalClient(path, now=START).fetch_forecast(BERGEN).series) == 0
+
+    write_archive(path, [bergen.observations])
+    assert len(LocalClient(path).fetch_forecast(BERGEN).series) == 0
+
+
+def test_compute_period(archive):
+    path, bergen, _, _ = archive
+    now = START + datetime.timedelta(hours=240)
+    frc = FireRiskAPI(client=LocalClient(path, now=now))
+
+    start, end = START + datetime.timedelta(hours=24), START + datetime.timedelta(hours=200)
+    prediction = frc.compute_period(BERGEN, start, end)
+
+    expected = compute.compute(bergen.model_copy(update={'observations': bergen.observations.model_copy(
+        update={'series': bergen.observations.series.between(start, end)})}))
+    assert prediction.firerisks[0].timestamp == start
+    assert [fr.ttf for fr in prediction.firerisks] == pytest.approx([fr.ttf for fr in expected.firerisks[:len(prediction.firerisks)]])
+    assert np.isfinite([fr.ttf for fr in prediction.firerisks]).all()
@@ -0,0 +1,266 @@
+import collections
+import dataclasses
+import datetime
+import tracemalloc
+
+import numpy as np
+import pytest
+
+import frcm.fireriskmodel.backends as bk
+import frcm.fireriskmodel.compute as compute
+import frcm.fireriskmodel.implicit as im
+import frcm.fireriskmodel.kernels as kn
+import frcm.fireriskmodel.parameters as mp
+import frcm.fireriskmodel.precision as precision
+import frcm.fireriskmodel.preprocess as pp
+from frcm.datamodel.model import Forecast, Observations, WeatherData
+from frcm.datamodel.series import FireRiskSeries, WeatherSeries
+from conftest import make_weatherdata
+
+
+def test_compute_fr_matches_reference(weatherdata):
+    _, _, temp, humidity, _, _ = pp.preprocess(weatherdata)
+
+    rh_in, ttf = compute.compute_fr(temp, humidity)
+    rh_in_ref, ttf_ref = compute.compute_fr_reference(temp, humidity)
+
+    np.testing.assert_allclose(ttf, ttf_ref, rtol=1e-10)
+    np.testing.assert_allclose(rh_in, rh_in_ref, rtol=1e-10)
+
+
+def test_preprocess_prefers_observations_over_overlapping_forecast(weatherdata):
+    # forecast from 6 hours before the last observation, with different values at the overlapping timestamps
+    overlap = make_weatherdata(seed=1)
+    series = overlap.observations.series[42:48]
+    series.temperature = series.temperature + 10
+    forecast = Forecast(location=weatherdata.forecast.location,
+                        series=WeatherSeries.concat(series, weatherdata.forecast.series))
+    overlapping = WeatherData(created=weatherdata.created, observations=weatherdata.observations, forecast=forecast)
+
+    expected = pp.preprocess(weatherdata)
+    for value, expected_value in zip(pp.preprocess(overlapping), expected):
+        np.testing.assert_array_equal(value, expected_value)
+
+    # the columns survive the JSON representation
+    assert WeatherData.model_validate_json(overlapping.model_dump_json()) == overlapping
+
+
+def test_compute_hourly_prediction(weatherdata):
+    prediction = compute.compute(weatherdata)
+
+    assert len(prediction.firerisks) == 48 + 216
+    assert prediction.location == weatherdata.forecast.location
+    assert prediction.firerisks[0].timestamp == weatherdata.observations.data[0].timestamp
+    assert all(1 < fr.ttf < 20 for fr in prediction.firerisks)
+
+
+def test_compute_many_matches_single_location():
+    wds = [make_weatherdata(seed=seed, temp_offset=2.0 * seed) for seed in range(3)]
+
+    predictions = compute.compute_many(wds)
+
+    assert len(predictions) == 3
+    for wd, prediction in zip(wds, predictions):
+        expected = compute.compute(wd)
+        assert [fr.timestamp for fr in prediction.firerisks] == [fr.timestamp for fr in expected.firerisks]
+        np.testing.assert_allclose([fr.ttf for fr in prediction.firerisks],
+                                   [fr.ttf for fr in expected.firerisks], rtol=1e-10)
+
+
+def test_compute_many_uses_shared_time_span():
+    early = make_weatherdata(start=datetime.datetime(2025, 1, 20, tzinfo=datetime.timezone.utc))
+    late = make_weatherdata(start=datetime.datetime(2025, 1, 20, 6, tzinfo=datetime.timezone.utc))
+
+    predictions = compute.compute_many([early, late])
+
+    assert predictions[0].firerisks[0].timestamp == late.observations.data[0].timestamp
+    assert predictions[0].firerisks[-1].timestamp == early.forecast.data[-1].timestamp
+    assert len(predictions[0].firerisks) == len(predictions[1].firerisks) == 48 + 216 - 6
+
+
+def test_compute_resumes_from_checkpoint(weatherdata):
+    prediction, checkpoint = compute.compute_checkpointed(weatherdata)
+
+    # checkpoint is taken at the last observation
+    assert checkpoint.timestamp == weatherdata.observations.data[-1].timestamp
+    np.testing.assert_allclose([fr.ttf for fr in prediction.firerisks],
+                               [fr.ttf for fr in compute.compute(weatherdata).firerisks], rtol=1e-10)
+
+    resumed, _ = compute.compute_checkpointed(weatherdata, checkpoint)
+
+    assert resumed.firerisks[0].timestamp == checkpoint.timestamp
+    np.testing.assert_allclose([fr.ttf for fr in resumed.firerisks],
+                               [fr.ttf for fr in prediction.firerisks[47:]], rtol=1e-10)
+
+
+def test_compute_stream_matches_compute(weatherdata):
+    expected = compute.compute(weatherdata)
+
+    firerisks = list(compute.compute_stream(weatherdata))
+
+    assert [fr.timestamp for fr in firerisks] == [fr.timestamp for fr in expected.firerisks]
+    np.testing.assert_allclose([fr.ttf for fr in firerisks], [fr.ttf for fr in expected.firerisks], rtol=1e-10)
+    np.testing.assert_allclose([fr.wind_speed for fr in firerisks], [fr.wind_speed for fr in expected.firerisks])
+
+    for chunk_hours in (1, 7, 500):
+        firerisks = list(compute.compute_stream(weatherdata, chunk_hours=chunk_hours, backend='numpy'))
+        np.testing.assert_allclose([fr.ttf for fr in firerisks], [fr.ttf for fr in expected.firerisks], rtol=1e-10)
+
+    with pytest.raises(ValueError):
+        next(compute.compute_stream(weatherdata, chunk_hours=0))
+
+
+def test_compute_stream_memory():
+    wd = make_weatherdata(obs_hours=2000, fct_hours=0)
+    # warm-up: the columnar series is a cached property, built here so neither measurement below pays for it
+    series = wd.observations.series
+    assert len(series) == 2000
+
+    # the interpolated vectors of the full period are never built
+    tracemalloc.start()
+    pp.preprocess(wd)
+    preprocessed = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    # numpy backend, the first numba call allocates for compilation
+    collections.deque(compute.compute_stream(wd, backend='numpy'), maxlen=0)
+    streamed = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    assert streamed < preprocessed / 3
+
+
+def test_implicit_integrator_within_tolerance(weatherdata):
+    explicit = compute.compute(weatherdata)
+    implicit = compute.compute(weatherdata, integrator='implicit')
+
+    deviation = np.abs(np.array([fr.ttf for fr in implicit.firerisks]) - [fr.ttf for fr in explicit.firerisks])
+    assert deviation.max() < 0.05
+
+
+def test_implicit_integrator_stable_for_large_steps(weatherdata):
+    _, _, temp, humidity, _, _ = pp.preprocess(weatherdata)
+
+    # steps of 2 days, far beyond the stability limit of the explicit scheme
+    surface, rh_in, _ = im.march_implicit(temp, humidity, max_steps=240, tol_temp=100, tol_rh=100)
+    ttf = kn.calc_ttf(surface)
+
+    assert np.all((ttf > 1) & (ttf < 20))
+    assert np.all((rh_in > 0) & (rh_in < 1))
+
+
+def test_archetypes_match_single_parameter_sets(weatherdata):
+    archetypes = [mp.DEFAULT_PARAMETERS,
+                  dataclasses.replace(mp.DEFAULT_PARAMETERS, Vol=200, A_ex=80),
+                  dataclasses.replace(mp.DEFAULT_PARAMETERS, rho_wood=450, gamma=300, T_c_in=19)]
+    _, _, temp, humidity, _, _ = pp.preprocess(weatherdata)
+
+    predictions = compute.compute_archetypes(weatherdata, archetypes)
+
+    assert [fr.ttf for fr in predictions[0].firerisks] == pytest.approx([fr.ttf for fr in compute.compute(weatherdata).firerisks])
+    for params, prediction in zip(archetypes, predictions):
+        _, ttf = compute.compute_fr(temp, humidity, params=params)
+        np.testing.assert_allclose([fr.ttf for fr in prediction.firerisks], ttf[::5], rtol=1e-10)
+
+
+def test_archetype_profiles(weatherdata):
+    archetypes = [mp.DEFAULT_PARAMETERS, dataclasses.replace(mp.DEFAULT_PARAMETERS, T_c_in=19, supply_24h=2)]
+
+    # constant profiles are the same as the values of the parameter sets
+    constant = compute.compute_archetypes(weatherdata, archetypes, temp_c_in=[[22] * 24, [19] * 24], supply_24h=[[1] * 24, [2] * 24])
+    for prediction, expected in zip(constant, compute.compute_archetypes(weatherdata, archetypes)):
+        np.testing.assert_allclose([fr.ttf for fr in prediction.firerisks], [fr.ttf for fr in expected.firerisks], rtol=1e-10)
+
+    # night setback of the indoor temperature
+    setback = compute.compute_archetypes(weatherdata, archetypes[:1], temp_c_in=[18] * 6 + [22] * 18)
+    assert [fr.ttf for fr in setback[0].firerisks] != pytest.approx([fr.ttf for fr in constant[0].firerisks])
+
+    with pytest.raises(ValueError):
+        compute.compute_archetypes(weatherdata, archetypes, temp_c_in=[22] * 12)
+
+
+def test_parameter_set_is_immutable():
+    params = dataclasses.replace(mp.DEFAULT_PARAMETERS, Vol=240)
+
+    assert params.k_wall == pytest.approx(mp.DEFAULT_PARAMETERS.k_wall / 2)
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        params.Vol = 120
+    with pytest.raises(ValueError):
+        mp.ParameterSet(Vol=0)
+
+
+def test_first_crossing_matches_full_prediction(weatherdata):
+    ttf = [fr.ttf for fr in compute.compute(weatherdata).firerisks]
+    timestamps = [fr.timestamp for fr in compute.compute(weatherdata).firerisks]
+
+    threshold = float(np.percentile(ttf[100:], 20))
+    i = next(i for i in range(100, len(ttf)) if ttf[i] < threshold)
+
+    for chunk_hours in (1, 7, 24):
+        crossing = compute.first_crossing(weatherdata, threshold, start_time=timestamps[100], chunk_hours=chunk_hours)
+        assert crossing.timestamp == timestamps[i]
+        assert crossing.ttf == pytest.approx(ttf[i])
+
+    # the first hour is included in the search
+    assert compute.first_crossing(weatherdata, ttf[0] + 1e-9).timestamp == timestamps[0]
+
+    # no crossing before the horizon
+    crossing = compute.first_crossing(weatherdata, min(ttf), end_time=timestamps[i - 1])
+    assert crossing.timestamp is None and crossing.ttf is None
+
+    for chunk_hours in (0, -1):
+        with pytest.raises(ValueError):
+            compute.first_crossing(weatherdata, threshold, chunk_hours=chunk_hours)
+
+
+def test_series_equals_compute(weatherdata):
+    start_time = weatherdata.observations.data[10].timestamp + datetime.timedelta(minutes=30)
+    prediction = compute.compute(weatherdata, start_time=start_time)
+    series = compute.compute_series(weatherdata, start_time=start_time)
+
+    assert series.start == weatherdata.observations.data[11].timestamp
+    assert series.to_prediction() == prediction
+    assert FireRiskSeries.from_prediction(prediction) == series
+    assert FireRiskSeries.from_binary(series.to_binary()) == series
+    assert FireRiskSeries.from_columns(series.to_columns()) == series
+
+
+def test_chunked_equals_compute(weatherdata):
+    points = weatherdata.observations.data + weatherdata.forecast.data
+    location = weatherdata.forecast.location
+
+    # overlapping chunks, and chunks too short for a timestep
+    bounds = [(0, 1), (1, 2), (0, 50), (50, 51), (40, 180), (180, 264)]
+    chunks = [WeatherData(created=weatherdata.created,
+                          observations=Observations(source='SN50540', location=location, data=points[begin:end]),
+                          forecast=Forecast(location=location, data=[])) for begin, end in bounds]
+
+    prediction = compute.compute(weatherdata)
+    assert list(compute.compute_chunked(chunks)) == prediction.firerisks
+
+    start_time = prediction.firerisks[40].timestamp
+    end_time = prediction.firerisks[100].timestamp
+    assert list(compute.compute_chunked(chunks, start_time, end_time)) == prediction.firerisks[40:101]
+
+
+@pytest.mark.parametrize('backend', ['numpy', 'threads'] + (['numba'] if 'numba' in bk.available_backends() else []))
+def test_single_precision_within_tolerance(backend):
+    wds = [make_weatherdata(seed=seed, temp_offset=2.0 * seed) for seed in range(3)]
+
+    _, _, temp, humidity, _, _ = pp.preprocess(wds[0], dtype=np.float32)
+    assert temp.dtype == np.float32
+
+    rh_in, ttf = compute.compute_fr(np.stack([temp, temp]), np.stack([humidity, humidity]), backend=backend, dtype=np.float32)
+    assert ttf.dtype == np.float32 and rh_in.dtype == np.float32
+
+    report = precision.compare_precision(wds, backend=backend)
+    assert report.max_rel_error < 1e-4
+
+    # temperature, humidity, RH_in and ttf for each location and timestep
+    steps = len(pp.preprocess(wds[0])[1])
+    assert report.bytes_float64 == 4 * len(wds) * steps * 8
+    assert report.bytes_float32 == 4 * len(wds) * steps * 4
+
+    with pytest.raises(ValueError):
+        compute.compute_fr(temp, humidity, dtype=np.float16)
@@ -0,0 +1,40 @@
+import numpy as np
+
+import frcm.fireriskmodel.compute as compute
+import frcm.fireriskmodel.ensemble as ens
+from conftest import make_weatherdata
+
+
+def test_single_scenario_equals_compute(weatherdata):
+    ensemble = ens.compute_ensemble(weatherdata, quantiles=[0.5])
+    prediction = compute.compute(weatherdata)
+
+    assert ensemble.scenarios == 1
+    assert [fr.timestamp for fr in ensemble.firerisks] == [fr.timestamp for fr in prediction.firerisks]
+    np.testing.assert_allclose([fr.ttf[0] for fr in ensemble.firerisks], [fr.ttf for fr in prediction.firerisks], rtol=1e-10)
+
+
+def test_perturbations_and_members(weatherdata):
+    perturbations = [ens.Perturbation(temperature=2.0), ens.Perturbation(humidity=-0.1)]
+    members = [make_weatherdata(seed=seed) for seed in range(1, 4)]
+
+    ensemble = ens.compute_ensemble(weatherdata, perturbations, members)
+
+    # the unperturbed members are included
+    assert ensemble.scenarios == 12
+    assert ens.compute_ensemble(weatherdata, [ens.Perturbation()] + perturbations, members).scenarios == 12
+    assert ensemble.quantiles == list(ens.QUANTILES)
+
+    ttf = np.array([fr.ttf for fr in ensemble.firerisks])
+    assert np.all(np.diff(ttf, axis=1) >= 0)
+
+    # each scenario on its own is within the range of the ensemble
+    ensemble = ens.compute_ensemble(weatherdata, perturbations, members, quantiles=[0.0, 1.0])
+    ttf = np.array([fr.ttf for fr in ensemble.firerisks])
+    scenario = make_weatherdata(seed=2)
+    for series in (scenario.observations.series, scenario.forecast.series):
+        series.humidity = np.minimum(series.humidity * 0.9, 100)
+    for wd in (scenario, weatherdata):
+        single = [fr.ttf for fr in compute.compute(wd).firerisks]
+        assert np.all(ttf[:, 0] <= np.array(single) + 1e-9)
+        assert np.all(np.array(single) <= ttf[:, -1] + 1e-9)
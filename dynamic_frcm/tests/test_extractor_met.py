@@ -0,0 +1,114 @@
+import datetime
+import json
+import tracemalloc
+
+import numpy as np
+import pytest
+import requests
+import responses
+
+from frcm.datamodel.model import Location
+from frcm.weatherdata.client_met import METClient
+from frcm.weatherdata.extractor_met import METExtractor
+
+LOCATION = Location(latitude=60.383, longitude=5.3327)
+START = datetime.datetime(2025, 1, 20, tzinfo=datetime.timezone.utc)
+
+
+# Frost observations response, hourly from start, with an element which is not used and some missing values
+def frost_response(hours: int = 240, seed: int = 0, time_format: str = '%Y-%m-%dT%H:%M:%S.000Z') -> str:
+    rng = np.random.default_rng(seed)
+    data = []
+    for h in range(hours):
+        values = {'air_temperature': rng.normal(4, 3), 'relative_humidity': rng.uniform(40, 100),
+                  'wind_speed': rng.uniform(0, 10), 'wind_from_direction': rng.uniform(0, 360)}
+        if h % 17 == 5:
+            del values['relative_humidity']
+        observations = [{'elementId': element, 'value': round(value, 1), 'unit': 'unit', 'level': {}, 'timeOffset': 'PT0H',
+                         'timeResolution': 'PT1H', 'qualityCode': 0} for element, value in values.items()]
+        data.append({'sourceId': 'SN50540:0', 'referenceTime': (START + datetime.timedelta(hours=h)).strftime(time_format),
+                     'observations': observations})
+    return json.dumps({'@context': 'https://frost.met.no/schema', '@type': 'ObservationResponse', 'data': data})
+
+
+# locationforecast response - hourly for 60 hours, then 6-hourly for 10 days
+def met_response(seed: int = 0, time_format: str = '%Y-%m-%dT%H:%M:%SZ') -> str:
+    rng = np.random.default_rng(seed)
+    hours = list(range(60)) + list(range(60, 240, 6))
+    timeseries = [{'time': (START + datetime.timedelta(hours=h)).strftime(time_format),
+                   'data': {'instant': {'details': {'air_pressure_at_sea_level': 1010.2, 'air_temperature': round(rng.normal(4, 3), 1),
+                                                    'cloud_area_fraction': 80.0, 'relative_humidity': round(rng.uniform(40, 100), 1),
+                                                    'wind_from_direction': 180.0, 'wind_speed': round(rng.uniform(0, 10), 1)}},
+                            'next_1_hours': {'summary': {'symbol_code': 'rain'}, 'details': {'precipitation_amount': 0.2}}}}
+                  for h in hours]
+    return json.dumps({'type': 'Feature', 'geometry': {'type': 'Point', 'coordinates': [LOCATION.longitude, LOCATION.latitude, 12]},
+                       'properties': {'meta': {'updated_at': '2025-01-20T00:00:00Z'}, 'timeseries': timeseries}})
+
+
+def test_fast_path_equals_reference():
+    fast, reference = METExtractor(), METExtractor(fast=False)
+
+    # timestamps in other formats than UTC are parsed by dateutil
+    for frost in (frost_response(), frost_response(time_format='%Y-%m-%dT%H:%M:%S+01:00')):
+        assert fast.extract_observations(frost, LOCATION) == reference.extract_observations(frost, LOCATION)
+
+    for met in (met_response(), met_response(time_format='%Y-%m-%dT%H:%M:%S+00:00')):
+        assert fast.extract_forecast(met) == reference.extract_forecast(met)
+
+    observations = fast.extract_observations(frost_response(), LOCATION)
+    assert np.isnan(observations.series.humidity[5]) and not np.isnan(observations.series.temperature[5])
+    assert observations.data[0].timestamp == START
+
+
+def chunked(body: bytes, size: int):
+    return (body[i:i + size] for i in range(0, len(body), size))
+
+
+def test_stream_equals_fast_path():
+    extractor = METExtractor()
+
+    for frost in (frost_response(), frost_response(hours=1500, seed=1), frost_response(time_format='%Y-%m-%dT%H:%M:%S+01:00')):
+        expected = extractor.extract_observations(frost, LOCATION)
+        for size in (7, 4096):
+            assert extractor.extract_observations_stream(chunked(frost.encode(), size), LOCATION) == expected
+
+    # members after the data and text chunks
+    frost = frost_response(hours=30)[:-1] + ', "totalItemCount": 30, "nested": {"data": [1]}}'
+    assert extractor.extract_observations_stream(iter([frost[:100], frost[100:]]), LOCATION) == extractor.extract_observations(frost, LOCATION)
+
+
+def test_stream_memory_is_flat():
+    extractor = METExtractor()
+    frost = frost_response(hours=5000)
+    body = frost.encode()
+
+    tracemalloc.start()
+    extractor.extract_observations(frost, LOCATION)
+    _, peak_fast = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    extractor.extract_observations_stream(chunked(body, 16384), LOCATION)
+    _, peak_stream = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    assert peak_stream * 10 < peak_fast
+
+
+@responses.activate
+def test_client_streams_observations(monkeypatch):
+    monkeypatch.setenv('MET_CLIENT_ID', 'id')
+    monkeypatch.setenv('MET_CLIENT_SECRET', 'secret')
+
+    frost = frost_response(hours=100)
+    responses.add(responses.GET, 'https://frost.met.no/sources/v0.jsonld', json={'data': [{'id': 'SN50540'}]})
+    responses.add(responses.GET, 'https://frost.met.no/observations/v0.jsonld', body=frost)
+
+    client = METClient(METExtractor(), stream=True)
+    observations = client.fetch_observations(LOCATION, START, START + datetime.timedelta(hours=100))
+
+    assert observations == METExtractor().extract_observations(frost, LOCATION)
+
+    # Frost errors are raised, not parsed as no observations
+    responses.replace(responses.GET, 'https://frost.met.no/observations/v0.jsonld', status=412,
+                      json={'error': {'code': 412, 'message': 'No data found'}})
+    with pytest.raises(requests.HTTPError):
+        client.fetch_observations(LOCATION, START, START + datetime.timedelta(hours=100))
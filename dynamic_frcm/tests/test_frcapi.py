@@ -0,0 +1,146 @@
+import datetime
+
+import pytest
+
+import frcm.fireriskmodel.compute as compute
+import frcm.fireriskmodel.spinup as spinup
+from frcm.datamodel.model import Forecast, Location, Observations
+from frcm.frcapi import FireRiskAPI
+from frcm.weatherdata.client import WeatherDataClient
+from conftest import make_weatherdata
+
+
+class FakeClient(WeatherDataClient):
+
+    # serves the synthetic weather data, with the observations up to now
+    def __init__(self, now: datetime.datetime, past_hours: int = 48):
+        self.wd = make_weatherdata(start=now - datetime.timedelta(hours=past_hours), obs_hours=past_hours)
+        self.now = now
+        self.fetched = []
+
+    def fetch_observations(self, location: Location, start: datetime.datetime, end: datetime.datetime) -> Observations:
+        # get_wd_now gives naive local times
+        start, end = start.astimezone(datetime.timezone.utc), end.astimezone(datetime.timezone.utc)
+        self.fetched.append((start, end))
+        data = [wdp for wdp in self.wd.observations.data + self.wd.forecast.data if start <= wdp.timestamp <= end]
+        return Observations(source='SN50540', location=location, data=data)
+
+    def fetch_forecast(self, location: Location) -> Forecast:
+        data = [wdp for wdp in self.wd.forecast.data if wdp.timestamp > self.now]
+        return Forecast(location=location, data=data)
+
+
+def test_compute_period():
+    now = datetime.datetime.now(datetime.timezone.utc).replace(minute=0, second=0, microsecond=0)
+    client = FakeClient(now)
+    frc = FireRiskAPI(client=client)
+    location = Location(latitude=60.383, longitude=5.3327)
+
+    start = now - datetime.timedelta(hours=24)
+    end = now + datetime.timedelta(hours=24)
+
+    prediction = frc.compute_period(location, start, end)
+
+    assert prediction.firerisks[0].timestamp == start
+    assert prediction.firerisks[-1].timestamp == end
+
+    # the simulation starts at the first fetched observation
+    wd = frc.get_wd_period(location, start, end)
+    expected = compute.compute(wd)
+    assert [fr.ttf for fr in prediction.firerisks] == pytest.approx([fr.ttf for fr in expected.firerisks[:49]])
+
+    assert frc.compute_period_delta(location, start, end - start) == prediction
+
+    daily = frc.compute_period_aggregated(location, start, end, window='day', statistics=('min',))
+    assert min(window.ttf['min'] for window in daily.firerisks) == pytest.approx(min(fr.ttf for fr in prediction.firerisks))
+
+
+def test_first_crossing():
+    now = datetime.datetime.now(datetime.timezone.utc).replace(minute=0, second=0, microsecond=0)
+    frc = FireRiskAPI(client=FakeClient(now))
+    location = Location(latitude=60.383, longitude=5.3327)
+
+    crossing = frc.first_crossing(location, threshold=100.0)
+    assert crossing.timestamp == now
+
+    crossing = frc.first_crossing(location, threshold=0.0, fct_delta=datetime.timedelta(hours=12))
+    assert crossing.timestamp is None
+
+
+def test_compute_period_reanalysis_in_monthly_chunks():
+    now = datetime.datetime.now(datetime.timezone.utc).replace(minute=0, second=0, microsecond=0)
+    client = FakeClient(now, past_hours=24 * 80)
+    frc = FireRiskAPI(client=client)
+    location = Location(latitude=60.383, longitude=5.3327)
+
+    start = now - datetime.timedelta(days=75)
+    end = now - datetime.timedelta(days=1)
+
+    stream = frc.compute_period_stream(location, start, end)
+    first = next(stream)
+    assert first.timestamp == start
+    assert len(client.fetched) == 1
+
+    firerisks = [first] + list(stream)
+    assert len(client.fetched) >= 3
+    assert all(chunk_end - chunk_start <= datetime.timedelta(days=31) for chunk_start, chunk_end in client.fetched)
+    assert firerisks[-1].timestamp == end
+
+    # same as a single computation over all the weather data
+    wd = frc.get_wd_period(location, start, end)
+    expected = compute.compute(wd, start_time=start, end_time=end)
+    assert [fr.timestamp for fr in firerisks] == [fr.timestamp for fr in expected.firerisks]
+    assert [fr.ttf for fr in firerisks] == pytest.approx([fr.ttf for fr in expected.firerisks], rel=1e-12)
+
+
+def test_get_wd_now_adaptive():
+    now = datetime.datetime.now(datetime.timezone.utc).replace(minute=0, second=0, microsecond=0)
+    client = FakeClient(now, past_hours=24 * 10)
+    frc = FireRiskAPI(client=client)
+    location = Location(latitude=60.383, longitude=5.3327)
+
+    wd = frc.get_wd_now_adaptive(location)
+
+    # the longest window is fetched once, and the selected window is sliced from it
+    window = frc.spinup_cache.get('SN50540', now)
+    assert window in spinup.WINDOWS
+    assert len(client.fetched) == 1
+    assert client.fetched[0][1] - client.fetched[0][0] == spinup.WINDOWS[-1]
+    timestamps = [wdp.timestamp for wdp in wd.observations.data]
+    assert timestamps == sorted(set(timestamps))
+    assert timestamps[0] >= now - window - datetime.timedelta(hours=1)
+
+    # the cached window is fetched directly, in one request
+    client.fetched = []
+    cached = frc.get_wd_now_adaptive(location)
+    assert len(client.fetched) == 1
+    assert client.fetched[0][1] - client.fetched[0][0] == window
+    assert cached.observations.data == wd.observations.data
+
+
+def test_get_wd_now_checkpointed():
+    now = datetime.datetime.now(datetime.timezone.utc).replace(minute=0, second=0, microsecond=0)
+    client = FakeClient(now)
+    frc = FireRiskAPI(client=client)
+    location = Location(latitude=60.383, longitude=5.3327)
+
+    _, checkpoint = frc.compute_now_checkpointed(location, datetime.timedelta(hours=24))
+
+    # only observations from the checkpoint are fetched, including the observation at the checkpoint
+    client.fetched = []
+    wd = frc.get_wd_now_checkpointed(location, checkpoint)
+    assert len(client.fetched) == 1
+    assert client.fetched[0][0] == checkpoint.timestamp
+    assert wd.observations.data[0].timestamp == checkpoint.timestamp
+
+    # a checkpoint older than the longest spin-up window is spun up again
+    stale = checkpoint.model_copy(update={'timestamp': now - spinup.WINDOWS[-1] - datetime.timedelta(hours=1)})
+    assert frc.resumable_checkpoint(stale) is None
+    client.fetched = []
+    frc.get_wd_now_checkpointed(location, stale)
+    assert client.fetched[0][1] - client.fetched[0][0] == spinup.WINDOWS[-1]
+
+    # without a checkpoint, obs_delta into the past
+    client.fetched = []
+    frc.get_wd_now_checkpointed(location, obs_delta=datetime.timedelta(hours=12))
+    assert client.fetched[0][1] - client.fetched[0][0] == datetime.timedelta(hours=12)
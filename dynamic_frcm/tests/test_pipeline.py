@@ -0,0 +1,76 @@
+import datetime
+import threading
+import time
+
+import pytest
+
+from frcm.datamodel.model import Location
+from frcm.frcapi import FireRiskAPI
+from frcm.pipeline import Pipeline, Stage
+from test_frcapi import FakeClient
+
+
+def test_pipeline_bounded_and_overlapping():
+    in_flight = []
+    lock = threading.Lock()
+    started = []
+    computed = []
+    # (start, end) of every call of each stage
+    intervals = {'fetch': [], 'compute': []}
+
+    def fetch(item):
+        begin = time.perf_counter()
+        with lock:
+            started.append(item)
+        time.sleep(0.01)
+        intervals['fetch'].append((begin, time.perf_counter()))
+        return item
+
+    def compute(item):
+        begin = time.perf_counter()
+        time.sleep(0.01)
+        # items started but not yet computed
+        with lock:
+            in_flight.append(len(started) - len(computed))
+            computed.append(item)
+        intervals['compute'].append((begin, time.perf_counter()))
+        return item * item
+
+    pipeline = Pipeline([Stage('fetch', fetch, workers=4), Stage('compute', compute)], queue_size=2)
+    results = dict(pipeline.run(range(40)))
+
+    assert results == {item: item * item for item in range(40)}
+    # backpressure - fetching does not run ahead of the computation by more than the fetch workers and the queue
+    assert max(in_flight) <= 4 + 2 + 1
+    # fetching overlaps with computing - some fetches run while an item is computed
+    assert any(fetch_start < compute_end and compute_start < fetch_end
+               for fetch_start, fetch_end in intervals['fetch']
+               for compute_start, compute_end in intervals['compute'])
+
+
+def test_pipeline_requires_stages():
+    with pytest.raises(ValueError):
+        Pipeline([])
+
+
+def test_pipeline_raises_stage_error():
+    def compute(item):
+        if item == 3:
+            raise ValueError('bad item')
+        return item
+
+    with pytest.raises(ValueError, match='bad item'):
+        list(Pipeline([Stage('compute', compute, workers=2)]).run(range(10)))
+
+
+def test_compute_now_pipeline():
+    now = datetime.datetime.now(datetime.timezone.utc).replace(minute=0, second=0, microsecond=0)
+    frc = FireRiskAPI(client=FakeClient(now))
+    locations = [Location(latitude=60.0 + n, longitude=5.0) for n in range(5)]
+
+    results = list(frc.compute_now_pipeline(locations, datetime.timedelta(days=1), fetch_workers=2))
+
+    assert sorted(location.latitude for location, _ in results) == [location.latitude for location in locations]
+    expected = frc.compute_now(locations[0], datetime.timedelta(days=1))
+    for _, prediction in results:
+        assert [fr.ttf for fr in prediction.firerisks] == [fr.ttf for fr in expected.firerisks]
@@ -0,0 +1,64 @@
+import datetime
+
+import numpy as np
+import pytest
+
+import frcm.fireriskmodel.compute as compute
+import frcm.fireriskmodel.quality as qc
+from frcm.datamodel.model import Forecast, WeatherData
+from frcm.datamodel.series import WeatherSeries
+from frcm.fireriskmodel.cache import ComputeCache
+
+
+def test_clean_weatherdata_passes(weatherdata):
+    report = qc.check_weatherdata(weatherdata)
+
+    assert report.passed
+    assert report.points == 264 and report.is_sorted and report.duplicates == 0
+    assert report.max_gap == 3600
+    assert report.gaps == []
+
+    prediction, checked = compute.compute_checked(weatherdata)
+    assert prediction == compute.compute(weatherdata)
+    assert checked == report
+
+
+def test_quality_findings(weatherdata):
+    series = WeatherSeries.concat(weatherdata.forecast.series[:12], weatherdata.forecast.series)
+    series.humidity[40:50] = np.nan
+    series.temperature[60] = 80.0
+    series.wind_speed[61] = np.nan
+
+    report = qc.check(series)
+
+    assert not report.passed
+    assert not report.is_sorted
+    assert report.duplicates == 12
+    assert report.out_of_range == {'temperature': 1, 'humidity': 0, 'wind_speed': 0}
+    assert report.nan_fraction['wind_speed'] == pytest.approx(1 / 216)
+    assert report.max_gap == 11 * 3600
+    assert len(report.gaps) == 1
+    assert report.gaps[0].end - report.gaps[0].start == datetime.timedelta(hours=11)
+
+
+def test_compute_checked_rejects(weatherdata):
+    series = weatherdata.forecast.series
+    series.temperature = np.where(np.arange(len(series)) % 2 == 0, np.nan, series.temperature)
+    wd = WeatherData(created=weatherdata.created, observations=weatherdata.observations,
+                     forecast=Forecast(location=weatherdata.forecast.location, series=series))
+
+    with pytest.raises(qc.QualityError) as error:
+        compute.compute_checked(wd)
+    assert error.value.report.nan_fraction['temperature'] > qc.MAX_NAN_FRACTION
+
+    _, report = compute.compute_checked(wd, reject=False)
+    assert not report.passed
+
+    # the cache checks before looking up or simulating
+    cache = ComputeCache()
+    with pytest.raises(qc.QualityError):
+        cache.compute_series(wd, checked=True)
+    with pytest.raises(qc.QualityError):
+        cache.compute_checkpointed_series(wd, checked=True)
+    assert cache.stats().misses == 0
+    assert len(cache.compute_series(wd)) > 0
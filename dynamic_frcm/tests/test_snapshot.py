@@ -0,0 +1,72 @@
+import datetime
+
+import numpy as np
+import pytest
+
+import frcm.datamodel.snapshot as sn
+import frcm.fireriskmodel.compute as compute
+from conftest import make_weatherdata
+
+
+def test_snapshot_roundtrip(weatherdata, tmp_path):
+    snapshot = sn.to_snapshot(weatherdata)
+    loaded = sn.from_snapshot(snapshot)
+
+    assert loaded == weatherdata
+    assert loaded.observations.data == weatherdata.observations.data
+    assert compute.compute(loaded) == compute.compute(weatherdata)
+
+    # the columns are views of the snapshot
+    assert not loaded.forecast.series.temperature.flags.owndata
+    assert not loaded.forecast.series.temperature.flags.writeable
+
+    path = tmp_path / 'wd.frwd'
+    sn.write_snapshot(weatherdata, path)
+    assert sn.read_snapshot(path) == weatherdata
+
+    with pytest.raises(ValueError):
+        sn.from_snapshot(weatherdata.model_dump_json().encode())
+
+
+def test_archive_append_and_reopen(tmp_path):
+    path = tmp_path / 'archive.frwa'
+    start = datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc)
+    wds = [make_weatherdata(start=start + datetime.timedelta(days=day), seed=day) for day in range(5)]
+
+    archive = sn.SnapshotArchive(path)
+    assert list(archive) == []
+    archive.extend(wds[:3])
+    assert list(archive) == wds[:3]
+
+    # appending to a reopened archive
+    archive = sn.SnapshotArchive(path)
+    archive.extend(wds[3:])
+    archive = sn.SnapshotArchive(path)
+
+    assert len(archive) == 5
+    assert [entry.created for entry in archive.index()] == [wd.created for wd in wds]
+    assert archive[4] == wds[4]
+    assert list(archive.between(wds[1].created, wds[3].created)) == wds[1:4]
+    np.testing.assert_array_equal(archive[2].observations.series.humidity, wds[2].observations.series.humidity)
+
+
+def test_archive_interrupted_append(tmp_path):
+    path = tmp_path / 'archive.frwa'
+    start = datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc)
+    wds = [make_weatherdata(start=start + datetime.timedelta(days=day), seed=day) for day in range(3)]
+
+    archive = sn.SnapshotArchive(path)
+    archive.extend(wds[:2])
+
+    # an append interrupted before its index was written leaves part of a snapshot after the indexed ones
+    with open(path, 'ab') as file:
+        file.write(sn.to_snapshot(wds[2])[:1000])
+    with open(f'{path}.idx.123.tmp', 'wb') as file:
+        file.write(b'FRWA')
+
+    archive = sn.SnapshotArchive(path)
+    assert list(archive) == wds[:2]
+
+    archive.append(wds[2])
+    assert list(sn.SnapshotArchive(path)) == wds
+    assert path.stat().st_size == sum(entry.length for entry in archive.index())
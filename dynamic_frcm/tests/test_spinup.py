@@ -0,0 +1,31 @@
+import datetime
+
+import frcm.fireriskmodel.spinup as spinup
+from conftest import make_weatherdata
+
+
+def test_spinup_difference_decreases_with_window():
+    wd = make_weatherdata(obs_hours=200, fct_hours=66)
+    last_obs = wd.observations.data[-1].timestamp
+
+    differences = [spinup.spinup_difference(wd, last_obs - window) for window in spinup.WINDOWS]
+
+    assert all(later < earlier for earlier, later in zip(differences, differences[1:]))
+
+    # the shortest window whose difference is within the tolerance
+    window = spinup.select_window(wd)
+    assert differences[spinup.WINDOWS.index(window)] <= spinup.TOLERANCE
+    assert all(difference > spinup.TOLERANCE for difference in differences[:spinup.WINDOWS.index(window)])
+
+    assert spinup.select_window(wd, tolerance=0.0) == spinup.WINDOWS[-1]
+
+
+def test_spinup_cache_per_station_and_season():
+    cache = spinup.SpinupCache()
+    january = datetime.datetime(2025, 1, 20, tzinfo=datetime.timezone.utc)
+
+    cache.put('SN50540', january, datetime.timedelta(days=3))
+
+    assert cache.get('SN50540', january.replace(month=2)) == datetime.timedelta(days=3)
+    assert cache.get('SN50540', january.replace(month=7)) is None
+    assert cache.get('SN18700', january) is None
@@ -0,0 +1,57 @@
+import numpy as np
+
+import frcm.fireriskmodel.compute as compute
+import frcm.fireriskmodel.preprocess as pp
+import frcm.fireriskmodel.surrogate as surrogate
+from conftest import make_weatherdata
+
+
+def test_surrogate_within_error_envelope():
+    temp, humidity = surrogate.calibration_weather(locations=40, hours=24 * 10, seed=7)
+    with np.errstate(all='ignore'):
+        ttf = surrogate._exact_ttf(temp, humidity)
+    valid = np.isfinite(ttf).all(axis=1)
+
+    error = np.abs(surrogate.predict_ttf(temp[valid], humidity[valid]) / ttf[valid] - 1)
+
+    assert error.max() <= surrogate.DEFAULT_SURROGATE.max_error
+    assert np.quantile(error, 0.99) <= 2 * surrogate.DEFAULT_SURROGATE.p99_error
+
+
+def test_surrogate_without_ventilation():
+    # the indoor set point as outdoor temperature, where the ventilation factor is zero
+    temp = np.concatenate([np.full(10, 10.0), np.full(38, 22.0)])
+    humidity = np.full(48, 70.0)
+
+    with np.errstate(all='raise'):
+        ttf = surrogate.predict_ttf(temp, humidity)
+    ttf_exact = surrogate._exact_ttf(temp[np.newaxis], humidity[np.newaxis])[0]
+
+    assert np.isfinite(ttf).all()
+    assert np.all(np.abs(ttf / ttf_exact - 1) <= surrogate.DEFAULT_SURROGATE.max_error)
+
+
+def test_hybrid_exact_near_threshold():
+    wds = [make_weatherdata(seed=seed, temp_offset=4.0 * seed) for seed in range(4)]
+    exact = compute.compute_many(wds)
+    ttf_exact = np.array([[fr.ttf for fr in prediction.firerisks] for prediction in exact])
+
+    # only the first (coldest and most humid) location comes near the threshold
+    threshold = 5.3
+    rows = [pp.preprocess(wd, exact[0].firerisks[0].timestamp, exact[0].firerisks[-1].timestamp) for wd in wds]
+    _, computed_exactly = surrogate.hybrid_ttf(np.stack([row[2] for row in rows]), np.stack([row[3] for row in rows]), threshold)
+    assert computed_exactly[0] and not computed_exactly[-1]
+
+    hybrid = surrogate.compute_hybrid(wds, threshold)
+    ttf_hybrid = np.array([[fr.ttf for fr in prediction.firerisks] for prediction in hybrid])
+
+    np.testing.assert_allclose(ttf_hybrid[computed_exactly], ttf_exact[computed_exactly], rtol=1e-12)
+    np.testing.assert_allclose(ttf_hybrid, ttf_exact, rtol=surrogate.DEFAULT_SURROGATE.max_error)
+
+    # locations classified the same as by the exact model
+    assert np.array_equal(np.any(ttf_hybrid < threshold, axis=1), np.any(ttf_exact < threshold, axis=1))
+
+
+def test_surrogate_model_json():
+    model = surrogate.SurrogateModel.from_json(surrogate.DEFAULT_SURROGATE.to_json())
+    assert model == surrogate.DEFAULT_SURROGATE
@@ -0,0 +1,56 @@
+import dataclasses
+
+import numpy as np
+import pytest
+
+import frcm.fireriskmodel.compute as compute
+import frcm.fireriskmodel.kernels as kn
+import frcm.fireriskmodel.parameters as mp
+import frcm.fireriskmodel.preprocess as pp
+import frcm.fireriskmodel.tables as tb
+from conftest import make_weatherdata
+
+
+def exact_beta_cac(temp_c_out, rh_out, temp_c_in, gamma):
+    beta = kn.calc_beta(kn.calc_ach(temp_c_out, temp_c_in, gamma))
+    cw_out = kn.calc_cw(rh_out, kn.calc_cwsat(kn.calc_pwsat(temp_c_out), temp_c_out))
+    return beta, kn.calc_cac(beta, cw_out, temp_c_out, temp_c_in)
+
+
+@pytest.mark.parametrize('temp_c_in, gamma', [(22, 380), (15, 380), (25, 250), (19.3, 300)])
+def test_tabulated_kernels_within_max_error(temp_c_in, gamma):
+    temp_c_out = np.linspace(tb.TEMP_MIN, tb.TEMP_MAX, 1_000_001)
+    rh_out = np.full_like(temp_c_out, 80.0)
+
+    beta, c_ac = tb.calc_beta_cac(temp_c_out, rh_out, temp_c_in, gamma)
+    beta_exact, c_ac_exact = exact_beta_cac(temp_c_out, rh_out, temp_c_in, gamma)
+
+    # beta and c_ac are zero where outdoor and indoor temperature are equal
+    nonzero = beta_exact > 0
+    assert np.max(np.abs(beta - beta_exact)[nonzero] / beta_exact[nonzero]) <= tb.MAX_ERROR_BETA
+    assert np.max(np.abs(c_ac - c_ac_exact)[nonzero] / c_ac_exact[nonzero]) <= tb.MAX_ERROR_AIR_CHANGE
+    assert np.all(np.abs(beta - beta_exact)[~nonzero] <= tb.MAX_ERROR_BETA * np.max(beta_exact))
+
+
+def test_values_outside_table_are_exact():
+    temp_c_out = np.array([-80.0, tb.TEMP_MIN - 0.1, 10.0, tb.TEMP_MAX + 0.1, np.nan])
+    rh_out = np.full_like(temp_c_out, 50.0)
+
+    beta, c_ac = tb.calc_beta_cac(temp_c_out, rh_out)
+    beta_exact, c_ac_exact = exact_beta_cac(temp_c_out, rh_out, mp.T_c_in, mp.gamma)
+
+    np.testing.assert_array_equal(beta[[0, 1, 3]], beta_exact[[0, 1, 3]])
+    np.testing.assert_array_equal(c_ac[[0, 1, 3]], c_ac_exact[[0, 1, 3]])
+    assert np.isnan(beta[-1]) and np.isnan(c_ac[-1])
+
+
+def test_tabulated_ttf_within_max_error():
+    rows = [pp.preprocess(make_weatherdata(seed=seed, temp_offset=offset)) for seed in range(3) for offset in (-25, 0, 15)]
+    temp = np.stack([row[2] for row in rows])
+    humidity = np.stack([row[3] for row in rows])
+    params = [mp.DEFAULT_PARAMETERS, dataclasses.replace(mp.DEFAULT_PARAMETERS, T_c_in=18, gamma=300)] * 4 + [mp.DEFAULT_PARAMETERS]
+
+    for p in (None, params):
+        _, ttf = compute.compute_fr(temp, humidity, params=p)
+        _, ttf_tabulated = compute.compute_fr(temp, humidity, params=p, tabulated=True)
+        assert np.max(np.abs(ttf_tabulated - ttf) / ttf) <= tb.MAX_ERROR_TTF